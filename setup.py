@@ -16,6 +16,7 @@ setup(
     license="FREE",
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={"local": ["ctranslate2>=3.0", "sentencepiece>=0.1.99"]},
     packages=find_packages(),
     entry_points={
         "console_scripts": ["srtranslator=srtranslator.__main__:main"],
@@ -2,7 +2,8 @@ import os
 
 from .ass_file import AssFile
 from .srt_file import SrtFile
+from .formats import UnsupportedFormatError, load_subtitle
 
 os.environ["MOZ_HEADLESS"] = "1"
 
-__all__ = ["AssFile", "SrtFile"]
+__all__ = ["AssFile", "SrtFile", "UnsupportedFormatError", "load_subtitle"]
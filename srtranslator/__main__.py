@@ -4,31 +4,94 @@ import argparse
 import logging
 import os
 import sys
+import threading
 import traceback
 from typing import Dict, Type
 
-from .ass_file import AssFile
-from .srt_file import SrtFile
-from .translators.base import Translator
-from .translators.deepl_api import DeeplApi
+from .context import CONTEXT_POLICY, DEFAULT_BUDGET, ContextBudget, parse_budgets
+from .fanout import translate_file_languages
+from .formats import UnsupportedFormatError
+from .formats import load_subtitle as load_subtitle_file
+from .incremental import translate_incremental
+from .jobqueue import WorkQueue
+from .retry import IncompleteTranslationError, RetryPolicy
+from .memory import DEFAULT_THRESHOLD, open_memory
+from .metrics import METRICS
+from .pipeline import translate_files
+from .planner import Backend, format_report, plan_file
+from .progress import ProgressEvent, render_progress
+from .translators.base import QuotaExceededError, Translator
+from .translators.coalescer import RequestCoalescer
+from .translators.deepl_api import DOCUMENT_MAX_CHAR, DeeplApi, document_requests
 from .translators.deepl_scrap import DeeplTranslator
+from .translators.failover import FailoverTranslator
+from .translators.memory import MemoryTranslator
+from .translators.opus_mt import OpusMT
 from .translators.pydeeplx import PyDeepLX
 from .translators.translatepy import TranslatePy
+from .server import DEFAULT_HOST, DEFAULT_PORT, TranslationServer, submit_job
+from .util import destination_path
+from .watch import FolderWatcher
 
 LOG = logging.getLogger("srtranslator")
 
+# EX_TEMPFAIL, the job can be run again once the quota is renewed
+EXIT_DEFERRED = 75
+
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="srtranslator",
         description="Translate .srt and .ass subtitle files from the command line",
+        epilog="Run `srtranslator serve -h` for the long-running translation service and "
+        "`srtranslator worker -h` for work queue workers.",
     )
 
     parser.add_argument(
-        "filepath",
+        "filepaths",
         metavar="path",
         type=str,
-        help="Subtitle file to translate",
+        nargs="*",
+        help="Subtitle files to translate, several are translated as a batch",
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Plan the translation and report characters to bill, requests per translator, "
+        "backup hits and estimated time, without translating",
+    )
+
+    parser.add_argument(
+        "--watch",
+        metavar="DIR",
+        type=str,
+        help="Translate .srt/.ass files as they land in DIR (and its subdirectories) "
+        "instead of a single file",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="Files translated at the same time with --watch or several paths, and in "
+        "--dry-run estimates. Default: 2",
+    )
+
+    parser.add_argument(
+        "--coalesce",
+        metavar="MS",
+        type=float,
+        help="With --watch or several paths, share one translator between the --workers and "
+        "pack their small chunks into common requests, waiting up to MS milliseconds for "
+        "chunks to join a request",
+    )
+
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Processes parsing, planning and writing files when several paths are given. "
+        "Default: number of CPUs",
     )
 
     parser.add_argument(
@@ -44,9 +107,124 @@ def build_parser() -> argparse.ArgumentParser:
         "--dest-lang",
         type=str,
         default="es",
-        help="Destination language. Default: es (Spanish)",
+        help="Destination language, or comma separated languages translated concurrently "
+        "(e.g. es,fr,de). Default: es (Spanish)",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--wrap-limit",
+        type=int,
+        default=50,
+        help="Number of characters -including spaces- to wrap a line of text. Default: 50",
+    )
+
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=4,
+        help="Attempts per chunk before it is left for a last round at the end of the file, "
+        "with exponential backoff between attempts. Default: 4",
     )
 
+    parser.add_argument(
+        "--previous",
+        nargs=2,
+        metavar=("SOURCE", "TRANSLATION"),
+        help="Previous source file and its translation: only the subtitles changed since then "
+        "are translated, the others keep their previous translation with the new timings",
+    )
+
+    parser.add_argument(
+        "--server",
+        type=str,
+        help="Submit the job to a running `srtranslator serve` instead of translating here "
+        "(e.g. http://127.0.0.1:8765)",
+    )
+
+    parser.add_argument(
+        "--queue",
+        metavar="DB",
+        type=str,
+        help="Queue the file in a work queue database for `srtranslator worker` processes "
+        "instead of translating here",
+    )
+
+    parser.add_argument(
+        "--priority",
+        type=int,
+        default=0,
+        help="Job priority on the server, higher runs first. Default: 0",
+    )
+
+    add_translator_arguments(parser)
+    return parser
+
+
+def build_serve_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="srtranslator serve",
+        description="Run a local translation service that keeps translators warm between jobs",
+    )
+
+    parser.add_argument(
+        "--host",
+        type=str,
+        default=DEFAULT_HOST,
+        help=f"Address to listen on. Default: {DEFAULT_HOST}",
+    )
+
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port to listen on. Default: {DEFAULT_PORT}",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Jobs translated at the same time, each worker keeps its own translator. Default: 1",
+    )
+
+    add_translator_arguments(parser)
+    return parser
+
+
+def build_worker_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="srtranslator worker",
+        description="Translate chunks claimed from a work queue database shared by workers",
+    )
+
+    parser.add_argument(
+        "--queue",
+        metavar="DB",
+        type=str,
+        required=True,
+        help="Work queue database (SQLite), created by `srtranslator path --queue DB`",
+    )
+
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=60,
+        help="Seconds before chunks of a worker that stopped responding are reclaimed. "
+        "Default: 60",
+    )
+
+    parser.add_argument(
+        "--exit-when-empty",
+        action="store_true",
+        help="Exit once every queued job is done instead of waiting for new ones",
+    )
+
+    add_translator_arguments(parser)
+    return parser
+
+
+def add_translator_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "-v",
         "--verbose",
@@ -73,19 +251,11 @@ def build_parser() -> argparse.ArgumentParser:
         help="Show browser window (Selenium-based translators)",
     )
 
-    parser.add_argument(
-        "-w",
-        "--wrap-limit",
-        type=int,
-        default=50,
-        help="Number of characters -including spaces- to wrap a line of text. Default: 50",
-    )
-
     parser.add_argument(
         "-t",
         "--translator",
         type=str,
-        choices=["deepl-scrap", "translatepy", "deepl-api", "pydeeplx"],
+        choices=["deepl-scrap", "translatepy", "deepl-api", "pydeeplx", "opus-mt"],
         help="Built-in translator to use",
         default="deepl-scrap",
     )
@@ -93,7 +263,36 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--auth",
         type=str,
-        help="API key if needed by the translator",
+        help="API key if needed by the translator. Several comma separated deepl-api keys are "
+        "pooled: requests are spread over them by quota left and rate limits",
+    )
+
+    parser.add_argument(
+        "--lean-browser",
+        action="store_true",
+        help="Start Firefox with a lean cached profile: no images, fonts, media, telemetry or "
+        "third-party hosts, small window (only for deepl-scrap)",
+    )
+
+    parser.add_argument(
+        "--model",
+        type=str,
+        help="Converted model directory, or a directory of them named by language pair like "
+        "en-es (only for opus-mt)",
+    )
+
+    parser.add_argument(
+        "--inter-threads",
+        type=int,
+        default=1,
+        help="Batches translated in parallel by the model (only for opus-mt). Default: 1",
+    )
+
+    parser.add_argument(
+        "--intra-threads",
+        type=int,
+        default=0,
+        help="Threads per batch, 0 for one per core (only for opus-mt). Default: 0",
     )
 
     parser.add_argument(
@@ -108,6 +307,15 @@ def build_parser() -> argparse.ArgumentParser:
         help="Context for DeepL translation (only for deepl-api)",
     )
 
+    parser.add_argument(
+        "--context-budget",
+        type=str,
+        help="Characters of surrounding lines sent as context, BEFORE:AFTER for every language "
+        "pair or PAIR=BEFORE:AFTER entries (e.g. 1500:500,en-ja=3000:1500). Default: 2000:1000, "
+        "shrunk when the recorded latencies show context slowing requests down (only for "
+        "deepl-api)",
+    )
+
     parser.add_argument(
         "--model-type",
         type=str,
@@ -115,7 +323,49 @@ def build_parser() -> argparse.ArgumentParser:
         help="Model type for DeepL translation (only for deepl-api)",
     )
 
-    return parser
+    parser.add_argument(
+        "--document",
+        action="store_true",
+        help="Send whole files through DeepL document translation instead of one request "
+        "per chunk, without per chunk context, for files of 50000 characters or more "
+        "(only for deepl-api)",
+    )
+
+    parser.add_argument(
+        "--fallback",
+        type=str,
+        help="Comma separated translators to fail over to, in order (e.g. deepl-api,translatepy). "
+        "A chunk is also sent to the next one when a translator is slower than --slo",
+    )
+
+    parser.add_argument(
+        "--slo",
+        type=float,
+        default=20.0,
+        help="Seconds to wait for a translator before hedging on the next --fallback. Default: 20",
+    )
+
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Reuse the translations of identical and near-identical lines translated before, "
+        "and remember the new ones (~/.cache/srtranslator/memory.db)",
+    )
+
+    parser.add_argument(
+        "--memory-file",
+        type=str,
+        help="Translation memory file to use instead of the default one (implies --memory)",
+    )
+
+    parser.add_argument(
+        "--memory-threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Least similarity of a line to one in the memory for its translation to be reused, "
+        "1 for exact matches only (case, punctuation and spaces aside). Default: 0.9",
+    )
+
 
 
 BUILTIN_TRANSLATORS: Dict[str, Type[Translator]] = {
@@ -123,6 +373,7 @@ BUILTIN_TRANSLATORS: Dict[str, Type[Translator]] = {
     "deepl-api": DeeplApi,
     "translatepy": TranslatePy,
     "pydeeplx": PyDeepLX,
+    "opus-mt": OpusMT,
 }
 
 
@@ -138,51 +389,219 @@ def configure_headless(show_browser: bool) -> None:
 
 
 def load_subtitle(filepath: str):
-    try:
-        return AssFile(filepath)
-    except AttributeError:
-        LOG.info("Falling back to SRT parsing")
-        return SrtFile(filepath)
+    return load_subtitle_file(filepath)
+
+
+def build_translator_args(args: argparse.Namespace, name: str | None = None) -> dict:
+    name = name or args.translator
+    translator_args = {}
+    # A fallback only gets the API key if it is the one needing it
+    if args.auth and (name == args.translator or name == "deepl-api"):
+        translator_args["api_key"] = args.auth
+
+    if name == "deepl-scrap" and args.lean_browser:
+        translator_args["lean"] = True
+
+    if name == "opus-mt":
+        translator_args["model_path"] = args.model
+        translator_args["inter_threads"] = args.inter_threads
+        translator_args["intra_threads"] = args.intra_threads
+
+    if name == "pydeeplx" and args.proxies:
+        translator_args["proxies"] = args.proxies
+
+    if name == "deepl-api":
+        if args.context:
+            translator_args["context"] = args.context
+        if args.model_type:
+            translator_args["model_type"] = args.model_type
+        if args.document:
+            translator_args["document_mode"] = True
+
+    return translator_args
+
+
+def build_translator(args: argparse.Namespace, translator_args: dict) -> Translator:
+    """Builds the translator picked with -t, behind a failover when --fallback is given and
+    a translation memory with --memory"""
+    translator = BUILTIN_TRANSLATORS[args.translator](**translator_args)
+    if args.fallback:
+        backends = [translator]
+        try:
+            for name in args.fallback:
+                backends.append(BUILTIN_TRANSLATORS[name](**build_translator_args(args, name)))
+        except BaseException:
+            for backend in backends:
+                backend.quit()
+            raise
+        translator = FailoverTranslator(backends, slo=args.slo)
+
+    if args.memory:
+        translator = MemoryTranslator(
+            translator, open_memory(args.memory_file), threshold=args.memory_threshold
+        )
+    return translator
+
+
+def build_coalescer(args: argparse.Namespace, translator_args: dict) -> RequestCoalescer | None:
+    """Shared translator packing the chunks of concurrent files when --coalesce is given"""
+    if args.coalesce is None:
+        return None
+    # A browser can only do one translation at a time
+    max_in_flight = 1 if args.translator == "deepl-scrap" else 4
+    return RequestCoalescer(
+        build_translator(args, translator_args),
+        window=args.coalesce / 1000,
+        max_in_flight=max_in_flight,
+    )
+
+
+def batch_context_budget(args: argparse.Namespace) -> ContextBudget | None:
+    """Context budget of batches and queued files, planned before any translator is built"""
+    names = [args.translator, *(args.fallback or [])]
+    if not any(
+        BUILTIN_TRANSLATORS[name].supports_context and not (name == "deepl-api" and args.document)
+        for name in names
+    ):
+        return None
+    return CONTEXT_POLICY.budgets.get("*", DEFAULT_BUDGET)
+
+
+def chunk_size(args: argparse.Namespace) -> int:
+    """max_char the translator picked on the command line will have, without building it"""
+    names = [args.translator, *(args.fallback or [])]
+    return int(
+        min(
+            # --document sends whole files
+            DOCUMENT_MAX_CHAR if name == "deepl-api" and args.document
+            else BUILTIN_TRANSLATORS[name].max_char
+            for name in names
+        )
+    )
+
+
+def parse_fallback(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if args.fallback is not None:
+        args.fallback = [name.strip() for name in args.fallback.split(",") if name.strip()]
+        unknown = [name for name in args.fallback if name not in BUILTIN_TRANSLATORS]
+        if unknown:
+            parser.error(f"unknown fallback translator(s): {', '.join(unknown)}")
+
+    if "opus-mt" in [args.translator, *(args.fallback or [])] and not args.model:
+        parser.error("opus-mt needs --model")
+
+    if args.context_budget:
+        try:
+            CONTEXT_POLICY.budgets.update(parse_budgets(args.context_budget))
+        except ValueError as exc:
+            parser.error(f"--context-budget: {exc}")
+
+    if not 0 < args.memory_threshold <= 1:
+        parser.error("--memory-threshold must be between 0 and 1")
+    if args.memory_file:
+        args.memory = True
 
 
 def main(argv: list[str] | None = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if argv[:1] == ["serve"]:
+        return serve(argv[1:])
+
+    if argv[:1] == ["worker"]:
+        return work(argv[1:])
+
     parser = build_parser()
     args = parser.parse_args(argv)
+    parse_fallback(parser, args)
 
     if sys.platform.startswith("win"):
         parser.error("SRTranslator CLI supports Linux and macOS only.")
 
+    if bool(args.filepaths) == bool(args.watch):
+        parser.error("either a subtitle path or --watch DIR is required")
+
+    if len(args.filepaths) > 1 and (args.server or args.queue):
+        parser.error("--server and --queue take a single subtitle path")
+    if args.coalesce is not None and len(args.filepaths) < 2 and not args.watch:
+        parser.error("--coalesce needs --watch or several subtitle paths")
+    args.filepath = args.filepaths[0] if args.filepaths else None
+
     configure_logging(args.loglevel)
     configure_headless(args.show_browser)
 
-    translator_args = {}
-    if args.auth:
-        translator_args["api_key"] = args.auth
+    translator_args = build_translator_args(args)
 
-    if args.translator == "pydeeplx" and args.proxies:
-        translator_args["proxies"] = args.proxies
+    dest_langs = [lang.strip() for lang in args.dest_lang.split(",") if lang.strip()]
+    if not dest_langs:
+        parser.error("at least one destination language is required")
 
-    if args.translator == "deepl-api":
-        if args.context:
-            translator_args["context"] = args.context
-        if args.model_type:
-            translator_args["model_type"] = args.model_type
+    if args.previous and (
+        len(dest_langs) > 1
+        or len(args.filepaths) > 1
+        or args.watch
+        or args.server
+        or args.queue
+        or args.dry_run
+    ):
+        parser.error("--previous only works translating one file into one language here")
 
-    translator = BUILTIN_TRANSLATORS[args.translator](**translator_args)
+    if args.dry_run:
+        if args.watch:
+            parser.error("--dry-run needs subtitle paths, not --watch")
+        return dry_run(args, dest_langs)
+
+    if args.watch:
+        return watch(args, dest_langs, translator_args)
+
+    if args.server:
+        return submit_to_server(args, dest_langs)
+
+    if args.queue:
+        return enqueue(args, dest_langs)
+
+    try:
+        if len(args.filepaths) > 1:
+            return translate_batch(args, dest_langs, translator_args)
+        if len(dest_langs) > 1:
+            return translate_languages(args, dest_langs, translator_args)
+        return translate(args, dest_langs[0], translator_args)
+    finally:
+        METRICS.save()
+
+
+def translate(args, dest_lang: str, translator_args: dict) -> int:
+    """Translates the file into one language, resuming from its backup ({filepath}.tmp)"""
+    translator = build_translator(args, translator_args)
     sub = None
     try:
         sub = load_subtitle(args.filepath)
 
-        sub.translate(translator, args.src_lang, args.dest_lang)
+        retry_policy = RetryPolicy(max_attempts=args.retries)
+        if args.previous:
+            translate_incremental(
+                sub, translator, args.src_lang, dest_lang, *args.previous, retry_policy=retry_policy
+            )
+        else:
+            sub.translate(translator, args.src_lang, dest_lang, retry_policy=retry_policy)
         sub.wrap_lines(args.wrap_limit)
 
-        dest_path = (
-            f"{os.path.splitext(args.filepath)[0]}_{args.dest_lang}"
-            f"{os.path.splitext(args.filepath)[1]}"
-        )
+        dest_path = destination_path(args.filepath, dest_lang)
         sub.save(dest_path)
         LOG.info("Translation completed. Saved to %s", dest_path)
         return 0
+    except UnsupportedFormatError as exc:
+        LOG.error("%s", exc)
+        return 1
+    except QuotaExceededError as exc:
+        # Nothing was translated, an existing backup is left as it is
+        LOG.error("Translation deferred: %s", exc)
+        return EXIT_DEFERRED
+    except IncompleteTranslationError as exc:
+        sub.save_backup()
+        LOG.error("Translation incomplete, %s. Backup saved to %s", exc, sub.backup_file)
+        return 1
     except Exception:
         if sub:
             sub.save_backup()
@@ -195,5 +614,283 @@ def main(argv: list[str] | None = None) -> int:
         translator.quit()
 
 
+def translate_languages(args, dest_langs: list[str], translator_args: dict) -> int:
+    """Translates the file into every destination language from a single load
+
+    Each language has its own translator, output file and backup file
+    ({filepath}.{lang}.tmp).
+    """
+    try:
+        sub = load_subtitle_file(args.filepath, load_backup=False)
+    except UnsupportedFormatError as exc:
+        LOG.error("%s", exc)
+        return 1
+
+    translated = sub.translate_languages(
+        lambda: build_translator(args, translator_args),
+        args.src_lang,
+        dest_langs,
+        retry_policy=RetryPolicy(max_attempts=args.retries),
+    )
+
+    for lang, lang_sub in translated.items():
+        if lang_sub is None:
+            continue
+        lang_sub.wrap_lines(args.wrap_limit)
+        dest_path = destination_path(args.filepath, lang)
+        lang_sub.save(dest_path)
+        LOG.info("Translation to %s completed. Saved to %s", lang, dest_path)
+
+    failed = [lang for lang in dest_langs if lang not in translated]
+    if failed:
+        LOG.error("Translation failed for: %s", ", ".join(failed))
+        return 1
+
+    deferred = [lang for lang, lang_sub in translated.items() if lang_sub is None]
+    if deferred:
+        LOG.error("Translation deferred for lack of quota: %s", ", ".join(deferred))
+        return EXIT_DEFERRED
+    return 0
+
+
+def translate_batch(args, dest_langs: list[str], translator_args: dict) -> int:
+    """Translates several files, parsing and writing them in a process pool
+
+    --workers threads translate, each one with its own translator, or all of them with
+    the same one through a coalescer with --coalesce.
+    """
+    coalescer = build_coalescer(args, translator_args)
+    try:
+        outputs, failures = translate_files(
+            args.filepaths,
+            coalescer.client if coalescer else lambda: build_translator(args, translator_args),
+            args.src_lang,
+            dest_langs,
+            chunk_size(args),
+            wrap_limit=args.wrap_limit,
+            workers=args.workers,
+            processes=args.processes,
+            retry_policy=RetryPolicy(max_attempts=args.retries),
+            context_budget=batch_context_budget(args),
+        )
+    finally:
+        if coalescer:
+            coalescer.quit()
+
+    for filepath, paths in outputs.items():
+        LOG.info("Translated %s: %s", filepath, ", ".join(paths.values()))
+
+    if failures:
+        LOG.error("Translation failed for: %s", ", ".join(failures))
+        if all(isinstance(exc, QuotaExceededError) for exc in failures.values()):
+            return EXIT_DEFERRED
+        return 1
+    return 0
+
+
+def dry_run(args, dest_langs: list[str]) -> int:
+    """Plans every file like a translation would and prints what it would cost
+
+    Nothing is sent to any translator, the time estimate uses the latencies recorded by
+    previous translations on this machine.
+    """
+    backends = [
+        Backend(
+            name,
+            translator_class.__name__,
+            int(translator_class.max_char),
+            supports_context=translator_class.supports_context,
+            adaptive_chunk_size=translator_class.adaptive_chunk_size,
+        )
+        for name, translator_class in BUILTIN_TRANSLATORS.items()
+    ]
+    selected = args.translator
+    if args.translator == "deepl-api" and args.document:
+        selected = "deepl-api --document"
+        backends.append(
+            Backend(
+                selected,
+                DeeplApi.__name__,
+                DOCUMENT_MAX_CHAR,
+                document_requests,
+                adaptive_chunk_size=False,
+            )
+        )
+
+    file_plans = []
+    for filepath in args.filepaths:
+        # The backups translate would resume from
+        if len(dest_langs) == 1:
+            backup_files = {dest_langs[0]: f"{filepath}.tmp"}
+        else:
+            backup_files = {}
+
+        try:
+            file_plans.append(
+                plan_file(filepath, args.src_lang, dest_langs, backends, backup_files)
+            )
+        except (OSError, UnsupportedFormatError) as exc:
+            LOG.error("%s", exc)
+            return 1
+
+    # Languages of a file run concurrently, --workers files at a time
+    concurrency = len(dest_langs) * max(1, min(args.workers, len(file_plans)))
+    print(format_report(file_plans, backends, METRICS, concurrency, selected))
+    return 0
+
+
+def submit_to_server(args, dest_langs: list[str]) -> int:
+    """Sends the file to a running server and shows the progress it streams back"""
+    job = {
+        "path": os.path.abspath(args.filepath),
+        "languages": dest_langs,
+        "source_language": args.src_lang,
+        "priority": args.priority,
+        "wrap_limit": args.wrap_limit,
+    }
+
+    failed = False
+
+    def on_event(event):
+        nonlocal failed
+        if event["event"] == "queued":
+            LOG.info("Job %s queued at position %s", event["job"], event["position"])
+        elif event["event"] == "progress":
+            render_progress(
+                ProgressEvent(**{field: event[field] for field in ProgressEvent._fields})
+            )
+        elif event["event"] == "done":
+            LOG.info("Translation to %s completed. Saved to %s", event["language"], event["path"])
+        elif event["event"] == "error":
+            failed = True
+            LOG.error("Translation failed: %s", event["message"])
+
+    try:
+        submit_job(args.server, job, on_event)
+    except (OSError, ValueError) as exc:
+        LOG.error("Server error: %s", exc)
+        return 1
+
+    return 1 if failed else 0
+
+
+def watch(args, dest_langs: list[str], translator_args: dict) -> int:
+    """Translates files landing in the watched directory until interrupted
+
+    Each worker thread keeps its own translator for all the files it translates, or
+    shares one with the others through a coalescer with --coalesce.
+    """
+    local = threading.local()
+    translators = []
+    coalescer = build_coalescer(args, translator_args)
+
+    def translate_file(path: str) -> list[str]:
+        if getattr(local, "translator", None) is None:
+            if coalescer:
+                local.translator = coalescer.client()
+            else:
+                local.translator = build_translator(args, translator_args)
+            translators.append(local.translator)
+
+        try:
+            outputs = translate_file_languages(
+                path, local.translator, args.src_lang, dest_langs, args.wrap_limit
+            )
+        except UnsupportedFormatError:
+            raise
+        except Exception:
+            # The translator may be in a broken state, the next file gets a new one
+            local.translator.quit()
+            local.translator = None
+            raise
+
+        LOG.info("Translated %s", path)
+        return list(outputs.values())
+
+    watcher = FolderWatcher(
+        args.watch,
+        translate_file,
+        workers=args.workers,
+        ignore_suffixes=[f"_{lang}" for lang in dest_langs],
+    )
+
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for translator in translators:
+            translator.quit()
+        if coalescer:
+            coalescer.quit()
+        METRICS.save()
+    return 0
+
+
+def enqueue(args, dest_langs: list[str]) -> int:
+    """Plans the file and queues one job per language for the workers"""
+    try:
+        job_ids = WorkQueue(args.queue).enqueue(
+            args.filepath,
+            dest_langs,
+            args.src_lang,
+            chunk_size(args),
+            args.wrap_limit,
+            context_budget=batch_context_budget(args),
+        )
+    except UnsupportedFormatError as exc:
+        LOG.error("%s", exc)
+        return 1
+
+    print(f"Queued job(s) {', '.join(map(str, job_ids))} in {args.queue}")
+    return 0
+
+
+def work(argv: list[str]) -> int:
+    parser = build_worker_parser()
+    args = parser.parse_args(argv)
+    parse_fallback(parser, args)
+
+    configure_logging(args.loglevel)
+    configure_headless(args.show_browser)
+
+    translator = build_translator(args, build_translator_args(args))
+    try:
+        WorkQueue(args.queue, lease_seconds=args.lease).run_worker(
+            translator, exit_when_empty=args.exit_when_empty
+        )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        translator.quit()
+        METRICS.save()
+    return 0
+
+
+def serve(argv: list[str]) -> int:
+    parser = build_serve_parser()
+    args = parser.parse_args(argv)
+    parse_fallback(parser, args)
+
+    configure_logging(args.loglevel)
+    configure_headless(args.show_browser)
+
+    translator_args = build_translator_args(args)
+    server = TranslationServer(
+        lambda: build_translator(args, translator_args),
+        workers=args.workers,
+        host=args.host,
+        port=args.port,
+    )
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        METRICS.save()
+    return 0
+
+
 if __name__ == "__main__":
     sys.exit(main())
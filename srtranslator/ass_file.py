@@ -1,11 +1,73 @@
 import os
 import re
+import copy
+import itertools
+import time
 import pyass
+import threading
+
+from typing import Callable, Dict, Generator, List, Set, Tuple
+
+from .chunking import CHUNK_SIZES, resize_plan
+from .context import CONTEXT_POLICY, DEFAULT_BUDGET, ContextBudget, language_pair
+from .fanout import planned_characters, translate_languages
+from .metrics import METRICS
+from .retry import IncompleteTranslationError, RetryPolicy, send_chunks
+from .normalizer import (
+    BREAK_PLACEHOLDER,
+    MARKUP_PLACEHOLDER,
+    CueMarkup,
+    normalize_ass,
+    restore_ass,
+    unescape,
+)
+from .progress import ProgressTracker, render_progress
+from .translators.base import Translator, line_cost
+
+# Override blocks like {\i1} or {\k20}
+OVERRIDE_TAG_REGEX = re.compile(r"{.*?}")
+# {\p1} and up switch the event to vector drawing mode
+DRAWING_TAG_REGEX = re.compile(r"{[^}]*\\p[1-9]")
+# Hard and soft line breaks plus hard spaces
+LAYOUT_CODES_REGEX = re.compile(r"\\[Nnh]")
+
+
+# The only uses of private pyass.Event attributes, as of pyass 0.1.4 (pinned in
+# requirements.txt): check them here when upgrading pyass
+def _is_unparsed(event) -> bool:
+    """Whether pyass could not parse the event line, it then only keeps the raw line"""
+    return bool(event._unknownRawText)
+
+
+def _copy_event(event):
+    """Shallow copy of an event, with its own text lock"""
+    clone = copy.copy(event)
+    clone._textParseLock = threading.Lock()
+    return clone
+
+
+def is_dialogue(event) -> bool:
+    """Whether an event holds text worth translating
+
+    Comments, unparseable lines, vector drawings and events without visible text (like
+    karaoke timing-only lines) are left as they are.
+
+    Args:
+        event (pyass.Event): ASS event
+
+    Returns:
+        bool: True if the event text should be translated
+    """
+    if event.format != pyass.EventFormat.DIALOGUE or _is_unparsed(event):
+        return False
+
+    text = event.text
+    if DRAWING_TAG_REGEX.search(text):
+        return False
+
+    return LAYOUT_CODES_REGEX.sub("", OVERRIDE_TAG_REGEX.sub("", text)).strip() != ""
 
-from typing import Generator
 
-from .translators.base import Translator
-from .util import show_progress
 
 
 class AssFile:
@@ -13,22 +75,80 @@ class AssFile:
 
     Args:
         filepath (str): file path of ass
+        progress_callback (Callable[[ProgressEvent], None], optional): Receives the progress
+            of translations. Defaults to a console progress line
+        content (str, optional): already read file content, avoids reading the file again
+        load_backup (bool, optional): resume from the backup file if there is one. Defaults to True
     """
 
-    def __init__(self, filepath: str, progress_callback=show_progress) -> None:
+    def __init__(
+        self,
+        filepath: str,
+        progress_callback=render_progress,
+        content: str | None = None,
+        load_backup: bool = True,
+    ) -> None:
         self.filepath = filepath
         self.backup_file = f"{self.filepath}.tmp"
         self.subtitles = []
         self.start_from = 0
         self.current_subtitle = 0
-        self.text_styles = []
+        # Override tags and line breaks taken out of each event, by event index
+        self.text_styles: Dict[int, CueMarkup] = {}
+        # Events that are not translated: comments, drawings, empty lines
+        self.skipped_events: Set[int] = set()
+        # Stacked duplicates of an event (glow, border layers), by index of the first one
+        self.event_siblings: Dict[int, List[int]] = {}
         self.progress_callback = progress_callback
 
         print(f"Loading {filepath} as ASS")
-        with open(filepath, "r", encoding="utf-8", errors="ignore") as input_file:
-            self.subtitles = self.load_from_file(input_file)
+        if content is not None:
+            self.subtitles = self.load_from_string(content)
+        else:
+            with open(filepath, "r", encoding="utf-8", errors="ignore") as input_file:
+                self.subtitles = self.load_from_file(input_file)
+
+        if load_backup:
+            self._load_backup()
+        self._clean_subs_content(self.subtitles)
+        self._classify_events()
+
+    def _classify_events(self) -> None:
+        """Finds the events to skip and groups duplicated layers of the same line
+
+        Events with the same timing and the same normalized text (override tags set aside)
+        are typesetting layers of a single line, only the first one gets translated.
+        """
+        self.skipped_events = set()
+        self.event_siblings = {}
+        first_of_group = {}
+
+        for index, event in enumerate(self.subtitles.events):
+            if index < self.start_from:
+                continue
+
+            if not is_dialogue(event):
+                self.skipped_events.add(index)
+                continue
+
+            key = (event.start, event.end, event.text)
+            if key in first_of_group:
+                self.event_siblings[first_of_group[key]].append(index)
+                continue
+
+            first_of_group[key] = index
+            self.event_siblings[index] = []
 
-        self._load_backup()
+        n_siblings = sum(len(siblings) for siblings in self.event_siblings.values())
+        if self.skipped_events or n_siblings:
+            print(
+                f"Skipping {len(self.skipped_events)} non-dialogue events and "
+                f"{n_siblings} duplicated layers"
+            )
+
+    def _is_translated_event(self, index: int) -> bool:
+        """Whether the event is sent to the translator (not skipped nor a duplicate)"""
+        return index in self.event_siblings
 
     def _load_backup(self):
         if not os.path.exists(self.backup_file):
@@ -49,97 +169,95 @@ class AssFile:
             ]
 
     def load_from_file(self, input_file):
-        ass_file = pyass.load(input_file)
+        return self.load_from_string(input_file.read())
+
+    def load_from_string(self, content: str):
+        ass_file = pyass.loads(content)
         ass_file.events = sorted(ass_file.events, key=lambda e: (e.start))
-        return self._clean_subs_content(ass_file)
+        return ass_file
 
     def _get_next_chunk(self, chunk_size: int = 4500) -> Generator:
         """Get a portion of the subtitles at the time based on the chunk size
 
+        Only events that are translated are included, duplicated layers follow the first
+        event of their group.
+
         Args:
             chunk_size (int, optional): Maximum number of letter in text chunk. Defaults to 4500.
 
         Yields:
-            Generator: Each chunk at the time
+            Generator: Event indices of each chunk at the time
         """
+        events = self.subtitles.events
         portion = []
+        n_char = 0
 
-        for subtitle in self.subtitles.events[self.start_from :]:
-            # Manage ASS styles for subtitle before add it to the portion
-            # Extract a list of styles
-            # Replace the styles by |
-
-            # Each style starts with { and end with }
-            # If we have an "}" then we can split and keep the part on the left and keep it in our list
-            for i in subtitle.text.split("{"):
-                if "}" in i:
-                    self.text_styles.append("{" + i.split("}")[0] + "}")
-
-            subtitle.text = re.sub(r"{.*?}", r"|", subtitle.text)
-
-            # Calculate new chunk size if subtitle content is added to actual chunk
-            n_char = (
-                sum(len(sub.text) for sub in portion)  # All subtitles in chunk
-                + len(subtitle.text)  # New subtitle
-                + len(portion)  # Break lines in chunk
-                + 1  # New breakline
-            )
+        for index in range(self.start_from, len(events)):
+            if not self._is_translated_event(index):
+                continue
+
+            # Calculate new chunk size if subtitle content is added to actual chunk, framed
+            # the way translate_batch sends it
+            n_char += line_cost(len(portion), len(events[index].text))
 
             # If chunk goes beyond the limit, yield it
             if n_char >= chunk_size and len(portion) != 0:
                 yield portion
                 portion = []
+                n_char = line_cost(0, len(events[index].text))
 
             # Put subtitle content in chunk
-            portion.append(subtitle)
+            portion.append(index)
 
         # Yield last chunk
         yield portion
 
-    def _clean_subs_content(self, subtitles):
-        """Cleans subtitles content and delete line breaks
+    def _restore_styles(self, index: int, text: str) -> str:
+        """Puts the override tags and line breaks of an event back in place of its placeholders
+
+        Only the event's own markup is used, so events can be restored in any order.
 
         Args:
-            subtitles List of subtitles
+            index (int): Event index
+            text (str): Translated text with placeholders
 
         Returns:
-            Same list of subtitles, but cleaned
+            str: Text with its override tags and line breaks
         """
-        cleanr = re.compile("<.*?>")
-
-        for sub in subtitles.events:
-            sub.text = cleanr.sub("", sub.text)
-            # No real equivalent in ASS
-            # sub.text = srt.make_legal_content(sub.content)
-            sub.text = sub.text.strip()
+        return restore_ass(text, self.text_styles.pop(index, None))
 
-            if sub.text == "":
-                sub.text = "..."
+    def _clean_subs_content(self, subtitles):
+        """Normalizes the text of dialogue events still to translate
 
-            if all(sentence.startswith("-") for sentence in sub.text.split("\n")):
-                sub.text = sub.text.replace("\n", "////")
-                continue
+        Override tags and line breaks are replaced by placeholders and kept aside to be
+        restored once translated.
 
-            # It looks like \N is removed by the translation so we replace them by \\\\
-            sub.text = sub.text.replace(r"\N", r"\\\\")
+        Args:
+            subtitles: ASS script
 
-            # The \\\\ must be separated from the words to avoid weird conversions
-            sub.text = re.sub(r"[aA0-zZ9]\\\\", r" \\\\", sub.text)
-            sub.text = re.sub(r"\\\\[aA0-zZ9]", r"\\\\ ", sub.text)
+        Returns:
+            Same script, but cleaned
+        """
+        for index in range(self.start_from, len(subtitles.events)):
+            sub = subtitles.events[index]
+            if not is_dialogue(sub):
+                continue
 
-            sub.text = sub.text.replace("\n", " ")
+            sub.text, cue_markup = normalize_ass(sub.text)
+            if cue_markup.markup or cue_markup.breaks:
+                self.text_styles[index] = cue_markup
 
         return subtitles
 
     def wrap_lines(self, line_wrap_limit: int = 50) -> None:
-        """
+        """Restores markup of events that were not translated, ASS lines are not wrapped
 
         Args:
             line_wrap_limit (int): Number of maximum characters in a line before wrap. Defaults to 50. (not used)
         """
-        for sub in self.subtitles.events:
-            sub.text = sub.text.replace("////", "\n")
-            sub.text = sub.text.replace(r" \\\\ ", r"\N")
+        for index in list(self.text_styles):
+            event = self.subtitles.events[index]
+            event.text = self._restore_styles(index, event.text)
 
     def _detect_scenes(self, scene_gap_seconds: float = 2.0):
         """Detect scene boundaries based on time gaps between subtitles."""
@@ -156,6 +274,21 @@ class AssFile:
 
         return scene_starts
 
+    def _context_line(self, index: int) -> str:
+        """Plain text of an event for the context, empty for events not translated"""
+        event = self.subtitles.events[index]
+        if index < self.start_from:
+            if not is_dialogue(event):
+                return ""
+        elif not self._is_translated_event(index):
+            return ""
+
+        # Translated events have their markup back, normalizing is a no-op on the others
+        text, _ = normalize_ass(event.text)
+        return unescape(
+            text.replace(MARKUP_PLACEHOLDER, "").replace(BREAK_PLACEHOLDER, " ")
+        ).strip()
+
     def _build_deepl_context(
         self,
         scene_index: int,
@@ -173,7 +306,7 @@ class AssFile:
         current_before_chars = 0
 
         for i in range(chunk_start_idx - 1, scene_start_idx - 1, -1):
-            line_content = self.subtitles.events[i].text.strip()
+            line_content = self._context_line(i)
             if not line_content or line_content == "...":
                 continue
 
@@ -191,7 +324,7 @@ class AssFile:
         current_after_chars = 0
 
         for i in range(chunk_end_idx + 1, scene_end_idx + 1):
-            line_content = self.subtitles.events[i].text.strip()
+            line_content = self._context_line(i)
             if not line_content or line_content == "...":
                 continue
 
@@ -211,7 +344,7 @@ class AssFile:
             for i in range(
                 scene_start_idx, chunk_start_idx - len(history_before_lines)
             ):
-                line_content = self.subtitles.events[i].text.strip()
+                line_content = self._context_line(i)
                 if not line_content or line_content == "...":
                     continue
 
@@ -243,23 +376,25 @@ class AssFile:
 
         return "\n".join(context_parts) if len(context_parts) > 1 else None
 
-    def translate(
-        self,
-        translator: Translator,
-        source_language: str,
-        destination_language: str,
-    ) -> None:
-        """Translate ASS file using a translator of your choose
+    def _plan_chunks(
+        self, chunk_size: int, context_budget: ContextBudget | None = DEFAULT_BUDGET
+    ) -> List[Tuple[List[int], str | None]]:
+        """Splits the events left to translate in chunks and builds the context of each one
+
+        Contexts are built from the untranslated events, so a plan can be shared by every
+        destination language.
 
         Args:
-            translator (Translator): Translator object of choose
-            destination_language (str): Destination language (must be coherent with your translator)
-            source_language (str): Source language (must be coherent with your translator)
-        """
-        print("Starting translation")
+            chunk_size (int): Maximum number of letter in text chunk
+            context_budget (ContextBudget, optional): Context of the chunks, scaled to the
+                size of each one, None to send them without context. Defaults to 2000
+                characters before and 1000 after
 
-        # Detect scene boundaries
-        scene_starts = self._detect_scenes()
+        Returns:
+            List[Tuple[List[int], str | None]]: Event indices and context of each chunk
+        """
+        # Detect scene boundaries, only contexts need them
+        scene_starts = self._detect_scenes() if context_budget is not None else []
         if os.environ.get("DEBUG_CONTEXT"):
             print(f"Detected {len(scene_starts)} scenes in subtitle file")
 
@@ -274,31 +409,120 @@ class AssFile:
             for sub_idx in range(start_idx, end_idx + 1):
                 scene_map[sub_idx] = (scene_idx, start_idx, end_idx)
 
-        # For each chunk of the file (based on the translator capabilities)
-        chunk_num = 0
-        current_subtitle_idx = self.start_from
+        plan = []
+        for chunk in self._get_next_chunk(chunk_size):
+            if not chunk:
+                continue
 
-        for subs_slice in self._get_next_chunk(translator.max_char):
-            chunk_num += 1
-            chunk_start_idx = current_subtitle_idx
-            chunk_end_idx = current_subtitle_idx + len(subs_slice) - 1
+            chunk_start_idx = chunk[0]
+            chunk_end_idx = chunk[-1]
 
-            # Get scene info for this chunk
-            scene_idx, scene_start_idx, scene_end_idx = scene_map.get(
-                chunk_start_idx, (0, chunk_start_idx, chunk_end_idx)
-            )
+            context = None
+            if context_budget is not None:
+                # Get scene info for this chunk
+                scene_idx, scene_start_idx, scene_end_idx = scene_map.get(
+                    chunk_start_idx, (0, chunk_start_idx, chunk_end_idx)
+                )
+                budget = context_budget.for_chunk(
+                    sum(len(line) for line in self._chunk_text(chunk))
+                )
+
+                # Build DeepL context (surrounding lines, NOT current chunk)
+                context = self._build_deepl_context(
+                    scene_idx,
+                    chunk_start_idx,
+                    chunk_end_idx,
+                    scene_start_idx,
+                    scene_end_idx,
+                    max_history_chars_before=budget.before,
+                    max_history_chars_after=budget.after,
+                )
 
-            # Build text array (only lines to translate)
-            text = [sub.text for sub in subs_slice]
+            plan.append((chunk, context))
 
-            # Build DeepL context (surrounding lines, NOT current chunk)
-            current_context = self._build_deepl_context(
-                scene_idx,
-                chunk_start_idx,
-                chunk_end_idx,
-                scene_start_idx,
-                scene_end_idx,
-            )
+        return plan
+
+    def translate(
+        self,
+        translator: Translator,
+        source_language: str,
+        destination_language: str,
+        retry_policy: RetryPolicy | None = None,
+    ) -> None:
+        """Translate ASS file using a translator of your choose
+
+        Args:
+            translator (Translator): Translator object of choose
+            destination_language (str): Destination language (must be coherent with your translator)
+            source_language (str): Source language (must be coherent with your translator)
+            retry_policy (RetryPolicy, optional): Retries of failing chunks. Defaults to RetryPolicy()
+
+        Raises:
+            IncompleteTranslationError: If chunks still failed after their retries
+            QuotaExceededError: If the translator account can not translate the whole file,
+                nothing is translated then
+        """
+        plan = self._plan_chunks(
+            CHUNK_SIZES.size(translator, source_language, destination_language),
+            CONTEXT_POLICY.budget(translator, source_language, destination_language),
+        )
+        translator.check_quota(planned_characters(self, plan))
+        self._translate_plan(translator, source_language, destination_language, plan, retry_policy)
+
+    def _translate_plan(
+        self,
+        translator: Translator,
+        source_language: str,
+        destination_language: str,
+        plan: List[Tuple[List[int], str | None]],
+        retry_policy: RetryPolicy | None = None,
+    ) -> None:
+        """Translates the chunks of a plan made by _plan_chunks
+
+        A chunk failing with a retryable error waits for its retry aside while the next
+        chunks go on, see send_chunks. If it fails on every attempt, it gets a last round
+        once the others are done.
+
+        Args:
+            translator (Translator): Translator object of choose
+            source_language (str): Source language (must be coherent with your translator)
+            destination_language (str): Destination language (must be coherent with your translator)
+            plan (List[Tuple[List[int], str | None]]): Event indices and context of each chunk
+            retry_policy (RetryPolicy, optional): Retries of failing chunks. Defaults to RetryPolicy()
+
+        Raises:
+            IncompleteTranslationError: If chunks failed even in the last round, everything
+                else is translated then
+        """
+        retry_policy = retry_policy or RetryPolicy()
+        print("Starting translation")
+        tracker = ProgressTracker(
+            f"{os.path.basename(self.filepath)} ({destination_language})",
+            sum(1 for chunk, _ in plan for index in chunk if index >= self.start_from),
+            planned_characters(self, plan),
+            self.progress_callback,
+        )
+        # Backups hold what comes before the first event not translated yet
+        remaining = sorted(
+            {index for chunk, _ in plan for index in chunk if index >= self.start_from}
+        )
+        done = set()
+        position = 0
+        chunk_nums = itertools.count(1)
+
+        # Chunks bigger than the size the translator copes with right now are split
+        def chunk_size():
+            return CHUNK_SIZES.size(translator, source_language, destination_language)
+
+        def split(item):
+            return resize_plan([item], self._chunk_text, chunk_size)
+
+        def send(item):
+            nonlocal position
+            chunk, current_context = item
+            chunk_num = next(chunk_nums)
+            chunk_start_idx = chunk[0]
+            chunk_end_idx = chunk[-1]
 
             if os.environ.get("DEBUG_CONTEXT"):
                 if current_context:
@@ -311,42 +535,186 @@ class AssFile:
                 else:
                     print(f"\n[Chunk {chunk_num}] No context (start of scene)")
 
-            # Translate with context
-            translation = translator.translate(
-                text, source_language, destination_language, context=current_context
+            characters = sum(len(line) for line in self._chunk_text(chunk))
+            tracker.chunk_started()
+            try:
+                self._translate_chunk(
+                    translator, source_language, destination_language, chunk, current_context
+                )
+            except Exception:
+                tracker.chunk_failed()
+                raise
+            tracker.chunk_done(len(chunk), characters)
+
+            done.update(chunk)
+            while position < len(remaining) and remaining[position] in done:
+                position += 1
+            self.current_subtitle = (
+                remaining[position] if position < len(remaining) else len(self.subtitles.events)
             )
 
-            if isinstance(translation, str):
-                translation = translation.splitlines()
-
-            # Manage ASS commands
-            # Insert the styles back in the text instead of |
-            self.text_styles.reverse()
-
-            final_translations = []
-            for line in translation:
-                line_with_styles = ""
-                parts = line.split(r"|")
-                for i, part in enumerate(parts):
-                    line_with_styles += part
-                    if i < len(parts) - 1:
-                        try:
-                            line_with_styles += self.text_styles.pop()
-                        except IndexError:
-                            pass
-                final_translations.append(line_with_styles)
-
-            translation = final_translations
-            for i in range(len(subs_slice)):
-                subs_slice[i].text = translation[i]
-                self.current_subtitle += 1
-
-            self.progress_callback(
-                len(self.subtitles.events), progress=self.current_subtitle
+        # Skip what a backup of this language already holds
+        chunks = (
+            ([index for index in chunk if index >= self.start_from], current_context)
+            for chunk, current_context in resize_plan(plan, self._chunk_text, chunk_size)
+        )
+        try:
+            failed = send_chunks(
+                (item for item in chunks if item[0]), send, translator, retry_policy, split
             )
+        finally:
+            tracker.finish()
+        if failed:
+            raise IncompleteTranslationError(failed)
 
+        self.current_subtitle = len(self.subtitles.events)
         print("... Translation done")
 
+    def _translate_chunk(
+        self,
+        translator: Translator,
+        source_language: str,
+        destination_language: str,
+        chunk: List[int],
+        context: str | None,
+    ) -> None:
+        """Translates and applies one chunk, raises if it failed"""
+        text = self._chunk_text(chunk)
+        characters = sum(len(line) for line in text)
+        pair = language_pair(source_language, destination_language)
+
+        started = time.perf_counter()
+        try:
+            translation = translator.translate(
+                text, source_language, destination_language, context=context
+            )
+        except Exception as exc:
+            CHUNK_SIZES.record_failure(
+                translator, source_language, destination_language, characters, exc
+            )
+            raise
+        seconds = time.perf_counter() - started
+        METRICS.record(
+            type(translator).__name__,
+            characters,
+            seconds,
+            pair=pair,
+            context_characters=len(context or ""),
+        )
+        CHUNK_SIZES.record(
+            translator, source_language, destination_language, characters, seconds
+        )
+        # A wrong number of lines is retried too
+        try:
+            self._apply_chunk(chunk, translation)
+        except ValueError as exc:
+            METRICS.record_mismatch(type(translator).__name__, pair, bool(context))
+            CHUNK_SIZES.record_failure(
+                translator, source_language, destination_language, characters, exc
+            )
+            raise
+
+    def _chunk_text(self, chunk: List[int]) -> List[str]:
+        """Text sent to the translator for a chunk, one line per event"""
+        return [self.subtitles.events[index].text for index in chunk]
+
+    def _start_seconds(self, index: int) -> float:
+        """Start time of a subtitle, in seconds"""
+        return self.subtitles.events[index].start.total_seconds()
+
+    def _apply_chunk(self, chunk: List[int], translation) -> None:
+        """Puts the translation of a chunk in place, with each event's own styles
+
+        Args:
+            chunk (List[int]): Event indices of the chunk
+            translation (List[str] | str): One translated line per event
+
+        Raises:
+            ValueError: If the translation does not have one line per event, nothing is
+                changed then
+        """
+        if isinstance(translation, str):
+            translation = translation.splitlines()
+        if len(translation) != len(chunk):
+            raise ValueError(f"Got {len(translation)} translated lines for {len(chunk)} events")
+
+        # Insert each event's own styles back in place of its placeholders,
+        # duplicated layers get the same translation with their own styles
+        events = self.subtitles.events
+        for i, index in enumerate(chunk):
+            for event_index in (index, *self.event_siblings[index]):
+                events[event_index].text = self._restore_styles(event_index, translation[i])
+
+    def for_language(
+        self,
+        destination_language: str,
+        backup_file: str | None = None,
+        load_backup: bool = True,
+    ):
+        """Copy of the loaded events to translate into another language
+
+        The copy has its own backup file, and resumes from it if it exists.
+
+        Args:
+            destination_language (str): Destination language of the copy
+            backup_file (str, optional): Backup file of the copy. Defaults to {filepath}.{language}.tmp
+            load_backup (bool, optional): resume from the backup file if there is one. Defaults to True
+
+        Returns:
+            AssFile: Independent copy of this file
+        """
+        clone = copy.copy(self)
+        clone.backup_file = backup_file or f"{self.filepath}.{destination_language}.tmp"
+        clone.subtitles = copy.copy(self.subtitles)
+        clone.subtitles.sections = list(self.subtitles.sections)
+        clone.subtitles.events = [_copy_event(event) for event in self.subtitles.events]
+        clone.text_styles = dict(self.text_styles)
+        if load_backup:
+            clone._load_backup()
+
+        if clone.start_from:
+            # Events in the backup are translated already, layers are grouped again without them
+            clone.text_styles = {
+                index: cue_markup
+                for index, cue_markup in clone.text_styles.items()
+                if index >= clone.start_from
+            }
+            clone._classify_events()
+
+        return clone
+
+    def translate_languages(
+        self,
+        translator_factory: Callable[[], Translator],
+        source_language: str,
+        destination_languages: List[str],
+        max_workers: int | None = None,
+        backup_files: Dict[str, str] | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> Dict[str, "AssFile"]:
+        """Translates the file into several languages at once, see fanout.translate_languages
+
+        Args:
+            translator_factory (Callable[[], Translator]): Builds the translator of each language
+            source_language (str): Source language (must be coherent with your translator)
+            destination_languages (List[str]): Destination languages
+            max_workers (int, optional): Languages translated at the same time. Defaults to all
+            backup_files (Dict[str, str], optional): Backup file of some languages
+            retry_policy (RetryPolicy, optional): Retries of failing chunks. Defaults to RetryPolicy()
+
+        Returns:
+            Dict[str, AssFile]: Translated copy of each language that succeeded
+        """
+        return translate_languages(
+            self,
+            translator_factory,
+            source_language,
+            destination_languages,
+            max_workers=max_workers,
+            backup_files=backup_files,
+            retry_policy=retry_policy,
+        )
+
     def save_backup(self):
         self.subtitles.events = self.subtitles.events[: self.current_subtitle]
         self.save(self.backup_file)
@@ -366,3 +734,11 @@ class AssFile:
         print(f"Saving {filepath}")
         with open(filepath, "w", encoding="utf-8") as file_out:
             pyass.dump(self.subtitles, file_out)
+
+    def dumps(self) -> str:
+        """ASS content of the file, as save writes it
+
+        Returns:
+            str: ASS content
+        """
+        return pyass.dumps(self.subtitles)
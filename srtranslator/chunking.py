@@ -0,0 +1,253 @@
+import logging
+import threading
+
+from typing import Callable, Dict, Generator, List, Tuple
+
+from .context import language_pair
+from .metrics import METRICS, LatencyStore
+from .translators.base import QuotaExceededError, Translator, line_cost
+
+# First chunk size of translators without a measured one, when they take more
+START_SIZE = 4500
+# Chunk size never shrunk below
+MIN_SIZE = 200
+# Full chunks measured at a size before moving on
+SAMPLES_PER_SIZE = 3
+# A chunk is full when it takes at least this share of the size, shorter ones (ends of
+# scenes and files) say nothing about the size
+FULL_CHUNK = 0.5
+# First factor chunks grow by, it shrinks every time the search turns around
+GROWTH = 1.5
+# Growth under which the size has converged
+MIN_GROWTH = 1.05
+# Share latency per character must improve by for a size to be better
+MIN_IMPROVEMENT = 0.05
+# Full chunks after a failure before sizes up to the failing one are tried again
+CEILING_CHUNKS = 50
+
+LOG = logging.getLogger("srtranslator")
+
+
+def split_chunk(
+    lengths: List[int], chunk_size: Callable[[], int]
+) -> Generator[slice, None, None]:
+    """Splits a chunk in slices fitting the chunk size of the moment
+
+    Lines are counted like _get_next_chunk does, framed the way translate_batch sends
+    them, and a line longer than the size goes alone. chunk_size is called for each slice,
+    once the previous one was translated.
+
+    Args:
+        lengths (List[int]): Characters of each line of the chunk
+        chunk_size (Callable[[], int]): Current chunk size
+
+    Yields:
+        slice: Lines of each part of the chunk
+    """
+    start = 0
+    while start < len(lengths):
+        size = chunk_size()
+        end = start
+        n_char = 0
+        while end < len(lengths):
+            n_char += line_cost(end - start, lengths[end])
+            if n_char >= size and end > start:
+                break
+            end += 1
+        yield slice(start, end)
+        start = end
+
+
+def resize_plan(
+    plan: List[Tuple[List[int], str | None]],
+    chunk_text: Callable[[List[int]], List[str]],
+    chunk_size: Callable[[], int],
+) -> Generator[Tuple[List[int], str | None], None, None]:
+    """Chunks of a plan, split when they are bigger than the chunk size of the moment
+
+    Parts of a chunk keep its context.
+
+    Args:
+        plan (List[Tuple[List[int], str | None]]): Subtitle indices and context of each chunk
+        chunk_text (Callable[[List[int]], List[str]]): Text of a chunk, one line per subtitle
+        chunk_size (Callable[[], int]): Current chunk size
+
+    Yields:
+        Tuple[List[int], str | None]: Subtitle indices and context of each chunk to send
+    """
+    for chunk, context in plan:
+        for part in split_chunk([len(line) for line in chunk_text(chunk)], chunk_size):
+            yield chunk[part], context
+
+
+class ChunkSizeController:
+    """Adapts the size of the chunks sent to each backend and language pair
+
+    Sizes are searched for the lowest latency per character: a size is measured on a few
+    full chunks, then chunks grow while that latency improves, and the search turns around
+    with smaller steps when it does not, until it settles. A timeout, an error or a
+    truncated answer halves the size, and sizes as big as the failing one are not tried
+    again for a while. Sizes never go over the translator's max_char, and the state of
+    each backend and pair is kept with the latencies, across runs.
+
+    Translators with adaptive_chunk_size unset always get their max_char.
+
+    Args:
+        latencies (LatencyStore, optional): Where sizes are kept. Defaults to METRICS
+        start_size (int, optional): Size of translators never measured. Defaults to 4500
+        min_size (int, optional): Smallest size. Defaults to 200
+    """
+
+    def __init__(
+        self,
+        latencies: LatencyStore = METRICS,
+        start_size: int = START_SIZE,
+        min_size: int = MIN_SIZE,
+    ) -> None:
+        self.latencies = latencies
+        self.start_size = start_size
+        self.min_size = min_size
+        self._lock = threading.Lock()
+        self._states: Dict[Tuple[str, str], dict] = {}
+
+    def _state(self, backend: str, pair: str, max_char: float) -> dict:
+        key = (backend, pair)
+        if key not in self._states:
+            self._states[key] = self.latencies.chunk_state(backend, pair) or {
+                "size": min(max_char, self.start_size),
+                "growth": GROWTH,
+                "direction": 1,
+                "rate": None,
+                "characters": 0,
+                "seconds": 0.0,
+                "samples": 0,
+                "ceiling": None,
+                "since_failure": 0,
+            }
+        return self._states[key]
+
+    def _save(self, backend: str, pair: str, state: dict) -> None:
+        self.latencies.set_chunk_state(backend, pair, dict(state))
+
+    def size(self, translator: Translator, source_language: str, destination_language: str) -> int:
+        """Size of the next chunk sent to a translator for a language pair"""
+        if not translator.adaptive_chunk_size:
+            return int(translator.max_char)
+
+        pair = language_pair(source_language, destination_language)
+        return self.backend_size(type(translator).__name__, pair, translator.max_char)
+
+    def backend_size(self, backend: str, pair: str, max_char: float) -> int:
+        """Size of the next chunk of a backend, by its translator class name, for a pair"""
+        with self._lock:
+            state = self._state(backend, pair, max_char)
+            return int(min(max_char, max(self.min_size, state["size"])))
+
+    def record(
+        self,
+        translator: Translator,
+        source_language: str,
+        destination_language: str,
+        characters: int,
+        seconds: float,
+    ) -> None:
+        """Records a chunk translated, the size moves once enough of them were measured
+
+        Args:
+            translator (Translator): Translator of the chunk
+            source_language (str): Source language
+            destination_language (str): Destination language
+            characters (int): Characters of the chunk
+            seconds (float): Time until the answer
+        """
+        if not translator.adaptive_chunk_size:
+            return
+
+        backend, pair = type(translator).__name__, language_pair(
+            source_language, destination_language
+        )
+        with self._lock:
+            state = self._state(backend, pair, translator.max_char)
+            if characters < state["size"] * FULL_CHUNK:
+                return
+
+            state["characters"] += characters
+            state["seconds"] += seconds
+            state["samples"] += 1
+            state["since_failure"] += 1
+            if state["ceiling"] is not None and state["since_failure"] >= CEILING_CHUNKS:
+                state["ceiling"] = None
+                state["growth"] = max(state["growth"], GROWTH ** 0.5)
+            if state["samples"] < SAMPLES_PER_SIZE:
+                self._save(backend, pair, state)
+                return
+
+            rate = state["seconds"] / state["characters"]
+            previous = state["rate"]
+            state.update(rate=rate, characters=0, seconds=0.0, samples=0)
+            if state["growth"] >= MIN_GROWTH:
+                if previous is not None and rate > previous * (1 - MIN_IMPROVEMENT):
+                    # No better than the previous size, turn around with smaller steps
+                    state["direction"] = -state["direction"]
+                    state["growth"] **= 0.5
+
+                limit = translator.max_char
+                if state["ceiling"] is not None:
+                    limit = min(limit, state["ceiling"] - 1)
+                size = state["size"] * state["growth"] ** state["direction"]
+                state["size"] = int(max(self.min_size, min(size, limit)))
+                LOG.debug("%s chunks of %s characters for %s", backend, state["size"], pair)
+            self._save(backend, pair, state)
+
+    def record_failure(
+        self,
+        translator: Translator,
+        source_language: str,
+        destination_language: str,
+        characters: int,
+        exc: Exception,
+    ) -> None:
+        """Records a chunk that timed out, failed or came back truncated
+
+        The size drops to half the chunk, and sizes as big as the chunk are not tried for a
+        while. Errors no chunk size can fix, like a rejected API key or a lack of quota, and
+        failures of chunks much shorter than the size are left out.
+
+        Args:
+            translator (Translator): Translator of the chunk
+            source_language (str): Source language
+            destination_language (str): Destination language
+            characters (int): Characters of the chunk
+            exc (Exception): What went wrong
+        """
+        if not translator.adaptive_chunk_size or isinstance(
+            exc, (QuotaExceededError, *translator.fatal_errors)
+        ):
+            return
+
+        backend, pair = type(translator).__name__, language_pair(
+            source_language, destination_language
+        )
+        with self._lock:
+            state = self._state(backend, pair, translator.max_char)
+            size = min(state["size"], translator.max_char)
+            if characters < size * FULL_CHUNK:
+                return
+
+            state.update(
+                size=int(max(self.min_size, min(size, characters / 2))),
+                ceiling=min(characters, state["ceiling"] or characters),
+                since_failure=0,
+                growth=GROWTH,
+                direction=1,
+                rate=None,
+                characters=0,
+                seconds=0.0,
+                samples=0,
+            )
+            LOG.info("%s failed, chunks of %s characters for %s", backend, state["size"], pair)
+            self._save(backend, pair, state)
+
+
+# Used by translations, sizes are kept in the metrics file
+CHUNK_SIZES = ChunkSizeController()
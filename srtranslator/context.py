@@ -0,0 +1,143 @@
+from typing import Dict, NamedTuple
+
+from .metrics import METRICS, LatencyStore
+from .translators.base import Translator
+
+# Extra seconds per request worth spending on sending context
+MAX_CONTEXT_SECONDS = 0.5
+# Requests with and without context measured before their latencies are trusted
+MIN_SAMPLES = 5
+# Context characters per character of the chunk, a two-line chunk does not need pages
+CONTEXT_PER_CHUNK_CHAR = 4
+# Context characters any chunk can get, however short
+MIN_CHUNK_CONTEXT = 300
+
+
+class ContextBudget(NamedTuple):
+    """Characters of surrounding lines sent as context of a chunk
+
+    Args:
+        before (int): Characters of the lines before the chunk. Defaults to 2000
+        after (int): Characters of the lines after the chunk. Defaults to 1000
+    """
+
+    before: int = 2000
+    after: int = 1000
+
+    @property
+    def total(self) -> int:
+        return self.before + self.after
+
+    def scaled(self, total: int) -> "ContextBudget":
+        """Same budget shrunk to at most total characters, split the same way"""
+        if total >= self.total:
+            return self
+        ratio = max(0, total) / self.total
+        return ContextBudget(int(self.before * ratio), int(self.after * ratio))
+
+    def for_chunk(self, characters: int) -> "ContextBudget":
+        """Budget of a chunk of that many characters, short chunks get less context"""
+        return self.scaled(max(MIN_CHUNK_CONTEXT, CONTEXT_PER_CHUNK_CHAR * characters))
+
+
+DEFAULT_BUDGET = ContextBudget()
+
+
+def language_pair(source_language: str, destination_language: str) -> str:
+    return f"{source_language}-{destination_language}"
+
+
+def parse_budgets(value: str) -> Dict[str, ContextBudget]:
+    """Parses --context-budget: BEFORE:AFTER for every pair, or PAIR=BEFORE:AFTER entries
+
+    Args:
+        value (str): Comma separated budgets, like "1500:500,en-ja=3000:1500"
+
+    Raises:
+        ValueError: If a budget is not two non-negative integers
+
+    Returns:
+        Dict[str, ContextBudget]: Budget by language pair, "*" for every other pair
+    """
+    budgets = {}
+    for entry in value.split(","):
+        pair, _, budget = entry.strip().rpartition("=")
+        before, separator, after = budget.partition(":")
+        if not separator or not before.isdigit() or not after.isdigit():
+            raise ValueError(f"expected BEFORE:AFTER characters, got {entry!r}")
+        budgets[pair.strip() or "*"] = ContextBudget(int(before), int(after))
+    return budgets
+
+
+class ContextPolicy:
+    """Decides how much context the chunks of a translation get
+
+    Translators that do not use context get none, so nothing is built for them. Otherwise
+    a language pair gets its configured budget, or the default one shrunk to what the
+    latencies recorded in the metrics say is affordable: requests sent with context are
+    compared with requests of the same pair sent without (first chunks of scenes), and the
+    context is cut so it adds at most `max_context_seconds` per request. Each chunk then
+    gets a share of the budget matching its size.
+
+    Args:
+        budgets (Dict[str, ContextBudget], optional): Fixed budgets by language pair ("en-es"),
+            "*" for every pair, they are not adapted
+        latencies (LatencyStore, optional): Recorded latencies. Defaults to METRICS
+        max_context_seconds (float, optional): Extra seconds per request allowed for
+            context. Defaults to 0.5
+    """
+
+    def __init__(
+        self,
+        budgets: Dict[str, ContextBudget] | None = None,
+        latencies: LatencyStore = METRICS,
+        max_context_seconds: float = MAX_CONTEXT_SECONDS,
+    ) -> None:
+        self.budgets = dict(budgets or {})
+        self.latencies = latencies
+        self.max_context_seconds = max_context_seconds
+
+    def budget(
+        self, translator: Translator, source_language: str, destination_language: str
+    ) -> ContextBudget | None:
+        """Context budget of a translation, None if the translator does not use context"""
+        if not translator.supports_context:
+            return None
+
+        pair = language_pair(source_language, destination_language)
+        return self.pair_budget(type(translator).__name__, pair)
+
+    def pair_budget(self, backend: str, pair: str) -> ContextBudget:
+        """Context budget of a backend using context, by its translator class name, for a pair"""
+        if pair in self.budgets:
+            return self.budgets[pair]
+        if "*" in self.budgets:
+            return self.budgets["*"]
+        return self.adapted(backend, pair, DEFAULT_BUDGET)
+
+    def adapted(self, backend: str, pair: str, budget: ContextBudget) -> ContextBudget:
+        """Budget shrunk to the context the measured latencies of a pair can afford"""
+        stats = self.latencies.pair_stats(backend, pair)
+        with_context, plain = stats.get("context"), stats.get("plain")
+        if (
+            not with_context
+            or not plain
+            or with_context["requests"] < MIN_SAMPLES
+            or plain["requests"] < MIN_SAMPLES
+        ):
+            return budget
+
+        extra_seconds = (
+            with_context["seconds"] / with_context["requests"]
+            - plain["seconds"] / plain["requests"]
+        )
+        context_characters = with_context["context_characters"] / with_context["requests"]
+        if extra_seconds <= 0 or not context_characters:
+            return budget
+
+        seconds_per_character = extra_seconds / context_characters
+        return budget.scaled(int(self.max_context_seconds / seconds_per_character))
+
+
+# Used by translations, --context-budget fills in its budgets
+CONTEXT_POLICY = ContextPolicy()
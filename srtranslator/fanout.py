@@ -0,0 +1,233 @@
+import logging
+import threading
+import traceback
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from .chunking import CHUNK_SIZES
+from .context import CONTEXT_POLICY
+from .progress import render_progress
+from .retry import RetryPolicy
+from .translators.base import QuotaExceededError, Translator
+from .util import destination_path
+
+LOG = logging.getLogger("srtranslator")
+
+
+def translate_languages(
+    subtitle_file,
+    translator_factory: Callable[[], Translator],
+    source_language: str,
+    destination_languages: List[str],
+    max_workers: int | None = None,
+    backup_files: Dict[str, str] | None = None,
+    retry_policy: RetryPolicy | None = None,
+) -> Dict[str, object]:
+    """Translates an already loaded subtitle file into several languages concurrently
+
+    The file is parsed and cleaned once. Scenes, chunks and contexts are planned once per
+    chunk size and context budget and shared by the languages using them. Each language
+    works on its own copy of the subtitles with its own translator and its own backup
+    file, so it resumes on its own.
+    A language that fails gets its backup saved and is left out of the result. Languages
+    share the quota of the account: each one reserves its characters before starting, and
+    a language that would run out of quota is deferred without translating anything.
+
+    Args:
+        subtitle_file (SrtFile | AssFile): Loaded file, not resumed from a backup
+        translator_factory (Callable[[], Translator]): Builds the translator of each language,
+            it is called from the language thread and the translator is quit when done
+        source_language (str): Source language (must be coherent with your translator)
+        destination_languages (List[str]): Destination languages
+        max_workers (int, optional): Languages translated at the same time. Defaults to all
+        backup_files (Dict[str, str], optional): Backup file of some languages. Defaults to
+            {filepath}.{language}.tmp
+        retry_policy (RetryPolicy, optional): Retries of failing chunks. Defaults to RetryPolicy()
+
+    Raises:
+        ValueError: If the file was resumed from a backup, its text is not the source anymore
+
+    Returns:
+        Dict[str, SrtFile | AssFile | None]: Translated copy of each language that succeeded,
+            None for deferred languages
+    """
+    if subtitle_file.start_from != 0:
+        raise ValueError(f"{subtitle_file.filepath} was resumed from {subtitle_file.backup_file}")
+
+    backup_files = backup_files or {}
+    plans = {}
+    plans_lock = threading.Lock()
+    reserved_characters = 0
+    quota_lock = threading.Lock()
+
+    def get_plan(chunk_size, context_budget):
+        with plans_lock:
+            key = (chunk_size, context_budget)
+            if key not in plans:
+                plans[key] = subtitle_file._plan_chunks(chunk_size, context_budget)
+            return plans[key]
+
+    # Copies are made up front, one thread at a time
+    language_files = {
+        language: subtitle_file.for_language(language, backup_files.get(language))
+        for language in dict.fromkeys(destination_languages)
+    }
+
+    def translate_language(language):
+        nonlocal reserved_characters
+        language_file = language_files[language]
+        translator = translator_factory()
+        try:
+            context_budget = CONTEXT_POLICY.budget(translator, source_language, language)
+            # A resumed copy has different chunk boundaries, it plans on its own
+            chunk_size = CHUNK_SIZES.size(translator, source_language, language)
+            if language_file.start_from == 0:
+                plan = get_plan(chunk_size, context_budget)
+            else:
+                plan = language_file._plan_chunks(chunk_size, context_budget)
+
+            characters = planned_characters(language_file, plan)
+            with quota_lock:
+                translator.check_quota(reserved_characters + characters)
+                reserved_characters += characters
+
+            language_file._translate_plan(
+                translator, source_language, language, plan, retry_policy
+            )
+            return True
+        except QuotaExceededError as exc:
+            LOG.warning("Translation to %s deferred: %s", language, exc)
+            return None
+        except Exception:
+            language_file.save_backup()
+            LOG.error(
+                "Translation to %s failed. Backup saved to %s", language, language_file.backup_file
+            )
+            LOG.debug(traceback.format_exc())
+            return False
+        finally:
+            translator.quit()
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(language_files), 1)) as executor:
+        results = dict(zip(language_files, executor.map(translate_language, language_files)))
+
+    return {
+        language: language_files[language] if ok else None
+        for language, ok in results.items()
+        if ok is not False
+    }
+
+
+def translate_file_languages(
+    filepath: str,
+    translator: Translator,
+    source_language: str,
+    destination_languages: List[str],
+    wrap_limit: int = 50,
+    content: str | None = None,
+    emit: Callable | None = None,
+) -> Dict[str, str]:
+    """Translates a file into several languages one after the other with a single translator
+
+    The file is loaded and planned once. Each language is saved next to the source file,
+    or, for inline content, returned without touching the disk. A language that fails
+    gets its backup saved ({filepath}.{language}.tmp) and its error raised. The quota is
+    checked for all the languages before anything is translated.
+
+    Args:
+        filepath (str): Subtitle file path, names the format and the outputs for inline content
+        translator (Translator): Translator used for every language
+        source_language (str): Source language (must be coherent with your translator)
+        destination_languages (List[str]): Destination languages
+        wrap_limit (int, optional): Line wrap limit. Defaults to 50
+        content (str, optional): Inline content, translated in memory only
+        emit (Callable, optional): Called with an event name and fields on progress and done.
+            Defaults to drawing the progress on the console
+
+    Raises:
+        QuotaExceededError: If the account can not translate every language
+
+    Returns:
+        Dict[str, str]: Output path, or translated content for inline content, by language
+    """
+    # Imported here, formats imports the file classes which import this module
+    from .formats import load_subtitle
+
+    listened = emit is not None
+    emit = emit or (lambda *args, **kwargs: None)
+    sub = load_subtitle(
+        filepath,
+        content=content,
+        progress_callback=lambda *args, **kwargs: None,
+        load_backup=False,
+    )
+    plans = {}
+    results = {}
+
+    def get_plan(language):
+        key = (
+            CHUNK_SIZES.size(translator, source_language, language),
+            CONTEXT_POLICY.budget(translator, source_language, language),
+        )
+        if key not in plans:
+            plans[key] = sub._plan_chunks(*key)
+        return plans[key]
+
+    # Inline content leaves nothing on disk
+    language_subs = {
+        language: sub.for_language(language, load_backup=content is None)
+        for language in dict.fromkeys(destination_languages)
+    }
+    translator.check_quota(
+        sum(
+            planned_characters(language_sub, get_plan(language))
+            for language, language_sub in language_subs.items()
+        )
+    )
+
+    for language, language_sub in language_subs.items():
+        def progress(event, language=language):
+            emit("progress", language=language, **event.as_dict())
+
+        # Without a listener the progress goes to the console
+        language_sub.progress_callback = progress if listened else render_progress
+
+        try:
+            language_sub._translate_plan(
+                translator, source_language, language, get_plan(language)
+            )
+        except Exception:
+            if content is None:
+                language_sub.save_backup()
+            raise
+
+        language_sub.wrap_lines(wrap_limit)
+        if content is None:
+            results[language] = destination_path(filepath, language)
+            language_sub.save(results[language])
+            emit("done", language=language, path=results[language])
+        else:
+            results[language] = language_sub.dumps()
+            emit("done", language=language, content=results[language])
+
+    return results
+
+
+def planned_characters(subtitle_file, plan: List[Tuple[List[int], str | None]]) -> int:
+    """Characters a plan sends to the translator, contexts and backed up lines excluded
+
+    Args:
+        subtitle_file (SrtFile | AssFile): File the plan was made for
+        plan (List[Tuple[List[int], str | None]]): Indices and context of each chunk
+
+    Returns:
+        int: Number of characters
+    """
+    return sum(
+        len(line)
+        for chunk, _ in plan
+        for line in subtitle_file._chunk_text(
+            [index for index in chunk if index >= subtitle_file.start_from]
+        )
+    )
@@ -0,0 +1,92 @@
+import os
+import re
+import logging
+
+from .ass_file import AssFile
+from .srt_file import SrtFile
+from .util import read_text
+
+SRT_EXTENSIONS = (".srt",)
+ASS_EXTENSIONS = (".ass", ".ssa")
+
+# How much of the file is inspected when sniffing the content
+SNIFF_SIZE = 4096
+
+ASS_HEADER_REGEX = re.compile(r"\A\s*\[script info\]", re.IGNORECASE)
+SRT_TIMESTAMP_REGEX = re.compile(
+    r"^\s*[0-9]+[,.:][0-9]+[,.:][0-9]+[,.:]?[0-9]* *-[ -] *> *[0-9]+[,.:]", re.MULTILINE
+)
+
+
+class UnsupportedFormatError(ValueError):
+    """Subtitle file is not in a supported format"""
+
+
+def read_subtitle(filepath: str) -> str:
+    """Reads a subtitle file once, with the same decoding rules used by the parsers
+
+    Args:
+        filepath (str): Subtitle file path
+
+    Returns:
+        str: Decoded file content
+    """
+    return read_text(filepath)
+
+
+def detect_format(filepath: str, content: str) -> str:
+    """Detects the subtitle format from the file header, its content and its extension
+
+    Args:
+        filepath (str): Subtitle file path, only its extension is used
+        content (str): Decoded file content
+
+    Raises:
+        UnsupportedFormatError: If the format can not be recognised
+
+    Returns:
+        str: "ass" or "srt"
+    """
+    head = content[:SNIFF_SIZE].lstrip("\ufeff")
+
+    # The header is the strongest hint, an ASS script always starts with it
+    if ASS_HEADER_REGEX.match(head):
+        return "ass"
+
+    if SRT_TIMESTAMP_REGEX.search(head):
+        return "srt"
+
+    extension = os.path.splitext(filepath)[1].lower()
+    if extension in ASS_EXTENSIONS:
+        return "ass"
+    if extension in SRT_EXTENSIONS:
+        return "srt"
+
+    raise UnsupportedFormatError(
+        f"Unsupported subtitle format for {filepath}: expected an .srt or .ass/.ssa file"
+    )
+
+
+def load_subtitle(filepath: str, content: str | None = None, **kwargs):
+    """Loads a subtitle file with the parser matching its format, reading it only once
+
+    Args:
+        filepath (str): Subtitle file path
+        content (str, optional): Already read content, filepath is then only used to name
+            the file and its backup
+        **kwargs: Extra arguments for SrtFile or AssFile
+
+    Raises:
+        UnsupportedFormatError: If the format can not be recognised
+
+    Returns:
+        SrtFile | AssFile: Loaded subtitle file
+    """
+    if content is None:
+        content = read_subtitle(filepath)
+    subtitle_format = detect_format(filepath, content)
+    logging.debug(f"Detected {subtitle_format} format for {filepath}")
+
+    if subtitle_format == "ass":
+        return AssFile(filepath, content=content, **kwargs)
+    return SrtFile(filepath, content=content, **kwargs)
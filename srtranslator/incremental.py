@@ -0,0 +1,157 @@
+import sys
+import difflib
+import logging
+
+from typing import Dict, List
+
+from .chunking import CHUNK_SIZES
+from .context import CONTEXT_POLICY
+from .fanout import planned_characters
+from .formats import load_subtitle
+from .retry import RetryPolicy
+from .translators.base import Translator
+
+LOG = logging.getLogger("srtranslator")
+
+# Seconds a lone matching cue may drift from the timing shift of its neighbours
+TIMING_TOLERANCE = 2.0
+
+
+def _cues(subtitle_file) -> List[int]:
+    """Indices of the subtitles that get translated, in order"""
+    return [
+        index for chunk, _ in subtitle_file._plan_chunks(sys.maxsize, None) for index in chunk
+    ]
+
+
+def align_cues(
+    old_texts: List[str],
+    old_starts: List[float],
+    new_texts: List[str],
+    new_starts: List[float],
+    tolerance: float = TIMING_TOLERANCE,
+) -> Dict[int, int]:
+    """Pairs the cues of a revised source with the unchanged cues of the previous one
+
+    Cues are matched by text, in order. Runs of two or more matching cues are trusted as
+    they are. A lone matching cue (a short "Yes." can match the wrong one) is only kept
+    if its timing moved like the closest trusted run did.
+
+    Args:
+        old_texts (List[str]): Texts of the previous source
+        old_starts (List[float]): Start times in seconds of the previous source
+        new_texts (List[str]): Texts of the revised source
+        new_starts (List[float]): Start times in seconds of the revised source
+        tolerance (float, optional): Seconds of drift allowed for a lone cue. Defaults to 2
+
+    Returns:
+        Dict[int, int]: Position in the revised source -> position in the previous one
+    """
+    matcher = difflib.SequenceMatcher(None, old_texts, new_texts, autojunk=False)
+    blocks = [block for block in matcher.get_matching_blocks() if block.size]
+
+    # Timing shift of each trusted run, by its position in the revised source
+    anchors = [
+        (block.b, new_starts[block.b] - old_starts[block.a]) for block in blocks if block.size > 1
+    ]
+
+    pairs = {}
+    for block in blocks:
+        if block.size > 1:
+            pairs.update((block.b + offset, block.a + offset) for offset in range(block.size))
+            continue
+
+        shift = new_starts[block.b] - old_starts[block.a]
+        if anchors:
+            _, anchor_shift = min(anchors, key=lambda anchor: abs(anchor[0] - block.b))
+            if abs(shift - anchor_shift) > tolerance:
+                continue
+        pairs[block.b] = block.a
+
+    return pairs
+
+
+def carry_over(subtitle_file, previous_source: str, previous_translation: str) -> List[int]:
+    """Copies the translation of every cue the revised source did not change
+
+    Args:
+        subtitle_file (SrtFile | AssFile): Revised source, loaded
+        previous_source (str): Source file the previous translation was made from
+        previous_translation (str): The previous translation
+
+    Raises:
+        ValueError: If the previous translation does not have the cues of its source
+
+    Returns:
+        List[int]: Indices of the cues carried over
+    """
+    quiet = {"progress_callback": lambda *args, **kwargs: None, "load_backup": False}
+    old_source = load_subtitle(previous_source, **quiet)
+    old_translation = load_subtitle(previous_translation, **quiet)
+
+    old_cues = _cues(old_source)
+    if _cues(old_translation) != old_cues:
+        raise ValueError(f"{previous_translation} is not a translation of {previous_source}")
+
+    new_cues = _cues(subtitle_file)
+    pairs = align_cues(
+        old_source._chunk_text(old_cues),
+        [old_source._start_seconds(index) for index in old_cues],
+        subtitle_file._chunk_text(new_cues),
+        [subtitle_file._start_seconds(index) for index in new_cues],
+    )
+
+    carried = [new_cues[position] for position in sorted(pairs)]
+    translations = old_translation._chunk_text([old_cues[pairs[position]] for position in sorted(pairs)])
+    if carried:
+        subtitle_file._apply_chunk(carried, translations)
+
+    print(f"Reusing {len(carried)} of {len(new_cues)} subtitles from {previous_translation}")
+    return carried
+
+
+def translate_incremental(
+    subtitle_file,
+    translator: Translator,
+    source_language: str,
+    destination_language: str,
+    previous_source: str,
+    previous_translation: str,
+    retry_policy: RetryPolicy | None = None,
+) -> None:
+    """Translates a revised source, reusing the previous translation for unchanged cues
+
+    Only changed and new cues are sent, in the chunks and with the contexts translate
+    would use, the others get their previous translation with the new timings.
+
+    Args:
+        subtitle_file (SrtFile | AssFile): Revised source, loaded
+        translator (Translator): Translator object of choose
+        source_language (str): Source language (must be coherent with your translator)
+        destination_language (str): Destination language (must be coherent with your translator)
+        previous_source (str): Source file the previous translation was made from
+        previous_translation (str): The previous translation
+        retry_policy (RetryPolicy, optional): Retries of failing chunks. Defaults to RetryPolicy()
+
+    Raises:
+        ValueError: If the previous translation does not have the cues of its source
+        IncompleteTranslationError: If chunks still failed after their retries
+        QuotaExceededError: If the translator account can not translate the changed cues
+    """
+    # Planned before carrying over, contexts are built from the source text
+    plan = subtitle_file._plan_chunks(
+        CHUNK_SIZES.size(translator, source_language, destination_language),
+        CONTEXT_POLICY.budget(translator, source_language, destination_language),
+    )
+    carried = set(carry_over(subtitle_file, previous_source, previous_translation))
+
+    plan = [
+        ([index for index in chunk if index not in carried], context) for chunk, context in plan
+    ]
+    plan = [(chunk, context) for chunk, context in plan if chunk]
+    LOG.info("%s requests left after carrying over", len(plan))
+
+    translator.check_quota(planned_characters(subtitle_file, plan))
+    subtitle_file._translate_plan(
+        translator, source_language, destination_language, plan, retry_policy
+    )
@@ -0,0 +1,365 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import logging
+import threading
+import traceback
+
+from typing import Dict, List
+
+from .context import DEFAULT_BUDGET, ContextBudget
+from .formats import load_subtitle
+from .translators.base import Translator
+from .util import destination_path
+from .watch import file_hash
+
+LOG = logging.getLogger("srtranslator")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    source_hash TEXT NOT NULL,
+    source_language TEXT NOT NULL,
+    language TEXT NOT NULL,
+    wrap_limit INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL,
+    output TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    seq INTEGER NOT NULL,
+    indices TEXT NOT NULL,
+    text TEXT NOT NULL,
+    context TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    translation TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE INDEX IF NOT EXISTS chunks_status ON chunks (status, lease_expires);
+"""
+
+
+class WorkQueue:
+    """Translation work queue shared by worker processes through a SQLite database
+
+    A job is one file and one destination language, split into the chunks planned at
+    enqueue time. Workers claim chunks, not files, so a long file is spread over every
+    worker. A claim is a lease that the worker extends with heartbeats, chunks whose lease
+    expired (the worker died) are claimed again by someone else. Once every chunk of a job
+    is translated, one worker assembles and saves the translated file.
+
+    The database runs in WAL mode, so it can sit on a volume shared by several hosts as long
+    as the filesystem supports SQLite locking.
+
+    Args:
+        database (str): SQLite database path, created if needed
+        lease_seconds (float, optional): How long a claim lasts without heartbeat. Defaults to 60
+        max_attempts (int, optional): Claims of a chunk before its job fails. Defaults to 3
+    """
+
+    def __init__(self, database: str, lease_seconds: float = 60, max_attempts: int = 3) -> None:
+        self.database = database
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.database, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def enqueue(
+        self,
+        filepath: str,
+        destination_languages: List[str],
+        source_language: str = "auto",
+        chunk_size: int = 1500,
+        wrap_limit: int = 50,
+        context_budget: ContextBudget | None = DEFAULT_BUDGET,
+    ) -> List[int]:
+        """Plans a file once and queues one job per destination language
+
+        Args:
+            filepath (str): Subtitle file, must be readable by the workers at the same path
+            destination_languages (List[str]): Destination languages
+            source_language (str, optional): Source language. Defaults to auto
+            chunk_size (int, optional): Maximum number of letter in text chunk, the
+                max_char of the translator the workers use. Defaults to 1500
+            wrap_limit (int, optional): Line wrap limit of the outputs. Defaults to 50
+            context_budget (ContextBudget, optional): Context of the chunks, planned before
+                any worker's translator exists, None for translators not using context.
+                Defaults to DEFAULT_BUDGET
+
+        Returns:
+            List[int]: Job ids
+        """
+        filepath = os.path.abspath(filepath)
+        source_hash = file_hash(filepath)
+        sub = load_subtitle(filepath, load_backup=False)
+        plan = sub._plan_chunks(chunk_size, context_budget)
+        texts = [sub._chunk_text(chunk) for chunk, _ in plan]
+
+        connection = self._connect()
+        job_ids = []
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for language in dict.fromkeys(destination_languages):
+                cursor = connection.execute(
+                    "INSERT INTO jobs (path, source_hash, source_language, language, wrap_limit)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (filepath, source_hash, source_language, language, wrap_limit),
+                )
+                job_id = cursor.lastrowid
+                connection.executemany(
+                    "INSERT INTO chunks (job_id, seq, indices, text, context) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (job_id, seq, json.dumps(chunk), json.dumps(text), context)
+                        for seq, ((chunk, context), text) in enumerate(zip(plan, texts))
+                    ],
+                )
+                job_ids.append(job_id)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+        return job_ids
+
+    def status(self) -> Dict[str, int]:
+        """Number of jobs by status"""
+        connection = self._connect()
+        try:
+            rows = connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+            return dict(rows.fetchall())
+        finally:
+            connection.close()
+
+    def run_worker(
+        self,
+        translator: Translator,
+        exit_when_empty: bool = False,
+        poll_interval: float = 1.0,
+        stop: threading.Event | None = None,
+    ) -> int:
+        """Claims and translates chunks until stopped
+
+        Args:
+            translator (Translator): Translator used for every chunk
+            exit_when_empty (bool, optional): Return once no job is left to work on. Defaults to False
+            poll_interval (float, optional): Seconds between claims when idle. Defaults to 1
+            stop (threading.Event, optional): Set it to stop after the current chunk
+
+        Returns:
+            int: Number of chunks translated
+        """
+        stop = stop or threading.Event()
+        connection = self._connect()
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(heartbeat_stop,), daemon=True)
+        heartbeat.start()
+        translated = 0
+
+        try:
+            while not stop.is_set():
+                job = self._claim_assembly(connection)
+                if job is not None:
+                    self._assemble(connection, job)
+                    continue
+
+                chunk = self._claim_chunk(connection)
+                if chunk is not None:
+                    translated += self._translate_chunk(connection, translator, chunk)
+                    continue
+
+                if exit_when_empty and not self._has_work(connection):
+                    break
+                stop.wait(poll_interval)
+        finally:
+            heartbeat_stop.set()
+            heartbeat.join()
+            connection.close()
+
+        return translated
+
+    def _heartbeat(self, stop: threading.Event) -> None:
+        connection = self._connect()
+        try:
+            while not stop.wait(self.lease_seconds / 3):
+                expires = time.time() + self.lease_seconds
+                for table in ("chunks", "jobs"):
+                    connection.execute(
+                        f"UPDATE {table} SET lease_expires = ? "
+                        "WHERE lease_owner = ? AND status IN ('leased', 'assembling')",
+                        (expires, self.owner),
+                    )
+        finally:
+            connection.close()
+
+    def _has_work(self, connection: sqlite3.Connection) -> bool:
+        row = connection.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'assembling')"
+        ).fetchone()
+        return row[0] > 0
+
+    def _claim_chunk(self, connection: sqlite3.Connection):
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # A chunk whose leases keep expiring likely kills its workers, its job fails
+            expired = connection.execute(
+                "UPDATE chunks SET status = 'failed', lease_owner = NULL, error = ?"
+                " WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (
+                    f"Lease expired {self.max_attempts} times, the chunk may crash its workers",
+                    now,
+                    self.max_attempts,
+                ),
+            )
+            if expired.rowcount:
+                connection.execute(
+                    "UPDATE jobs SET status = 'failed', error = (SELECT error FROM chunks"
+                    " WHERE job_id = jobs.id AND status = 'failed' LIMIT 1)"
+                    " WHERE status = 'pending' AND EXISTS"
+                    " (SELECT 1 FROM chunks WHERE job_id = jobs.id AND status = 'failed')"
+                )
+
+            row = connection.execute(
+                "SELECT chunks.job_id, chunks.seq, chunks.text, chunks.context,"
+                " jobs.source_language, jobs.language FROM chunks"
+                " JOIN jobs ON jobs.id = chunks.job_id"
+                " WHERE jobs.status = 'pending' AND (chunks.status = 'pending'"
+                " OR (chunks.status = 'leased' AND chunks.lease_expires < ?))"
+                " ORDER BY chunks.job_id, chunks.seq LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE chunks SET status = 'leased', lease_owner = ?, lease_expires = ?,"
+                    " attempts = attempts + 1 WHERE job_id = ? AND seq = ?",
+                    (self.owner, now + self.lease_seconds, row[0], row[1]),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return row
+
+    def _translate_chunk(self, connection: sqlite3.Connection, translator: Translator, chunk):
+        job_id, seq, text, context, source_language, language = chunk
+        text = json.loads(text)
+
+        try:
+            translation = translator.translate(text, source_language, language, context=context)
+            if isinstance(translation, str):
+                translation = translation.splitlines()
+            if len(translation) != len(text):
+                raise ValueError(f"Got {len(translation)} lines for {len(text)}")
+        except Exception as exc:
+            LOG.error("Chunk %s of job %s failed: %s", seq, job_id, exc)
+            LOG.debug(traceback.format_exc())
+            self._release_chunk(connection, job_id, seq, str(exc))
+            return 0
+
+        # A worker that lost its lease does not overwrite the new owner's work
+        cursor = connection.execute(
+            "UPDATE chunks SET status = 'done', translation = ?"
+            " WHERE job_id = ? AND seq = ? AND lease_owner = ? AND status = 'leased'",
+            (json.dumps(translation), job_id, seq, self.owner),
+        )
+        if cursor.rowcount == 0:
+            LOG.warning("Chunk %s of job %s was claimed again by another worker", seq, job_id)
+            return 0
+        return 1
+
+    def _release_chunk(self, connection: sqlite3.Connection, job_id: int, seq: int, error: str):
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "UPDATE chunks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending'"
+                " END, lease_owner = NULL, error = ? WHERE job_id = ? AND seq = ? AND lease_owner = ?",
+                (self.max_attempts, error, job_id, seq, self.owner),
+            )
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', error = ? WHERE id = ? AND EXISTS"
+                " (SELECT 1 FROM chunks WHERE job_id = ? AND status = 'failed')",
+                (error, job_id, job_id),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _claim_assembly(self, connection: sqlite3.Connection):
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT id, path, source_hash, language, wrap_limit FROM jobs"
+                " WHERE (status = 'pending' OR (status = 'assembling' AND lease_expires < ?))"
+                " AND NOT EXISTS (SELECT 1 FROM chunks WHERE job_id = jobs.id"
+                " AND status != 'done') ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE jobs SET status = 'assembling', lease_owner = ?, lease_expires = ?"
+                    " WHERE id = ?",
+                    (self.owner, now + self.lease_seconds, row[0]),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return row
+
+    def _assemble(self, connection: sqlite3.Connection, job) -> None:
+        job_id, path, source_hash, language, wrap_limit = job
+
+        try:
+            if file_hash(path) != source_hash:
+                raise ValueError(f"{path} changed since it was queued")
+
+            sub = load_subtitle(
+                path, progress_callback=lambda *args, **kwargs: None, load_backup=False
+            )
+            rows = connection.execute(
+                "SELECT indices, translation FROM chunks WHERE job_id = ? ORDER BY seq", (job_id,)
+            )
+            for indices, translation in rows.fetchall():
+                sub._apply_chunk(json.loads(indices), json.loads(translation))
+
+            sub.wrap_lines(wrap_limit)
+            output = destination_path(path, language)
+            sub.save(output)
+        except Exception as exc:
+            LOG.error("Job %s failed: %s", job_id, exc)
+            LOG.debug(traceback.format_exc())
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, lease_owner = NULL WHERE id = ?",
+                (str(exc), job_id),
+            )
+            return
+
+        connection.execute(
+            "UPDATE jobs SET status = 'done', output = ? WHERE id = ?",
+            (output, job_id),
+        )
+        LOG.info("Job %s done, saved to %s", job_id, output)
+
@@ -0,0 +1,321 @@
+import os
+import re
+import difflib
+import hashlib
+import sqlite3
+import struct
+import logging
+import threading
+import unicodedata
+
+from collections import Counter
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+from .normalizer import BREAK_PLACEHOLDER, MARKUP_PLACEHOLDER
+from .util import cache_dir
+
+# Least similarity of a near-identical cue whose translation is reused
+DEFAULT_THRESHOLD = 0.9
+# Characters per n-gram
+NGRAM = 3
+# MinHash signatures are split in BANDS bands of ROWS hashes, cues sharing a band are
+# candidates: a pair of cues with 3/4 of their n-grams in common is found 95% of the time,
+# one with half of them 40% of the time
+BANDS = 8
+ROWS = 4
+# Cues kept per band bucket, so lookups stay fast on cues repeated everywhere
+MAX_BUCKET = 32
+# Candidates compared with a cue, those sharing the most bands with it
+MAX_CANDIDATES = 8
+# Version of the stored cues, kept in the database's user_version
+SCHEMA_VERSION = 2
+
+# Bits of an n-gram hash picking its slot of the signature
+_SLOT_BITS = (BANDS * ROWS - 1).bit_length()
+# Added per slot skipped when an empty slot borrows the value of the next one
+_OFFSET = 1 << (64 - _SLOT_BITS)
+_BAND_KEYS = struct.Struct(f"<{BANDS}Q")
+
+# Punctuation not changing the meaning, ? and ! are kept
+PUNCTUATION_REGEX = re.compile(r"[^\w\s?!]+")
+MARKS_REGEX = re.compile(r"([?!])")
+SPACES_REGEX = re.compile(r"\s+")
+# Markup and line break placeholders are kept, a translation only fits cues with the same
+PLACEHOLDERS_REGEX = re.compile(
+    "({}|{})".format(re.escape(BREAK_PLACEHOLDER), re.escape(MARKUP_PLACEHOLDER))
+)
+# Numbers, question or exclamation marks and placeholders of near-identical cues must be
+# the same
+INVARIANTS_REGEX = re.compile(
+    r"\d+|[?!]|{}|{}".format(re.escape(BREAK_PLACEHOLDER), re.escape(MARKUP_PLACEHOLDER))
+)
+
+LOG = logging.getLogger("srtranslator")
+
+
+def normalize(text: str) -> str:
+    """Cue text without case, punctuation (but ? ! and placeholders) and extra spaces"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    # Placeholders are at the odd positions
+    text = " ".join(
+        piece if position % 2 else MARKS_REGEX.sub(r" \1 ", PUNCTUATION_REGEX.sub(" ", piece))
+        for position, piece in enumerate(PLACEHOLDERS_REGEX.split(text))
+    )
+    return SPACES_REGEX.sub(" ", text).strip()
+
+
+def ngrams(normalized: str) -> Set[str]:
+    padded = f" {normalized} "
+    return {padded[i : i + NGRAM] for i in range(max(1, len(padded) - NGRAM + 1))}
+
+
+def similarity(first: str, second: str, threshold: float = 0.0) -> float:
+    """Share of matching characters of two normalized cues, 1 if they are the same
+
+    Cheap upper bounds are checked first, cues below threshold may get a rough score.
+    """
+    matcher = difflib.SequenceMatcher(None, first, second, autojunk=False)
+    for ratio in (matcher.real_quick_ratio, matcher.quick_ratio, matcher.ratio):
+        score = ratio()
+        if score < threshold:
+            break
+    return score
+
+
+def band_keys(grams: Set[str]) -> Tuple[int, ...]:
+    """Key of each band of the MinHash signature of a set of n-grams
+
+    A single hash per n-gram fills all the slots of the signature (one permutation
+    hashing): its low bits pick a slot, which keeps the lowest of the rest. Empty slots
+    borrow the value of the next filled one. Digests are stable, so keys can be stored
+    and compared across processes.
+    """
+    slots = BANDS * ROWS
+    signature: List[int | None] = [None] * slots
+    for gram in grams:
+        digest = hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        slot, value = value & (slots - 1), value >> _SLOT_BITS
+        if signature[slot] is None or value < signature[slot]:
+            signature[slot] = value
+
+    for slot in range(slots):
+        distance = 1
+        while signature[slot] is None:
+            borrowed = signature[(slot + distance) % slots]
+            if borrowed is not None:
+                signature[slot] = borrowed + distance * _OFFSET
+            distance += 1
+
+    return _BAND_KEYS.unpack(
+        b"".join(
+            hashlib.blake2b(
+                struct.pack(f"<{ROWS}Q", *signature[band * ROWS : (band + 1) * ROWS]),
+                digest_size=8,
+            ).digest()
+            for band in range(BANDS)
+        )
+    )
+
+
+class Match(NamedTuple):
+    """A cue found in the memory
+
+    Args:
+        source (str): Source text stored in the memory
+        translation (str): Its translation
+        similarity (float): Similarity with the cue looked up, 1 for an exact match
+    """
+
+    source: str
+    translation: str
+    similarity: float
+
+
+class _PairIndex:
+    """Cues of a language pair, by normalized text and by MinHash band"""
+
+    def __init__(self) -> None:
+        self.sources: List[str] = []
+        self.translations: List[str] = []
+        self.normalized: List[str] = []
+        self.exact: Dict[str, int] = {}
+        self.buckets: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+
+    def add(self, source: str, translation: str, normalized: str, keys: Tuple[int, ...]) -> None:
+        position = self.exact.get(normalized)
+        if position is not None:
+            self.sources[position] = source
+            self.translations[position] = translation
+            return
+
+        position = len(self.sources)
+        self.sources.append(source)
+        self.translations.append(translation)
+        self.normalized.append(normalized)
+        self.exact[normalized] = position
+        for buckets, key in zip(self.buckets, keys):
+            bucket = buckets.setdefault(key, [])
+            if len(bucket) < MAX_BUCKET:
+                bucket.append(position)
+
+
+class TranslationMemory:
+    """Translations of cues kept in a SQLite file, looked up exactly or by similarity
+
+    Cues are compared without case, punctuation (but ? and !) or extra spaces, so those
+    variants are exact matches. Other near-identical cues, like OCR differences between
+    releases, are found through a MinHash index of their character trigrams, compared
+    character by character and reused if they are similar enough. Cues with different
+    numbers, question or exclamation marks never match.
+
+    Each language pair is loaded in memory the first time it is looked up. Band keys are
+    stored with the cues, so loading millions of them does not hash anything.
+
+    Args:
+        filepath (str, optional): Memory file. Defaults to ~/.cache/srtranslator/memory.db
+    """
+
+    def __init__(self, filepath: str | None = None) -> None:
+        self.filepath = filepath or os.path.join(cache_dir(), "memory.db")
+        os.makedirs(os.path.dirname(os.path.abspath(self.filepath)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._pairs: Dict[Tuple[str, str], _PairIndex] = {}
+        self._connection = sqlite3.connect(
+            self.filepath, timeout=30, check_same_thread=False
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cues ("
+            " source_language TEXT, destination_language TEXT, normalized TEXT,"
+            " source TEXT, translation TEXT, band_keys BLOB,"
+            " PRIMARY KEY (source_language, destination_language, normalized))"
+        )
+        # Version 0 hashed keys big-endian and version 1 dropped placeholders from the
+        # normalized cues, both are computed again
+        if self._connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            rows = self._connection.execute("SELECT rowid, source FROM cues").fetchall()
+            updates = []
+            for rowid, source in rows:
+                normalized = normalize(source)
+                keys = band_keys(ngrams(normalized))
+                updates.append((normalized, _BAND_KEYS.pack(*keys), rowid))
+            self._connection.executemany(
+                "UPDATE OR REPLACE cues SET normalized = ?, band_keys = ? WHERE rowid = ?",
+                updates,
+            )
+            self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._connection.commit()
+
+    def _pair(self, source_language: str, destination_language: str) -> _PairIndex:
+        key = (source_language, destination_language)
+        if key not in self._pairs:
+            index = _PairIndex()
+            rows = self._connection.execute(
+                "SELECT source, translation, normalized, band_keys FROM cues"
+                " WHERE source_language = ? AND destination_language = ?",
+                key,
+            )
+            for source, translation, normalized, keys in rows:
+                index.add(source, translation, normalized, _BAND_KEYS.unpack(keys))
+            LOG.info("Loaded %s cues of %s-%s from %s", len(index.sources), *key, self.filepath)
+            self._pairs[key] = index
+        return self._pairs[key]
+
+    def lookup(
+        self,
+        text: str,
+        source_language: str,
+        destination_language: str,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> Match | None:
+        """Finds the translation of a cue, or of the most similar one stored
+
+        Args:
+            text (str): Cue text
+            source_language (str): Source language
+            destination_language (str): Destination language
+            threshold (float, optional): Least similarity reused, 1 for exact matches only.
+                Defaults to 0.9
+
+        Returns:
+            Match | None: Best match at or above the threshold
+        """
+        normalized = normalize(text)
+        # Nothing to go by in empty or punctuation only cues
+        if not normalized:
+            return None
+
+        with self._lock:
+            index = self._pair(source_language, destination_language)
+            position = index.exact.get(normalized)
+            if position is not None:
+                return Match(index.sources[position], index.translations[position], 1.0)
+            if threshold >= 1:
+                return None
+
+            candidates: Counter = Counter()
+            for buckets, key in zip(index.buckets, band_keys(ngrams(normalized))):
+                candidates.update(buckets.get(key, ()))
+
+            invariants = INVARIANTS_REGEX.findall(normalized)
+            best = None
+            for position, _ in candidates.most_common(MAX_CANDIDATES):
+                stored = index.normalized[position]
+                if INVARIANTS_REGEX.findall(stored) != invariants:
+                    continue
+                score = similarity(normalized, stored, threshold)
+                if score >= threshold and (best is None or score > best.similarity):
+                    best = Match(index.sources[position], index.translations[position], score)
+            return best
+
+    def add(
+        self, entries: List[Tuple[str, str]], source_language: str, destination_language: str
+    ) -> None:
+        """Stores translated cues, replacing the translation of their exact matches
+
+        Args:
+            entries (List[Tuple[str, str]]): Source text and translation of each cue
+            source_language (str): Source language
+            destination_language (str): Destination language
+        """
+        rows = []
+        with self._lock:
+            index = self._pair(source_language, destination_language)
+            for source, translation in entries:
+                normalized = normalize(source)
+                if not normalized:
+                    continue
+                keys = band_keys(ngrams(normalized))
+                index.add(source, translation, normalized, keys)
+                rows.append(
+                    (
+                        source_language,
+                        destination_language,
+                        normalized,
+                        source,
+                        translation,
+                        _BAND_KEYS.pack(*keys),
+                    )
+                )
+
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO cues VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_memories: Dict[str, TranslationMemory] = {}
+_memories_lock = threading.Lock()
+
+
+def open_memory(filepath: str | None = None) -> TranslationMemory:
+    """Process-wide memory of a file, every translator of the process shares it"""
+    filepath = os.path.abspath(filepath or os.path.join(cache_dir(), "memory.db"))
+    with _memories_lock:
+        if filepath not in _memories:
+            _memories[filepath] = TranslationMemory(filepath)
+        return _memories[filepath]
@@ -0,0 +1,165 @@
+import os
+import json
+import threading
+
+from typing import Dict
+
+from .util import cache_dir
+
+# Seconds per request assumed for backends never measured on this machine
+DEFAULT_REQUEST_SECONDS = {
+    "DeeplApi": 1.5,
+    "DeeplTranslator": 10.0,
+    "PyDeepLX": 9.0,
+    "TranslatePy": 3.0,
+}
+FALLBACK_REQUEST_SECONDS = 5.0
+
+
+def default_metrics_file() -> str:
+    return os.environ.get("SRTRANSLATOR_METRICS", os.path.join(cache_dir(), "metrics.json"))
+
+
+class LatencyStore:
+    """Request latencies observed per backend, kept across runs in a JSON file
+
+    Args:
+        filepath (str, optional): Metrics file. Defaults to $SRTRANSLATOR_METRICS or
+            ~/.cache/srtranslator/metrics.json
+    """
+
+    def __init__(self, filepath: str | None = None) -> None:
+        self.filepath = filepath or default_metrics_file()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.backends: Dict[str, Dict[str, float]] = {}
+
+        try:
+            with open(self.filepath, "r", encoding="utf-8") as metrics_in:
+                self.backends = json.load(metrics_in)
+        except (OSError, ValueError):
+            pass
+
+    def record(
+        self,
+        backend: str,
+        characters: int,
+        seconds: float,
+        pair: str | None = None,
+        context_characters: int = 0,
+    ) -> None:
+        """Records a translation request
+
+        Args:
+            backend (str): Translator class name
+            characters (int): Characters sent
+            seconds (float): Time until the answer
+            pair (str, optional): Language pair, like "en-es", to keep apart the requests
+                sent with and without context
+            context_characters (int, optional): Characters of context sent. Defaults to 0
+        """
+        with self._lock:
+            totals = self.backends.setdefault(
+                backend, {"requests": 0, "characters": 0, "seconds": 0.0}
+            )
+            totals["requests"] += 1
+            totals["characters"] += characters
+            totals["seconds"] += seconds
+
+            if pair is not None:
+                stats = self._pair_stats(totals, pair, context_characters > 0)
+                stats["requests"] += 1
+                stats["characters"] += characters
+                stats["context_characters"] += context_characters
+                stats["seconds"] += seconds
+            self._dirty = True
+
+    def record_mismatch(self, backend: str, pair: str, with_context: bool) -> None:
+        """Records an answer without one line per subtitle, the quality problem we can see
+
+        Args:
+            backend (str): Translator class name
+            pair (str): Language pair, like "en-es"
+            with_context (bool): Whether the request had context
+        """
+        with self._lock:
+            totals = self.backends.setdefault(
+                backend, {"requests": 0, "characters": 0, "seconds": 0.0}
+            )
+            self._pair_stats(totals, pair, with_context)["mismatches"] += 1
+            self._dirty = True
+
+    @staticmethod
+    def _pair_stats(totals: dict, pair: str, with_context: bool) -> Dict[str, float]:
+        return (
+            totals.setdefault("pairs", {})
+            .setdefault(pair, {})
+            .setdefault(
+                "context" if with_context else "plain",
+                {
+                    "requests": 0,
+                    "characters": 0,
+                    "context_characters": 0,
+                    "seconds": 0.0,
+                    "mismatches": 0,
+                },
+            )
+        )
+
+    def pair_stats(self, backend: str, pair: str) -> Dict[str, Dict[str, float]]:
+        """Requests of a language pair with ("context") and without ("plain") context
+
+        Returns:
+            Dict[str, Dict[str, float]]: Totals of requests, characters, context_characters,
+                seconds and mismatches of each kind of request measured
+        """
+        with self._lock:
+            stats = self.backends.get(backend, {}).get("pairs", {}).get(pair, {})
+            return {
+                kind: dict(totals)
+                for kind, totals in stats.items()
+                if kind in ("context", "plain")
+            }
+
+    def chunk_state(self, backend: str, pair: str) -> dict | None:
+        """Chunk size search of a language pair, kept by the ChunkSizeController"""
+        with self._lock:
+            stats = self.backends.get(backend, {}).get("pairs", {}).get(pair, {})
+            return dict(stats["chunk_size"]) if stats.get("chunk_size") else None
+
+    def set_chunk_state(self, backend: str, pair: str, state: dict) -> None:
+        with self._lock:
+            totals = self.backends.setdefault(
+                backend, {"requests": 0, "characters": 0, "seconds": 0.0}
+            )
+            totals.setdefault("pairs", {}).setdefault(pair, {})["chunk_size"] = state
+            self._dirty = True
+
+    def request_seconds(self, backend: str) -> float:
+        """Average seconds per request of a backend, or its default if never measured"""
+        with self._lock:
+            totals = self.backends.get(backend)
+            if totals and totals["requests"]:
+                return totals["seconds"] / totals["requests"]
+        return DEFAULT_REQUEST_SECONDS.get(backend, FALLBACK_REQUEST_SECONDS)
+
+    def is_observed(self, backend: str) -> bool:
+        with self._lock:
+            return bool(self.backends.get(backend, {}).get("requests"))
+
+    def save(self) -> None:
+        """Writes the metrics file if something was recorded"""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+            temporary = f"{self.filepath}.{os.getpid()}"
+            with open(temporary, "w", encoding="utf-8") as metrics_out:
+                json.dump(self.backends, metrics_out, indent=1)
+            os.replace(temporary, self.filepath)
+            self._dirty = False
+
+
+# Shared by every translation of the process
+METRICS = LatencyStore()
@@ -0,0 +1,144 @@
+import re
+
+from typing import List, NamedTuple, Tuple
+
+from srt import make_legal_content
+
+# Placeholders sent to the translator in place of what it would mangle or drop
+MARKUP_PLACEHOLDER = "|"
+BREAK_PLACEHOLDER = "////"
+# Placeholders already in the source text are escaped to private-use characters, which
+# cannot appear in subtitles, and come back as they were
+ESCAPES = {BREAK_PLACEHOLDER: "\ue001", MARKUP_PLACEHOLDER: "\ue000"}
+
+HTML_TAG_REGEX = re.compile("<.*?>")
+NOT_DIALOGUE_LINE_REGEX = re.compile(r"\n(?!-)")
+
+# One scan over an ASS event finds override blocks, line breaks, stray HTML tags and
+# placeholder look-alikes
+ASS_TOKEN_REGEX = re.compile(
+    r"(?P<markup>{[^}]*})|(?P<break>\s*\\[Nn]\s*)|(?P<html><[^>]*>)|(?P<literal>////|\|)"
+)
+PLACEHOLDER_REGEX = re.compile(
+    r"\s*{}\s*|{}".format(re.escape(BREAK_PLACEHOLDER), re.escape(MARKUP_PLACEHOLDER))
+)
+SRT_BREAK_REGEX = re.compile(r"[ \t]*{}[ \t]*".format(re.escape(BREAK_PLACEHOLDER)))
+ESCAPED_REGEX = re.compile("|".join(ESCAPES.values()))
+UNESCAPES = {escaped: placeholder for placeholder, escaped in ESCAPES.items()}
+
+
+class CueMarkup(NamedTuple):
+    """What was taken out of a cue, in placeholder order"""
+
+    markup: List[str]
+    breaks: List[str]
+
+
+def unescape(text: str) -> str:
+    """Puts back the placeholder look-alikes escaped from the source text"""
+    return ESCAPED_REGEX.sub(lambda match: UNESCAPES[match.group()], text)
+
+
+def normalize_srt(content: str) -> str:
+    """Turns the raw text of an SRT subtitle into the text sent to the translator
+
+    Tags and blank lines are removed. Lines of a dialogue (every line starts with a dash)
+    are joined with the break placeholder, any other lines are joined with spaces since
+    wrap_lines breaks them again. A break placeholder already in the text is escaped.
+
+    Args:
+        content (str): Raw subtitle text
+
+    Returns:
+        str: Normalized text
+    """
+    if "<" in content:
+        content = HTML_TAG_REGEX.sub("", content)
+    content = make_legal_content(content).strip()
+    if BREAK_PLACEHOLDER in content:
+        content = content.replace(BREAK_PLACEHOLDER, ESCAPES[BREAK_PLACEHOLDER])
+
+    if content == "":
+        return "..."
+
+    if "\n" not in content:
+        return content
+
+    # Every line starts with a dash (content has no blank lines left at this point)
+    if content[0] == "-" and NOT_DIALOGUE_LINE_REGEX.search(content) is None:
+        return content.replace("\n", BREAK_PLACEHOLDER)
+
+    return content.replace("\n", " ")
+
+
+def restore_srt(text: str) -> str:
+    """Inverse of normalize_srt for what can be restored: dialogue line breaks
+
+    Args:
+        text (str): Normalized or translated text
+
+    Returns:
+        str: Text with real line breaks
+    """
+    if BREAK_PLACEHOLDER in text:
+        text = SRT_BREAK_REGEX.sub("\n", text)
+    return unescape(text)
+
+
+def normalize_ass(text: str) -> Tuple[str, CueMarkup]:
+    """Turns the text of an ASS event into the text sent to the translator
+
+    Override blocks are replaced by the markup placeholder and \\N / \\n breaks, with
+    the spaces around them, by the break placeholder. Stray HTML tags are dropped, and
+    placeholders already in the text are escaped.
+
+    Args:
+        text (str): Event text
+
+    Returns:
+        Tuple[str, CueMarkup]: Normalized text and what restore_ass needs to undo it
+    """
+    markup = []
+    breaks = []
+
+    def replace(match):
+        if match.lastgroup == "markup":
+            markup.append(match.group())
+            return MARKUP_PLACEHOLDER
+        if match.lastgroup == "break":
+            breaks.append(match.group())
+            return BREAK_PLACEHOLDER
+        if match.lastgroup == "literal":
+            return ESCAPES[match.group()]
+        return ""
+
+    normalized = ASS_TOKEN_REGEX.sub(replace, text).strip()
+    return normalized or "...", CueMarkup(markup, breaks)
+
+
+def restore_ass(text: str, cue_markup: CueMarkup | None = None) -> str:
+    """Inverse of normalize_ass, puts markup and breaks back in place of the placeholders
+
+    Restoring an untouched normalized text gives the original text back. On translated
+    text, markup whose placeholder got lost is appended at the end of the line, where
+    line-wide tags like \\pos still apply, and extra placeholders are dropped.
+
+    Args:
+        text (str): Normalized or translated text
+        cue_markup (CueMarkup, optional): Markup taken out by normalize_ass
+
+    Returns:
+        str: Text with its markup and line breaks
+    """
+    if cue_markup is None:
+        cue_markup = CueMarkup([], [])
+    markup = iter(cue_markup.markup)
+    breaks = iter(cue_markup.breaks)
+
+    def replace(match):
+        if match.group() == MARKUP_PLACEHOLDER:
+            return next(markup, "")
+        return next(breaks, r"\N")
+
+    restored = PLACEHOLDER_REGEX.sub(replace, text)
+    return unescape(restored + "".join(markup))
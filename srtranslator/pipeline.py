@@ -0,0 +1,383 @@
+import os
+import queue
+import bisect
+import time
+import logging
+import threading
+import traceback
+import multiprocessing
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from .chunking import CHUNK_SIZES, split_chunk
+from .context import DEFAULT_BUDGET, ContextBudget, language_pair
+from .formats import load_subtitle
+from .metrics import METRICS
+from .progress import ProgressTracker, render_progress
+from .retry import IncompleteTranslationError, RetryPolicy, send_chunks
+from .translators.base import Translator
+from .util import destination_path
+
+LOG = logging.getLogger("srtranslator")
+
+# Chunk indices, context and text of each chunk of a file
+PreparedFile = List[Tuple[List[int], str | None, List[str]]]
+
+
+def load_language(filepath: str, destination_language: str, backup_file: str):
+    """Loads a file resumed from the backup of a language, if there is one"""
+    sub = load_subtitle(filepath, progress_callback=None, load_backup=False)
+    return sub.for_language(destination_language, backup_file)
+
+
+def prepare_file(
+    filepath: str,
+    chunk_size: int,
+    context_budget: ContextBudget | None = DEFAULT_BUDGET,
+    backup_files: Dict[str, str] | None = None,
+) -> Tuple[PreparedFile, Dict[str, int]]:
+    """Parses, cleans and plans a file, run in a worker process
+
+    Loaded files can not be sent between processes (pyass events hold locks), so only
+    what the translators need comes back.
+
+    Args:
+        filepath (str): Subtitle file path
+        chunk_size (int): Maximum characters per chunk of the translator
+        context_budget (ContextBudget, optional): Context of the chunks, None for none.
+            Defaults to DEFAULT_BUDGET
+        backup_files (Dict[str, str], optional): Backup file of each language
+
+    Returns:
+        Tuple[PreparedFile, Dict[str, int]]: Indices, context and text of each chunk, and
+            the subtitles the backup of each language already holds
+    """
+    sub = load_subtitle(filepath, progress_callback=None, load_backup=False)
+    plan = [
+        (chunk, context, sub._chunk_text(chunk))
+        for chunk, context in sub._plan_chunks(chunk_size, context_budget)
+    ]
+    resumed = {
+        language: sub.for_language(language, backup_file).start_from
+        for language, backup_file in (backup_files or {}).items()
+    }
+    return plan, resumed
+
+
+def assemble_file(
+    filepath: str,
+    destination_language: str,
+    translations: List[Tuple[List[int], List[str]]],
+    wrap_limit: int = 50,
+    backup_file: str | None = None,
+) -> str:
+    """Applies the translated chunks to the source, wraps and saves it, run in a worker process
+
+    Args:
+        filepath (str): Source subtitle file path
+        destination_language (str): Language of the translations
+        translations (List[Tuple[List[int], List[str]]]): Indices and lines of each chunk
+        wrap_limit (int, optional): Line wrap limit. Defaults to 50
+        backup_file (str, optional): Backup the translation resumed from, deleted once
+            the file is saved
+
+    Returns:
+        str: Path of the translated file
+    """
+    if backup_file:
+        sub = load_language(filepath, destination_language, backup_file)
+    else:
+        sub = load_subtitle(filepath, progress_callback=None, load_backup=False)
+    for chunk, lines in translations:
+        sub._apply_chunk(chunk, lines)
+    sub.wrap_lines(wrap_limit)
+
+    output = destination_path(filepath, destination_language)
+    sub.save(output)
+    return output
+
+
+def save_partial(
+    filepath: str,
+    destination_language: str,
+    translations: List[Tuple[List[int], List[str]]],
+    current_subtitle: int,
+    backup_file: str,
+) -> None:
+    """Saves the subtitles translated before a failure as a backup, run in a worker process
+
+    What an earlier backup held is kept.
+
+    Args:
+        filepath (str): Source subtitle file path
+        destination_language (str): Language of the translations
+        translations (List[Tuple[List[int], List[str]]]): Indices and lines of each chunk
+        current_subtitle (int): First subtitle not translated, the backup stops there
+        backup_file (str): Backup file path
+    """
+    sub = load_language(filepath, destination_language, backup_file)
+    for chunk, lines in translations:
+        sub._apply_chunk(chunk, lines)
+    sub.current_subtitle = current_subtitle
+    sub.save_backup()
+
+
+def translate_files(
+    filepaths: List[str],
+    translator_factory: Callable[[], Translator],
+    source_language: str,
+    destination_languages: List[str],
+    chunk_size: int,
+    wrap_limit: int = 50,
+    workers: int = 2,
+    processes: int | None = None,
+    queue_size: int | None = None,
+    retry_policy: RetryPolicy | None = None,
+    progress_callback: Callable = render_progress,
+    context_budget: ContextBudget | None = DEFAULT_BUDGET,
+) -> Tuple[Dict[str, Dict[str, str]], Dict[str, Exception]]:
+    """Translates a batch of files, with the CPU-bound stages in a process pool
+
+    Parsing, cleaning, scene detection and chunk planning run in worker processes, as do
+    applying the translations, wrapping lines and writing the outputs. Translator threads
+    only do the requests, each one with its own translator. Bounded queues between the
+    stages keep files from piling up in memory when one stage is faster than the others.
+
+    Failing chunks are retried like translate does, and a file that still fails leaves a
+    backup of what was translated ({filepath}.tmp, or {filepath}.{language}.tmp with
+    several languages), which the next batch resumes from. The quota of the files being
+    translated is reserved, so concurrent files do not go over it together.
+
+    Args:
+        filepaths (List[str]): Subtitle files
+        translator_factory (Callable[[], Translator]): Builds the translator of each thread,
+            it is quit when the batch is done
+        source_language (str): Source language (must be coherent with your translator)
+        destination_languages (List[str]): Destination languages of every file
+        chunk_size (int): Maximum characters per chunk of the translator
+        wrap_limit (int, optional): Line wrap limit. Defaults to 50
+        workers (int, optional): Translator threads. Defaults to 2
+        processes (int, optional): Worker processes. Defaults to the number of CPUs
+        queue_size (int, optional): Files waiting between two stages. Defaults to 2 * workers
+        retry_policy (RetryPolicy, optional): Retries of failing chunks. Defaults to RetryPolicy()
+        progress_callback (Callable[[ProgressEvent], None], optional): Receives the progress.
+            Defaults to a console progress line
+        context_budget (ContextBudget, optional): Context of the chunks, planned before any
+            translator exists, None for translators not using context. Defaults to
+            DEFAULT_BUDGET
+
+    Returns:
+        Tuple[Dict[str, Dict[str, str]], Dict[str, Exception]]: Output path by language of
+            each translated file, and the error of each failed one
+    """
+    retry_policy = retry_policy or RetryPolicy()
+    workers = max(1, workers)
+    queue_size = queue_size or 2 * workers
+    languages = list(dict.fromkeys(destination_languages))
+
+    outputs: Dict[str, Dict[str, str]] = {}
+    failures: Dict[str, Exception] = {}
+    results_lock = threading.Lock()
+    # Prepared files waiting for a translator thread, None tells a thread to stop
+    prepared: "queue.Queue[Tuple[str, Future] | None]" = queue.Queue(maxsize=queue_size)
+    # Translated files waiting for their outputs to be written
+    assembling = threading.BoundedSemaphore(queue_size)
+    pending: List[Tuple[str, str, Future]] = []
+    # Characters of the files being translated, not billed yet
+    quota_lock = threading.Lock()
+    reserved_characters = 0
+
+    def fail(filepath: str, exc: Exception) -> None:
+        LOG.error("Translation of %s failed: %s", filepath, exc)
+        LOG.debug(traceback.format_exc())
+        with results_lock:
+            failures.setdefault(filepath, exc)
+
+    def backup_files(filepath: str) -> Dict[str, str]:
+        # The ones translate uses, so either one resumes what the other left
+        if len(languages) == 1:
+            return {languages[0]: f"{filepath}.tmp"}
+        return {language: f"{filepath}.{language}.tmp" for language in languages}
+
+    def feed(pool: ProcessPoolExecutor) -> None:
+        try:
+            for filepath in dict.fromkeys(filepaths):
+                future = pool.submit(
+                    prepare_file, filepath, chunk_size, context_budget, backup_files(filepath)
+                )
+                prepared.put((filepath, future))
+        finally:
+            for _ in range(workers):
+                prepared.put(None)
+
+    def translate_chunks(translator, filepath, language, plan, start_from, pool):
+        nonlocal reserved_characters
+        # Skip what a backup of this language already holds
+        if start_from:
+            resumed_plan = []
+            for chunk, context, text in plan:
+                first = bisect.bisect_left(chunk, start_from)
+                if first < len(chunk):
+                    resumed_plan.append((chunk[first:], context, text[first:]))
+            plan = resumed_plan
+        tracker = ProgressTracker(
+            f"{os.path.basename(filepath)} ({language})",
+            sum(len(chunk) for chunk, _, _ in plan),
+            sum(len(line) for _, _, text in plan for line in text),
+            progress_callback,
+        )
+        with quota_lock:
+            translator.check_quota(reserved_characters + tracker.characters_total)
+            reserved_characters += tracker.characters_total
+        pair = language_pair(source_language, language)
+        translations = []
+
+        def send(item):
+            chunk, context, text = item
+            characters = sum(len(line) for line in text)
+            tracker.chunk_started()
+            started = time.perf_counter()
+            try:
+                translation = translator.translate(
+                    text, source_language, language, context=context
+                )
+            except Exception as exc:
+                tracker.chunk_failed()
+                CHUNK_SIZES.record_failure(translator, source_language, language, characters, exc)
+                raise
+            seconds = time.perf_counter() - started
+            METRICS.record(
+                type(translator).__name__,
+                characters,
+                seconds,
+                pair=pair,
+                context_characters=len(context or ""),
+            )
+            CHUNK_SIZES.record(translator, source_language, language, characters, seconds)
+            if isinstance(translation, str):
+                translation = translation.splitlines()
+            # A wrong number of lines is retried too
+            if len(translation) != len(chunk):
+                tracker.chunk_failed()
+                METRICS.record_mismatch(type(translator).__name__, pair, bool(context))
+                exc = ValueError(
+                    f"Got {len(translation)} translated lines for {len(chunk)} subtitles"
+                )
+                CHUNK_SIZES.record_failure(translator, source_language, language, characters, exc)
+                raise exc
+            translations.append((chunk, translation))
+            tracker.chunk_done(len(chunk), characters)
+
+        # Chunks were planned with max_char, they are split to the size of the moment
+        def current_size():
+            return CHUNK_SIZES.size(translator, source_language, language)
+
+        def split(item):
+            chunk, context, text = item
+            for part in split_chunk([len(line) for line in text], current_size):
+                yield chunk[part], context, text[part]
+
+        try:
+            failed = send_chunks(
+                (part for item in plan for part in split(item)),
+                send,
+                translator,
+                retry_policy,
+                split,
+            )
+            if failed:
+                raise IncompleteTranslationError(failed)
+        except Exception:
+            if translations:
+                save_backup(pool, filepath, language, plan, translations)
+            raise
+        finally:
+            tracker.finish()
+            # Billed now, the translator's quota shows it
+            with quota_lock:
+                reserved_characters -= tracker.characters_total
+        return translations
+
+    def save_backup(pool, filepath, language, plan, translations):
+        # The backup stops at the first subtitle not translated
+        done = {index for chunk, _ in translations for index in chunk}
+        planned = sorted(index for chunk, _, _ in plan for index in chunk)
+        current_subtitle = next((index for index in planned if index not in done), None)
+        if current_subtitle is None:
+            return
+        backup_file = backup_files(filepath)[language]
+        try:
+            pool.submit(
+                save_partial, filepath, language, translations, current_subtitle, backup_file
+            ).result()
+        except Exception as exc:
+            LOG.error("Backup of %s could not be saved: %s", filepath, exc)
+            return
+        LOG.info("Backup of %s (%s) saved to %s", filepath, language, backup_file)
+
+    def run_translator(pool: ProcessPoolExecutor) -> None:
+        translator = None
+        try:
+            while True:
+                item = prepared.get()
+                if item is None:
+                    return
+                filepath, future = item
+
+                try:
+                    plan, resumed = future.result()
+                    if translator is None:
+                        translator = translator_factory()
+                    for language in languages:
+                        translations = translate_chunks(
+                            translator, filepath, language, plan, resumed[language], pool
+                        )
+                        assembling.acquire()
+                        assembled = pool.submit(
+                            assemble_file,
+                            filepath,
+                            language,
+                            translations,
+                            wrap_limit,
+                            backup_files(filepath)[language],
+                        )
+                        assembled.add_done_callback(lambda _: assembling.release())
+                        with results_lock:
+                            pending.append((filepath, language, assembled))
+                except Exception as exc:
+                    fail(filepath, exc)
+                    # The translator may be in a broken state, the next file gets a new one
+                    if translator is not None:
+                        translator.quit()
+                        translator = None
+        finally:
+            if translator is not None:
+                translator.quit()
+
+    # Spawned rather than forked, forking a process running threads is not safe
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+        feeder = threading.Thread(target=feed, args=(pool,), daemon=True)
+        feeder.start()
+        threads = [
+            threading.Thread(target=run_translator, args=(pool,), daemon=True)
+            for _ in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        feeder.join()
+
+        for filepath, language, assembled in pending:
+            try:
+                path = assembled.result()
+            except Exception as exc:
+                fail(filepath, exc)
+                continue
+            outputs.setdefault(filepath, {})[language] = path
+
+    for filepath in failures:
+        outputs.pop(filepath, None)
+    return outputs, failures
@@ -0,0 +1,233 @@
+import heapq
+
+from typing import Callable, Dict, List, NamedTuple
+
+from .chunking import CHUNK_SIZES
+from .context import CONTEXT_POLICY, language_pair
+from .fanout import planned_characters
+from .formats import load_subtitle
+from .metrics import LatencyStore
+from .util import format_duration
+
+
+class Backend(NamedTuple):
+    """A translator as seen by the planner
+
+    Args:
+        name (str): Name shown in the report, like deepl-api
+        latency_key (str): Name its latencies are recorded under, the translator class name
+        chunk_size (int): Its max_char
+        count_requests (Callable[[List[str]], int], optional): Requests it sends for the
+            lines of a chunk. Defaults to one per chunk
+        supports_context (bool, optional): Whether it sends context with the chunks.
+            Defaults to False
+        adaptive_chunk_size (bool, optional): Whether its chunks are sized by CHUNK_SIZES
+            rather than chunk_size. Defaults to True
+    """
+
+    name: str
+    latency_key: str
+    chunk_size: int
+    count_requests: Callable[[List[str]], int] | None = None
+    supports_context: bool = False
+    adaptive_chunk_size: bool = True
+
+
+class LanguagePlan(NamedTuple):
+    language: str
+    billed_characters: int
+    # Subtitles a backup already holds, and their source characters
+    cache_hits: int
+    cache_hit_characters: int
+    # Per backend name
+    requests: Dict[str, int]
+    context_characters: Dict[str, int]
+
+
+class FilePlan(NamedTuple):
+    filepath: str
+    # Subtitles with text to translate
+    subtitles: int
+    languages: List[LanguagePlan]
+
+
+def plan_file(
+    filepath: str,
+    source_language: str,
+    destination_languages: List[str],
+    backends: List[Backend],
+    backup_files: Dict[str, str] | None = None,
+) -> FilePlan:
+    """Loads a file and plans its translation like translate would, without translating
+
+    Cleaning, scene detection, chunking and contexts are the ones translate uses, each
+    backend getting the chunk size CHUNK_SIZES and the context budget CONTEXT_POLICY give
+    it. A language with a backup is planned from where the backup stops.
+
+    Args:
+        filepath (str): Subtitle file
+        source_language (str): Source language
+        destination_languages (List[str]): Destination languages
+        backends (List[Backend]): Translators to count requests for, at least one
+        backup_files (Dict[str, str], optional): Backup file of some languages. Defaults to
+            {filepath}.{language}.tmp
+
+    Raises:
+        UnsupportedFormatError: If the format can not be recognised
+
+    Returns:
+        FilePlan: What each language would send
+    """
+    backup_files = backup_files or {}
+    sub = load_subtitle(filepath, progress_callback=lambda *args, **kwargs: None, load_backup=False)
+    fresh_plans = {}
+
+    def fresh_plan(chunk_size, context_budget=None):
+        key = (chunk_size, context_budget)
+        if key not in fresh_plans:
+            fresh_plans[key] = sub._plan_chunks(chunk_size, context_budget)
+        return fresh_plans[key]
+
+    subtitles = sum(len(chunk) for chunk, _ in fresh_plan(backends[0].chunk_size))
+    languages = []
+
+    for language in dict.fromkeys(destination_languages):
+        language_file = sub.for_language(language, backup_files.get(language))
+        resumed = language_file.start_from
+        requests = {}
+        context_characters = {}
+
+        for backend in backends:
+            pair = language_pair(source_language, language)
+            chunk_size = backend.chunk_size
+            if backend.adaptive_chunk_size:
+                chunk_size = CHUNK_SIZES.backend_size(backend.latency_key, pair, chunk_size)
+            context_budget = None
+            if backend.supports_context:
+                context_budget = CONTEXT_POLICY.pair_budget(backend.latency_key, pair)
+            # Chunks of a resumed file are planned from its own text, like translate does
+            if resumed:
+                plan = language_file._plan_chunks(chunk_size, context_budget)
+            else:
+                plan = fresh_plan(chunk_size, context_budget)
+
+            sent = [(chunk, context) for chunk, context in plan if chunk[-1] >= resumed]
+            if backend.count_requests is None:
+                requests[backend.name] = len(sent)
+            else:
+                requests[backend.name] = sum(
+                    backend.count_requests(language_file._chunk_text(chunk)) for chunk, _ in sent
+                )
+            context_characters[backend.name] = sum(len(context or "") for _, context in sent)
+
+        cache_hits = [
+            index for chunk, _ in fresh_plan(backends[0].chunk_size) for index in chunk
+            if index < resumed
+        ]
+        languages.append(
+            LanguagePlan(
+                language,
+                planned_characters(language_file, fresh_plan(backends[0].chunk_size)),
+                len(cache_hits),
+                sum(len(line) for line in sub._chunk_text(cache_hits)),
+                requests,
+                context_characters,
+            )
+        )
+
+    return FilePlan(filepath, subtitles, languages)
+
+
+def estimate_seconds(
+    file_plans: List[FilePlan], backend: Backend, latencies: LatencyStore, concurrency: int
+) -> float:
+    """Wall-clock time of the planned translations with a backend
+
+    Every (file, language) pair is a job sending its requests one after the other, at the
+    average request latency observed for the backend. Jobs run `concurrency` at a time,
+    the longest ones first.
+
+    Args:
+        file_plans (List[FilePlan]): Planned files
+        backend (Backend): Backend doing the translations
+        latencies (LatencyStore): Observed latencies
+        concurrency (int): Jobs running at the same time
+
+    Returns:
+        float: Seconds
+    """
+    request_seconds = latencies.request_seconds(backend.latency_key)
+    jobs = sorted(
+        (
+            language.requests[backend.name] * request_seconds
+            for file_plan in file_plans
+            for language in file_plan.languages
+        ),
+        reverse=True,
+    )
+
+    slots = [0.0] * max(1, min(concurrency, len(jobs)))
+    for job in jobs:
+        heapq.heapreplace(slots, slots[0] + job)
+    return max(slots)
+
+
+def format_report(
+    file_plans: List[FilePlan],
+    backends: List[Backend],
+    latencies: LatencyStore,
+    concurrency: int,
+    selected: str | None = None,
+) -> str:
+    """Human readable report of a dry run
+
+    Args:
+        file_plans (List[FilePlan]): Planned files
+        backends (List[Backend]): Backends the files were planned for
+        latencies (LatencyStore): Observed latencies
+        concurrency (int): Jobs running at the same time
+        selected (str, optional): Backend name to mark as the one in use
+
+    Returns:
+        str: Report
+    """
+    lines = []
+    for file_plan in file_plans:
+        lines.append(f"{file_plan.filepath}: {file_plan.subtitles} subtitles")
+        for language in file_plan.languages:
+            line = f"  {language.language}: {language.billed_characters} characters to bill"
+            if language.cache_hits:
+                line += (
+                    f", {language.cache_hits} subtitles ({language.cache_hit_characters} "
+                    "characters) from backup"
+                )
+            lines.append(line)
+
+    all_languages = [language for file_plan in file_plans for language in file_plan.languages]
+    lines.append("")
+    lines.append(
+        f"Total: {sum(language.billed_characters for language in all_languages)} characters "
+        f"to bill, {sum(language.cache_hits for language in all_languages)} cache hits "
+        f"({sum(language.cache_hit_characters for language in all_languages)} characters)"
+    )
+    lines.append("")
+    lines.append(f"{'Backend':<22}{'Requests':>10}{'Context chars':>15}{'Latency':>10}{'ETA':>10}")
+
+    for backend in backends:
+        name = f"{backend.name} *" if backend.name == selected else backend.name
+        latency = latencies.request_seconds(backend.latency_key)
+        latency_text = f"{latency:.1f}s" + ("" if latencies.is_observed(backend.latency_key) else "?")
+        eta = estimate_seconds(file_plans, backend, latencies, concurrency)
+        lines.append(
+            f"{name:<22}"
+            f"{sum(language.requests[backend.name] for language in all_languages):>10}"
+            f"{sum(language.context_characters[backend.name] for language in all_languages):>15}"
+            f"{latency_text:>10}"
+            f"{format_duration(eta):>10}"
+        )
+
+    lines.append("")
+    lines.append(
+        f"ETA with {concurrency} job(s) at a time, '?' marks latencies never measured here"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,217 @@
+import sys
+import time
+import threading
+
+from typing import Callable, Dict, NamedTuple
+
+from .util import format_duration
+
+BAR_LENGTH = 20
+
+
+class ProgressEvent(NamedTuple):
+    """Where the translation of a file into a language stands
+
+    Args:
+        label (str): File and language, "movie.srt (es)"
+        cues_done (int): Subtitles translated so far
+        cues_total (int): Subtitles to translate, those a backup holds excluded
+        characters_done (int): Characters translated so far
+        characters_total (int): Characters to translate
+        chunks_in_flight (int): Chunks sent and not answered yet
+        elapsed (float): Seconds since the translation started
+        finished (bool): Whether this is the last event of the translation
+    """
+
+    label: str
+    cues_done: int
+    cues_total: int
+    characters_done: int
+    characters_total: int
+    chunks_in_flight: int
+    elapsed: float
+    finished: bool = False
+
+    @property
+    def fraction(self) -> float:
+        """Done part, 0 to 1, by characters"""
+        if self.characters_total:
+            return min(1.0, self.characters_done / self.characters_total)
+        return 1.0 if self.finished or not self.cues_total else self.cues_done / self.cues_total
+
+    @property
+    def throughput(self) -> float:
+        """Characters translated per second"""
+        return self.characters_done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        """Seconds left at the current throughput, None before the first chunk is done"""
+        if self.finished:
+            return 0.0
+        if not self.throughput:
+            return None
+        return max(0, self.characters_total - self.characters_done) / self.throughput
+
+    def as_dict(self) -> dict:
+        """Fields plus throughput and ETA, for JSON"""
+        return dict(self._asdict(), throughput=self.throughput, eta=self.eta)
+
+
+class ProgressTracker:
+    """Counts the chunks of one translation and sends a ProgressEvent on every change
+
+    Args:
+        label (str): File and language of the translation
+        cues_total (int): Subtitles to translate
+        characters_total (int): Characters to translate
+        callback (Callable[[ProgressEvent], None]): Receives the events
+        clock (Callable[[], float], optional): Seconds counter. Defaults to time.monotonic
+    """
+
+    def __init__(
+        self,
+        label: str,
+        cues_total: int,
+        characters_total: int,
+        callback: Callable[[ProgressEvent], None],
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.label = label
+        self.cues_total = cues_total
+        self.characters_total = characters_total
+        self.callback = callback
+        self.clock = clock
+        self.started = clock()
+        self.cues_done = 0
+        self.characters_done = 0
+        self.chunks_in_flight = 0
+        self._lock = threading.Lock()
+
+    def chunk_started(self) -> None:
+        with self._lock:
+            self.chunks_in_flight += 1
+            event = self._event()
+        self.callback(event)
+
+    def chunk_done(self, cues: int, characters: int) -> None:
+        with self._lock:
+            self.chunks_in_flight = max(0, self.chunks_in_flight - 1)
+            self.cues_done += cues
+            self.characters_done += characters
+            event = self._event()
+        self.callback(event)
+
+    def chunk_failed(self) -> None:
+        with self._lock:
+            self.chunks_in_flight = max(0, self.chunks_in_flight - 1)
+            event = self._event()
+        self.callback(event)
+
+    def finish(self) -> None:
+        with self._lock:
+            self.chunks_in_flight = 0
+            event = self._event(finished=True)
+        self.callback(event)
+
+    def _event(self, finished: bool = False) -> ProgressEvent:
+        return ProgressEvent(
+            self.label,
+            self.cues_done,
+            self.cues_total,
+            self.characters_done,
+            self.characters_total,
+            self.chunks_in_flight,
+            self.clock() - self.started,
+            finished,
+        )
+
+
+class ProgressRenderer:
+    """Draws progress events as a single console line, at most every min_interval seconds
+
+    With several translations running (languages of a file, files of a batch) the line
+    sums them up. Writes to stderr so it stays out of the way of redirected output, and
+    to a terminal it keeps rewriting the same line, elsewhere it writes one line per update.
+
+    Args:
+        stream (TextIO, optional): Where to draw. Defaults to sys.stderr
+        min_interval (float, optional): Seconds between two updates. Defaults to 0.5
+        clock (Callable[[], float], optional): Seconds counter. Defaults to time.monotonic
+    """
+
+    def __init__(self, stream=None, min_interval: float = 0.5, clock=time.monotonic) -> None:
+        self.stream = stream
+        self.min_interval = min_interval
+        self.clock = clock
+        self.events: Dict[str, ProgressEvent] = {}
+        self.last_render = None
+        self._lock = threading.Lock()
+
+    def __call__(self, event: ProgressEvent) -> None:
+        with self._lock:
+            # A new batch starts once everything drawn so far is finished
+            if event.label not in self.events and self._all_finished():
+                self.events = {}
+            self.events[event.label] = event
+
+            now = self.clock()
+            if (
+                not event.finished
+                and self.last_render is not None
+                and now - self.last_render < self.min_interval
+            ):
+                return
+            self.last_render = now
+            self._write(self.format(), end=self._all_finished())
+
+    def _all_finished(self) -> bool:
+        return all(event.finished for event in self.events.values())
+
+    def format(self) -> str:
+        """Progress line of the translations seen since the last batch ended"""
+        events = list(self.events.values())
+        running = [event for event in events if not event.finished]
+
+        characters_total = sum(event.characters_total for event in events)
+        characters_done = sum(event.characters_done for event in events)
+        if characters_total:
+            fraction = min(1.0, characters_done / characters_total)
+        else:
+            fraction = sum(event.fraction for event in events) / len(events)
+        block = int(round(BAR_LENGTH * fraction))
+
+        throughput = sum(event.throughput for event in running)
+        if not running:
+            eta = "done"
+        elif throughput:
+            remaining = sum(event.characters_total - event.characters_done for event in running)
+            eta = f"ETA {format_duration(max(0, remaining) / throughput)}"
+        else:
+            eta = "ETA ?"
+
+        parts = [
+            f"[{'#' * block}{'-' * (BAR_LENGTH - block)}] {fraction * 100:3.0f}%",
+            f"{sum(event.cues_done for event in events)}/"
+            f"{sum(event.cues_total for event in events)} cues",
+            f"{sum(event.chunks_in_flight for event in running)} in flight",
+            f"{throughput:.0f} chars/s",
+            eta,
+        ]
+        if len(events) == 1:
+            parts.append(events[0].label)
+        else:
+            parts.append(f"{len(running)} running, {len(events) - len(running)} done")
+        return " | ".join(parts)
+
+    def _write(self, line: str, end: bool) -> None:
+        stream = self.stream or sys.stderr
+        if stream.isatty():
+            stream.write(f"\r\x1b[K{line}" + ("\n" if end else ""))
+        else:
+            stream.write(f"{line}\n")
+        stream.flush()
+
+
+# Default progress callback of subtitle files, shared so concurrent translations add up
+render_progress = ProgressRenderer()
@@ -0,0 +1,206 @@
+import time
+import heapq
+import random
+import logging
+import itertools
+
+from typing import Callable, Iterable, List, Tuple, Type, TypeVar
+
+from .translators.base import QuotaExceededError, Translator
+
+LOG = logging.getLogger("srtranslator")
+
+# A chunk, a tuple starting with its subtitle indices
+C = TypeVar("C", bound=tuple)
+
+# Errors no retry can fix, on top of the ones translators declare in fatal_errors
+FATAL_ERRORS: Tuple[Type[BaseException], ...] = (
+    QuotaExceededError,
+    AttributeError,
+    TypeError,
+    NotImplementedError,
+    PermissionError,
+)
+
+
+class IncompleteTranslationError(Exception):
+    """Some chunks could not be translated, even after retries
+
+    Args:
+        failed (List[Tuple[List[int], Exception]]): Indices of each failed chunk and its
+            last error
+    """
+
+    def __init__(self, failed: List[Tuple[List[int], Exception]]) -> None:
+        ranges = ", ".join(f"{chunk[0] + 1}-{chunk[-1] + 1}" for chunk, _ in failed)
+        super().__init__(f"{len(failed)} chunk(s) failed (subtitles {ranges}): {failed[-1][1]}")
+        self.failed = failed
+
+
+class RetryPolicy:
+    """How many times and how patiently a chunk is retried
+
+    Delays grow exponentially from `base_delay` up to `max_delay`, each one randomly
+    shortened by up to `jitter` of itself so that workers hitting the same outage do not
+    all come back at once.
+
+    Args:
+        max_attempts (int, optional): Attempts per chunk, the first included. Defaults to 4
+        base_delay (float, optional): Seconds before the first retry. Defaults to 2
+        max_delay (float, optional): Longest wait between attempts. Defaults to 60
+        jitter (float, optional): Part of each delay that is random, 0 to 1. Defaults to 0.5
+        fatal_errors (Tuple[Type[BaseException], ...], optional): Errors never retried.
+            Defaults to FATAL_ERRORS
+        sleep (Callable[[float], None], optional): Waits between attempts. Defaults to time.sleep
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 2.0,
+        max_delay: float = 60.0,
+        jitter: float = 0.5,
+        fatal_errors: Tuple[Type[BaseException], ...] = FATAL_ERRORS,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.fatal_errors = fatal_errors
+        self.sleep = sleep
+
+    def is_retryable(self, error: Exception, translator: Translator | None = None) -> bool:
+        """Whether trying again may succeed, translators list their own fatal errors"""
+        fatal = self.fatal_errors + (translator.fatal_errors if translator else ())
+        return not isinstance(error, fatal)
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after the attempt-th failed attempt (1 based)"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())
+
+    def call(self, translator: Translator, func: Callable, *args, **kwargs):
+        """Calls func until it succeeds, fails with a fatal error or runs out of attempts
+
+        Args:
+            translator (Translator): Translator used by func, for its fatal errors
+            func (Callable): What to call
+
+        Raises:
+            Exception: The last error of func
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return func(*args, **kwargs)
+            except Exception as exc:
+                if attempt == self.max_attempts or not self.is_retryable(exc, translator):
+                    raise
+                delay = self.delay(attempt)
+                LOG.warning(
+                    "Attempt %s/%s failed (%s), retrying in %.1fs",
+                    attempt,
+                    self.max_attempts,
+                    exc,
+                    delay,
+                )
+                self.sleep(delay)
+
+
+def send_chunks(
+    chunks: Iterable[C],
+    send: Callable[[C], None],
+    translator: Translator,
+    retry_policy: RetryPolicy,
+    split: Callable[[C], Iterable[C]] | None = None,
+    clock: Callable[[], float] = time.monotonic,
+) -> List[Tuple[List[int], Exception]]:
+    """Sends chunks one after the other, failing chunks wait for their retry aside
+
+    A chunk failing with a retryable error is deferred for its backoff delay while the
+    next chunks go on, and is sent again once the delay is over (or once nothing else is
+    left to send). A chunk failing on every attempt of the retry policy gets a last round,
+    with as many attempts, once every other chunk is done.
+
+    Args:
+        chunks (Iterable[C]): Chunks, tuples starting with their subtitle indices
+        send (Callable[[C], None]): Translates and applies a chunk, raises if it failed
+        translator (Translator): Translator of the chunks, for its fatal errors
+        retry_policy (RetryPolicy): Attempts and delays
+        split (Callable[[C], Iterable[C]], optional): Parts a chunk is sent again as, like
+            smaller chunks once the translator copes with less. Defaults to the chunk
+        clock (Callable[[], float], optional): Time source. Defaults to time.monotonic
+
+    Raises:
+        Exception: The first error no retry can fix
+
+    Returns:
+        List[Tuple[List[int], Exception]]: Indices of each chunk failing even in the last
+            round, and its last error
+    """
+    split = split or (lambda chunk: [chunk])
+    # (ready at, order, failed attempts, chunk) of the chunks waiting for a retry
+    deferred: List[Tuple[float, int, int, C]] = []
+    order = itertools.count()
+    last_round: List[C] = []
+    failed: List[Tuple[List[int], Exception]] = []
+
+    def attempt(chunk: C, attempts: int, final: bool) -> None:
+        try:
+            send(chunk)
+            return
+        except Exception as exc:
+            if not retry_policy.is_retryable(exc, translator):
+                raise
+            error = exc
+
+        attempts += 1
+        indices = chunk[0]
+        if attempts < retry_policy.max_attempts:
+            delay = retry_policy.delay(attempts)
+            LOG.warning(
+                "Attempt %s/%s of subtitles %s-%s failed (%s), retrying in %.1fs",
+                attempts,
+                retry_policy.max_attempts,
+                indices[0] + 1,
+                indices[-1] + 1,
+                error,
+                delay,
+            )
+            heapq.heappush(deferred, (clock() + delay, next(order), attempts, chunk))
+        elif final:
+            failed.append((indices, error))
+        else:
+            LOG.warning(
+                "Subtitles %s-%s failed (%s), trying them again at the end",
+                indices[0] + 1,
+                indices[-1] + 1,
+                error,
+            )
+            last_round.append(chunk)
+
+    pending = iter(chunks)
+    for final in (False, True):
+        exhausted = False
+        while True:
+            if deferred and (exhausted or deferred[0][0] <= clock()):
+                ready_at, _, attempts, chunk = heapq.heappop(deferred)
+                wait = ready_at - clock()
+                if wait > 0:
+                    retry_policy.sleep(wait)
+                for part in split(chunk):
+                    attempt(part, attempts, final)
+                continue
+
+            chunk = next(pending, None)
+            if chunk is None:
+                if not deferred:
+                    break
+                exhausted = True
+                continue
+            attempt(chunk, 0, final)
+
+        pending = (part for chunk in last_round for part in split(chunk))
+        last_round = []
+
+    return failed
@@ -0,0 +1,269 @@
+import os
+import json
+import queue
+import logging
+import itertools
+import threading
+import traceback
+import urllib.request
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+
+from .fanout import translate_file_languages
+from .translators.base import Translator
+
+LOG = logging.getLogger("srtranslator")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Marks the end of the event stream of a job
+JOB_FINISHED = "finished"
+
+
+class TranslationServer:
+    """Local translation service keeping warm translators between jobs
+
+    Each worker thread builds its translator as soon as it starts and reuses it for every
+    job it runs, so browser launches, proxy lookups and HTTP connection pools are paid
+    before the first job and survive across jobs. Jobs wait in a priority queue (higher
+    priority first, then submission order) and their progress is streamed back as
+    newline-delimited JSON events.
+
+    Args:
+        translator_factory (Callable[[], Translator]): Builds the translator of a worker
+        workers (int, optional): Jobs translated at the same time. Defaults to 1
+        host (str, optional): Address to listen on. Defaults to 127.0.0.1
+        port (int, optional): Port to listen on, 0 picks a free one. Defaults to 8765
+    """
+
+    def __init__(
+        self,
+        translator_factory: Callable[[], Translator],
+        workers: int = 1,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+    ) -> None:
+        self.translator_factory = translator_factory
+        self.workers = workers
+        self.jobs = queue.PriorityQueue()
+        self._job_ids = itertools.count(1)
+        self._threads: List[threading.Thread] = []
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        """Starts the workers, which warm up their translators, and the HTTP listener"""
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        http_thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        http_thread.start()
+        self._threads.append(http_thread)
+        print(f"Serving on {self.url} with {self.workers} worker(s)")
+
+    def serve_forever(self) -> None:
+        self.start()
+        try:
+            self._threads[-1].join()
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """Stops the HTTP listener and quits the translators once running jobs are done"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for _ in range(self.workers):
+            # Sorts after every real job
+            self.jobs.put((float("inf"), 0, None, None))
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def submit(self, job: Dict) -> "queue.Queue[Dict]":
+        """Validates and queues a job
+
+        Args:
+            job (Dict): "languages" and either "path" or "content" (plus "filename" to pick
+                the format). Optional "source_language", "priority" and "wrap_limit"
+
+        Raises:
+            ValueError: If the job is not valid
+
+        Returns:
+            queue.Queue[Dict]: Events of the job, the last one is the finished event
+        """
+        if not isinstance(job, dict):
+            raise ValueError("a job must be a JSON object")
+
+        languages = job.get("languages")
+        if (
+            not isinstance(languages, list)
+            or not languages
+            or not all(isinstance(language, str) for language in languages)
+        ):
+            raise ValueError("languages must be a non empty list of language codes")
+
+        priority = job.get("priority", 0)
+        if not _is_integer(priority):
+            raise ValueError("priority must be an integer")
+        wrap_limit = job.get("wrap_limit", 50)
+        if not _is_integer(wrap_limit) or wrap_limit < 1:
+            raise ValueError("wrap_limit must be a positive integer")
+
+        if job.get("content") is None:
+            if not job.get("path"):
+                raise ValueError("path or content is required")
+            if not os.path.isfile(job["path"]):
+                raise ValueError(f"{job['path']} does not exist")
+
+        job_id = next(self._job_ids)
+        events = queue.Queue()
+        events.put({"event": "queued", "job": job_id, "position": self.jobs.qsize()})
+        self.jobs.put((-priority, job_id, job, events))
+        return events
+
+    def _build_translator(self) -> Translator | None:
+        """Translator of a worker, None if it could not be built yet"""
+        try:
+            return self.translator_factory()
+        except Exception as exc:
+            LOG.error("Could not start a translator: %s", exc)
+            LOG.debug(traceback.format_exc())
+            return None
+
+    def _work(self) -> None:
+        translator = self._build_translator()
+        while True:
+            _, job_id, job, events = self.jobs.get()
+            if job is None:
+                break
+
+            def emit(event, **fields):
+                events.put({"event": event, "job": job_id, **fields})
+
+            try:
+                if translator is None:
+                    # Its last start failed or the previous job broke it
+                    translator = self.translator_factory()
+                emit("started")
+                self._run_job(job, translator, emit)
+            except Exception as exc:
+                emit("error", message=str(exc))
+                LOG.debug(traceback.format_exc())
+                # The translator may be in a broken state, the next job gets a new one
+                if translator is not None:
+                    translator.quit()
+                    translator = None
+            finally:
+                emit(JOB_FINISHED)
+
+        if translator is not None:
+            translator.quit()
+
+    def _run_job(self, job: Dict, translator: Translator, emit: Callable) -> None:
+        translate_file_languages(
+            job.get("path") or job.get("filename") or "inline.srt",
+            translator,
+            job.get("source_language", "auto"),
+            job["languages"],
+            wrap_limit=job.get("wrap_limit", 50),
+            content=job.get("content"),
+            emit=emit,
+        )
+
+
+def _make_handler(server: TranslationServer):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/health":
+                self._send_json(404, {"error": "not found"})
+                return
+            self._send_json(200, {"workers": server.workers, "queued": server.jobs.qsize()})
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                events = server.submit(json.loads(self.rfile.read(length)))
+            except ValueError as exc:
+                self._send_json(400, {"error": str(exc)})
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+
+            # The connection closes after the last event
+            while True:
+                event = events.get()
+                self.wfile.write(json.dumps(event).encode("utf-8") + b"\n")
+                self.wfile.flush()
+                if event["event"] == JOB_FINISHED:
+                    break
+
+        def _send_json(self, status: int, body: Dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            LOG.debug(format, *args)
+
+    return Handler
+
+
+def _is_integer(value) -> bool:
+    # JSON true and false are bools, which are ints too
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def submit_job(server_url: str, job: Dict, on_event: Callable | None = None) -> List[Dict]:
+    """Submits a job to a running server and waits for it to finish
+
+    Args:
+        server_url (str): Server address, like http://127.0.0.1:8765
+        job (Dict): Job, see TranslationServer.submit
+        on_event (Callable, optional): Called with each event as soon as it arrives
+
+    Raises:
+        ValueError: If the server rejects the job
+
+    Returns:
+        List[Dict]: Every event of the job
+    """
+    request = urllib.request.Request(
+        f"{server_url.rstrip('/')}/jobs",
+        data=json.dumps(job).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+
+    try:
+        response = urllib.request.urlopen(request)
+    except urllib.error.HTTPError as exc:
+        raise ValueError(json.loads(exc.read()).get("error", str(exc))) from exc
+
+    events = []
+    with response:
+        for line in response:
+            event = json.loads(line)
+            events.append(event)
+            if on_event:
+                on_event(event)
+
+    return events
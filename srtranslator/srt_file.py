@@ -1,12 +1,23 @@
 import os
-import re
+import copy
+import itertools
+import time
+import logging
 import srt
 
 from srt import Subtitle
-from typing import List, Generator
+from typing import Callable, Dict, List, Generator, Tuple
 
-from .translators.base import Translator
-from .util import show_progress
+from . import srt_parser
+from .chunking import CHUNK_SIZES, resize_plan
+from .context import CONTEXT_POLICY, DEFAULT_BUDGET, ContextBudget, language_pair
+from .fanout import planned_characters, translate_languages
+from .metrics import METRICS
+from .retry import IncompleteTranslationError, RetryPolicy, send_chunks
+from .normalizer import normalize_srt, restore_srt
+from .progress import ProgressTracker, render_progress
+from .translators.base import Translator, line_cost
+from .util import read_text
 
 
 class SrtFile:
@@ -14,9 +25,19 @@ class SrtFile:
 
     Args:
         filepath (str): file path of srt
+        progress_callback (Callable[[ProgressEvent], None], optional): Receives the progress
+            of translations. Defaults to a console progress line
+        content (str, optional): already read file content, avoids reading the file again
+        load_backup (bool, optional): resume from the backup file if there is one. Defaults to True
     """
 
-    def __init__(self, filepath: str, progress_callback=show_progress) -> None:
+    def __init__(
+        self,
+        filepath: str,
+        progress_callback=render_progress,
+        content: str | None = None,
+        load_backup: bool = True,
+    ) -> None:
         self.filepath = filepath
         self.backup_file = f"{self.filepath}.tmp"
         self.subtitles = []
@@ -25,29 +46,38 @@ class SrtFile:
         self.progress_callback = progress_callback
 
         print(f"Loading {filepath} as SRT")
-        with open(filepath, "r", encoding="utf-8", errors="ignore") as input_file:
-            self.subtitles = self.load_from_file(input_file)
+        if content is None:
+            content = read_text(filepath)
+        self.subtitles = self.load_from_string(content)
 
-        self._load_backup()
+        if load_backup:
+            self._load_backup()
 
     def _load_backup(self):
         if not os.path.exists(self.backup_file):
             return
 
         print(f"Backup file found = {self.backup_file}")
-        with open(self.backup_file, "r", encoding="utf-8", errors="ignore") as input_file:
-            subtitles = self.load_from_file(input_file)
+        subtitles = self.load_from_string(read_text(self.backup_file))
 
-            self.start_from = len(subtitles)
-            self.current_subtitle = self.start_from
-            print(f"Starting from subtitle {self.start_from}")
-            self.subtitles = [
-                *subtitles,
-                *self.subtitles[self.start_from :],
-            ]
+        self.start_from = len(subtitles)
+        self.current_subtitle = self.start_from
+        print(f"Starting from subtitle {self.start_from}")
+        self.subtitles = [
+            *subtitles,
+            *self.subtitles[self.start_from :],
+        ]
 
     def load_from_file(self, input_file):
-        srt_file = srt.parse(input_file)
+        return self.load_from_string(input_file.read())
+
+    def load_from_string(self, content: str):
+        try:
+            return srt_parser.parse(content)
+        except srt_parser.UnsupportedSyntaxError as exc:
+            logging.debug(f"Using srt library parser ({exc})")
+
+        srt_file = srt.parse(content)
         subtitles = list(srt_file)
         subtitles = list(srt.sort_and_reindex(subtitles))
         return self._clean_subs_content(subtitles)
@@ -62,20 +92,18 @@ class SrtFile:
             Generator: Each chunk at the time
         """
         portion = []
+        n_char = 0
 
         for subtitle in self.subtitles[self.start_from :]:
-            # Calculate new chunk size if subtitle content is added to actual chunk
-            n_char = (
-                sum(len(sub.content) for sub in portion)  # All subtitles in chunk
-                + len(subtitle.content)  # New subtitle
-                + len(portion)  # Break lines in chunk
-                + 1  # New breakline
-            )
+            # Calculate new chunk size if subtitle content is added to actual chunk, framed
+            # the way translate_batch sends it
+            n_char += line_cost(len(portion), len(subtitle.content))
 
             # If chunk goes beyond the limit, yield it
             if n_char >= chunk_size and len(portion) != 0:
                 yield portion
                 portion = []
+                n_char = line_cost(0, len(subtitle.content))
 
             # Put subtitle content in chunk
             portion.append(subtitle)
@@ -92,21 +120,8 @@ class SrtFile:
         Returns:
             List[Subtitle]: Same list of subtitles, but cleaned
         """
-        cleanr = re.compile("<.*?>")
-
         for sub in subtitles:
-            sub.content = cleanr.sub("", sub.content)
-            sub.content = srt.make_legal_content(sub.content)
-            sub.content = sub.content.strip()
-
-            if sub.content == "":
-                sub.content = "..."
-
-            if all(sentence.startswith("-") for sentence in sub.content.split("\n")):
-                sub.content = sub.content.replace("\n", "////")
-                continue
-
-            sub.content = sub.content.replace("\n", " ")
+            sub.content = normalize_srt(sub.content)
 
         return subtitles
 
@@ -117,7 +132,7 @@ class SrtFile:
             line_wrap_limit (int): Number of maximum characters in a line before wrap. Defaults to 50.
         """
         for sub in self.subtitles:
-            sub.content = sub.content.replace("////", "\n")
+            sub.content = restore_srt(sub.content)
 
             content = []
             for line in sub.content.split("\n"):
@@ -252,23 +267,25 @@ class SrtFile:
 
         return " ".join(context_parts) if context_parts else None
 
-    def translate(
-        self,
-        translator: Translator,
-        source_language: str,
-        destination_language: str,
-    ) -> None:
-        """Translate SRT file using a translator of your choose
+    def _plan_chunks(
+        self, chunk_size: int, context_budget: ContextBudget | None = DEFAULT_BUDGET
+    ) -> List[Tuple[List[int], str | None]]:
+        """Splits the subtitles left to translate in chunks and builds the context of each one
+
+        Contexts are built from the untranslated subtitles, so a plan can be shared by
+        every destination language.
 
         Args:
-            translator (Translator): Translator object of choose
-            destination_language (str): Destination language (must be coherent with your translator)
-            source_language (str): Source language (must be coherent with your translator)
-        """
-        print("Starting translation")
+            chunk_size (int): Maximum number of letter in text chunk
+            context_budget (ContextBudget, optional): Context of the chunks, scaled to the
+                size of each one, None to send them without context. Defaults to 2000
+                characters before and 1000 after
 
-        # Detect scene boundaries
-        scene_starts = self._detect_scenes()
+        Returns:
+            List[Tuple[List[int], str | None]]: Subtitle indices and context of each chunk
+        """
+        # Detect scene boundaries, only contexts need them
+        scene_starts = self._detect_scenes() if context_budget is not None else []
         if os.environ.get("DEBUG_CONTEXT"):
             print(f"Detected {len(scene_starts)} scenes in subtitle file")
 
@@ -283,31 +300,123 @@ class SrtFile:
             for sub_idx in range(start_idx, end_idx + 1):
                 scene_map[sub_idx] = (scene_idx, start_idx, end_idx)
 
-        # For each chunk of the file (based on the translator capabilities)
-        chunk_num = 0
-        current_subtitle_idx = self.start_from
+        plan = []
+        chunk_start_idx = self.start_from
 
-        for subs_slice in self._get_next_chunk(translator.max_char):
-            chunk_num += 1
-            chunk_start_idx = current_subtitle_idx
-            chunk_end_idx = current_subtitle_idx + len(subs_slice) - 1
+        for subs_slice in self._get_next_chunk(chunk_size):
+            if not subs_slice:
+                continue
 
-            # Get scene info for this chunk
-            scene_idx, scene_start_idx, scene_end_idx = scene_map.get(
-                chunk_start_idx, (0, chunk_start_idx, chunk_end_idx)
-            )
+            chunk_end_idx = chunk_start_idx + len(subs_slice) - 1
+            chunk = list(range(chunk_start_idx, chunk_end_idx + 1))
+
+            context = None
+            if context_budget is not None:
+                # Get scene info for this chunk
+                scene_idx, scene_start_idx, scene_end_idx = scene_map.get(
+                    chunk_start_idx, (0, chunk_start_idx, chunk_end_idx)
+                )
+                budget = context_budget.for_chunk(
+                    sum(len(line) for line in self._chunk_text(chunk))
+                )
+
+                # Build DeepL context (surrounding lines, NOT current chunk)
+                context = self._build_deepl_context(
+                    scene_idx,
+                    chunk_start_idx,
+                    chunk_end_idx,
+                    scene_start_idx,
+                    scene_end_idx,
+                    max_history_chars_before=budget.before,
+                    max_history_chars_after=budget.after,
+                )
+
+            plan.append((chunk, context))
+            chunk_start_idx = chunk_end_idx + 1
+
+        return plan
 
-            # Build text array (only lines to translate)
-            text = [sub.content for sub in subs_slice]
+    def translate(
+        self,
+        translator: Translator,
+        source_language: str,
+        destination_language: str,
+        retry_policy: RetryPolicy | None = None,
+    ) -> None:
+        """Translate SRT file using a translator of your choose
 
-            # Build DeepL context (surrounding lines, NOT current chunk)
-            current_context = self._build_deepl_context(
-                scene_idx,
-                chunk_start_idx,
-                chunk_end_idx,
-                scene_start_idx,
-                scene_end_idx,
-            )
+        Args:
+            translator (Translator): Translator object of choose
+            destination_language (str): Destination language (must be coherent with your translator)
+            source_language (str): Source language (must be coherent with your translator)
+            retry_policy (RetryPolicy, optional): Retries of failing chunks. Defaults to RetryPolicy()
+
+        Raises:
+            IncompleteTranslationError: If chunks still failed after their retries
+            QuotaExceededError: If the translator account can not translate the whole file,
+                nothing is translated then
+        """
+        plan = self._plan_chunks(
+            CHUNK_SIZES.size(translator, source_language, destination_language),
+            CONTEXT_POLICY.budget(translator, source_language, destination_language),
+        )
+        translator.check_quota(planned_characters(self, plan))
+        self._translate_plan(translator, source_language, destination_language, plan, retry_policy)
+
+    def _translate_plan(
+        self,
+        translator: Translator,
+        source_language: str,
+        destination_language: str,
+        plan: List[Tuple[List[int], str | None]],
+        retry_policy: RetryPolicy | None = None,
+    ) -> None:
+        """Translates the chunks of a plan made by _plan_chunks
+
+        A chunk failing with a retryable error waits for its retry aside while the next
+        chunks go on, see send_chunks. If it fails on every attempt, it gets a last round
+        once the others are done.
+
+        Args:
+            translator (Translator): Translator object of choose
+            source_language (str): Source language (must be coherent with your translator)
+            destination_language (str): Destination language (must be coherent with your translator)
+            plan (List[Tuple[List[int], str | None]]): Subtitle indices and context of each chunk
+            retry_policy (RetryPolicy, optional): Retries of failing chunks. Defaults to RetryPolicy()
+
+        Raises:
+            IncompleteTranslationError: If chunks failed even in the last round, everything
+                else is translated then
+        """
+        retry_policy = retry_policy or RetryPolicy()
+        print("Starting translation")
+        tracker = ProgressTracker(
+            f"{os.path.basename(self.filepath)} ({destination_language})",
+            sum(1 for chunk, _ in plan for index in chunk if index >= self.start_from),
+            planned_characters(self, plan),
+            self.progress_callback,
+        )
+        # Backups hold what comes before the first subtitle not translated yet
+        remaining = sorted(
+            {index for chunk, _ in plan for index in chunk if index >= self.start_from}
+        )
+        done = set()
+        position = 0
+        chunk_nums = itertools.count(1)
+
+        # Chunks bigger than the size the translator copes with right now are split
+        def chunk_size():
+            return CHUNK_SIZES.size(translator, source_language, destination_language)
+
+        def split(item):
+            return resize_plan([item], self._chunk_text, chunk_size)
+
+        def send(item):
+            nonlocal position
+            chunk, current_context = item
+            chunk_num = next(chunk_nums)
+            chunk_start_idx = chunk[0]
+            chunk_end_idx = chunk[-1]
 
             # Debug output
             if os.environ.get("DEBUG_CONTEXT"):
@@ -319,22 +428,167 @@ class SrtFile:
                 else:
                     print(f"\n[Chunk {chunk_num}] No context (start of scene)")
 
-            # Translate with context
+            characters = sum(len(line) for line in self._chunk_text(chunk))
+            tracker.chunk_started()
+            try:
+                self._translate_chunk(
+                    translator, source_language, destination_language, chunk, current_context
+                )
+            except Exception:
+                tracker.chunk_failed()
+                raise
+            tracker.chunk_done(len(chunk), characters)
+
+            done.update(chunk)
+            while position < len(remaining) and remaining[position] in done:
+                position += 1
+            self.current_subtitle = (
+                remaining[position] if position < len(remaining) else len(self.subtitles)
+            )
+
+        # Skip what a backup of this language already holds
+        chunks = (
+            ([index for index in chunk if index >= self.start_from], current_context)
+            for chunk, current_context in resize_plan(plan, self._chunk_text, chunk_size)
+        )
+        try:
+            failed = send_chunks(
+                (item for item in chunks if item[0]), send, translator, retry_policy, split
+            )
+        finally:
+            tracker.finish()
+        if failed:
+            raise IncompleteTranslationError(failed)
+
+        self.current_subtitle = len(self.subtitles)
+        print("... Translation done")
+
+    def _translate_chunk(
+        self,
+        translator: Translator,
+        source_language: str,
+        destination_language: str,
+        chunk: List[int],
+        context: str | None,
+    ) -> None:
+        """Translates and applies one chunk, raises if it failed"""
+        text = self._chunk_text(chunk)
+        characters = sum(len(line) for line in text)
+        pair = language_pair(source_language, destination_language)
+
+        started = time.perf_counter()
+        try:
             translation = translator.translate(
-                text, source_language, destination_language, context=current_context
+                text, source_language, destination_language, context=context
+            )
+        except Exception as exc:
+            CHUNK_SIZES.record_failure(
+                translator, source_language, destination_language, characters, exc
             )
+            raise
+        seconds = time.perf_counter() - started
+        METRICS.record(
+            type(translator).__name__,
+            characters,
+            seconds,
+            pair=pair,
+            context_characters=len(context or ""),
+        )
+        CHUNK_SIZES.record(
+            translator, source_language, destination_language, characters, seconds
+        )
+        # A wrong number of lines is retried too
+        try:
+            self._apply_chunk(chunk, translation)
+        except ValueError as exc:
+            METRICS.record_mismatch(type(translator).__name__, pair, bool(context))
+            CHUNK_SIZES.record_failure(
+                translator, source_language, destination_language, characters, exc
+            )
+            raise
 
-            # Update subtitles with translations
-            if isinstance(translation, str):
-                translation = translation.splitlines()
-            for i in range(len(subs_slice)):
-                subs_slice[i].content = translation[i]
-                self.current_subtitle += 1
-                current_subtitle_idx += 1
+    def _chunk_text(self, chunk: List[int]) -> List[str]:
+        """Text sent to the translator for a chunk, one line per subtitle"""
+        return [self.subtitles[index].content for index in chunk]
 
-            self.progress_callback(len(self.subtitles), progress=self.current_subtitle)
+    def _start_seconds(self, index: int) -> float:
+        """Start time of a subtitle, in seconds"""
+        return self.subtitles[index].start.total_seconds()
 
-        print("... Translation done")
+    def _apply_chunk(self, chunk: List[int], translation) -> None:
+        """Puts the translation of a chunk in place
+
+        Args:
+            chunk (List[int]): Subtitle indices of the chunk
+            translation (List[str] | str): One translated line per subtitle
+
+        Raises:
+            ValueError: If the translation does not have one line per subtitle, nothing is
+                changed then
+        """
+        if isinstance(translation, str):
+            translation = translation.splitlines()
+        if len(translation) != len(chunk):
+            raise ValueError(f"Got {len(translation)} translated lines for {len(chunk)} subtitles")
+        for i, index in enumerate(chunk):
+            self.subtitles[index].content = translation[i]
+
+    def for_language(
+        self,
+        destination_language: str,
+        backup_file: str | None = None,
+        load_backup: bool = True,
+    ):
+        """Copy of the loaded subtitles to translate into another language
+
+        The copy has its own backup file, and resumes from it if it exists.
+
+        Args:
+            destination_language (str): Destination language of the copy
+            backup_file (str, optional): Backup file of the copy. Defaults to {filepath}.{language}.tmp
+            load_backup (bool, optional): resume from the backup file if there is one. Defaults to True
+
+        Returns:
+            SrtFile: Independent copy of this file
+        """
+        clone = copy.copy(self)
+        clone.backup_file = backup_file or f"{self.filepath}.{destination_language}.tmp"
+        clone.subtitles = [copy.copy(sub) for sub in self.subtitles]
+        if load_backup:
+            clone._load_backup()
+        return clone
+
+    def translate_languages(
+        self,
+        translator_factory: Callable[[], Translator],
+        source_language: str,
+        destination_languages: List[str],
+        max_workers: int | None = None,
+        backup_files: Dict[str, str] | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> Dict[str, "SrtFile"]:
+        """Translates the file into several languages at once, see fanout.translate_languages
+
+        Args:
+            translator_factory (Callable[[], Translator]): Builds the translator of each language
+            source_language (str): Source language (must be coherent with your translator)
+            destination_languages (List[str]): Destination languages
+            max_workers (int, optional): Languages translated at the same time. Defaults to all
+            backup_files (Dict[str, str], optional): Backup file of some languages
+            retry_policy (RetryPolicy, optional): Retries of failing chunks. Defaults to RetryPolicy()
+
+        Returns:
+            Dict[str, SrtFile]: Translated copy of each language that succeeded
+        """
+        return translate_languages(
+            self,
+            translator_factory,
+            source_language,
+            destination_languages,
+            max_workers=max_workers,
+            backup_files=backup_files,
+            retry_policy=retry_policy,
+        )
 
     def save_backup(self):
         self.subtitles = self.subtitles[: self.current_subtitle]
@@ -353,6 +607,13 @@ class SrtFile:
         self._delete_backup()
 
         print(f"Saving {filepath}")
-        subtitles = srt.compose(self.subtitles)
         with open(filepath, "w", encoding="utf-8") as file_out:
-            file_out.write(subtitles)
+            file_out.write(self.dumps())
+
+    def dumps(self) -> str:
+        """SRT content of the file, as save writes it
+
+        Returns:
+            str: SRT content
+        """
+        return srt.compose(self.subtitles)
@@ -0,0 +1,98 @@
+import re
+
+from datetime import timedelta
+from typing import List
+
+from srt import Subtitle
+
+from .normalizer import normalize_srt
+
+# Same grammar as the srt library, so both parsers agree on every timestamp
+TIMESTAMP_DELIM = r"[,.:，．。：]"
+TIMESTAMP = r"([0-9]+){d}([0-9]+){d}([0-9]+){d}?([0-9]*)".format(d=TIMESTAMP_DELIM)
+# One well-formed block: index, timestamps, text lines and the blank lines after them
+BLOCK_REGEX = re.compile(
+    r"(-?[0-9]+(?:\.[0-9]*)?)\n{ts} *-[ -] *> *{ts} ?([^\n]*)(?:\n|\Z)"
+    r"((?:[^\n]+(?:\n|\Z))*)(?:\n+|\Z)".format(ts=TIMESTAMP)
+)
+# Text lines the srt library could read as the start of another block
+HEADER_LIKE_REGEX = re.compile(
+    r"^(?:\s*-?[0-9]+\.?[0-9]*\s*$|{ts} *-[ -] *>)".format(ts=TIMESTAMP), re.MULTILINE
+)
+
+
+class UnsupportedSyntaxError(ValueError):
+    """The file uses SRT syntax the fast parser leaves to the srt library"""
+
+
+def parse(content: str) -> List[Subtitle]:
+    """Parses, sorts, reindexes and cleans SRT content in a single pass
+
+    Produces exactly what srt.parse + srt.sort_and_reindex + SrtFile._clean_subs_content
+    produce. Anything outside the well-formed subset of the format (CR line endings,
+    indexless blocks, blank or index-like lines inside a subtitle, ...) raises
+    UnsupportedSyntaxError so the caller can fall back to the srt library.
+
+    Args:
+        content (str): SRT file content
+
+    Raises:
+        UnsupportedSyntaxError: If the content needs the srt library rules
+
+    Returns:
+        List[Subtitle]: Sorted, reindexed and cleaned subtitles
+    """
+    if "\r" in content:
+        raise UnsupportedSyntaxError("CR line endings")
+
+    if content.startswith("\ufeff"):
+        content = content[1:]
+
+    size = len(content)
+    position = size - len(content.lstrip())
+    match_block = BLOCK_REGEX.match
+    search_header = HEADER_LIKE_REGEX.search
+    entries = []
+
+    while position < size:
+        block = match_block(content, position)
+        if block is None:
+            raise UnsupportedSyntaxError(f"Unexpected content at char {position}")
+
+        index, h1, m1, s1, ms1, h2, m2, s2, ms2, proprietary, body = block.groups()
+        if body and search_header(body):
+            raise UnsupportedSyntaxError(f"Ambiguous subtitle text at char {position}")
+
+        entries.append(
+            (
+                ((int(h1) * 60 + int(m1)) * 60 + int(s1)) * 1000 + int(ms1 or 0),
+                ((int(h2) * 60 + int(m2)) * 60 + int(s2)) * 1000 + int(ms2 or 0),
+                int(index.split(".")[0]) if "." in index else int(index),
+                proprietary,
+                body,
+            )
+        )
+        position = block.end()
+
+    if not entries:
+        raise UnsupportedSyntaxError("No subtitles found")
+
+    entries.sort(key=lambda entry: entry[:3])
+
+    subtitles = []
+    for start, end, _, proprietary, body in entries:
+        # Same skip rules as srt.sort_and_reindex
+        if start >= end or not body.strip():
+            continue
+
+        subtitles.append(
+            Subtitle(
+                len(subtitles) + 1,
+                timedelta(0, 0, 0, start),
+                timedelta(0, 0, 0, end),
+                normalize_srt(body),
+                proprietary,
+            )
+        )
+
+    return subtitles
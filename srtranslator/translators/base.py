@@ -1,8 +1,66 @@
+import re
+import logging
+
 from abc import ABC, abstractmethod
+from typing import List
+
+LOG = logging.getLogger("srtranslator")
+
+BATCH_MARKER = "[[{}]]"
+# Translators sometimes add spaces inside the brackets
+BATCH_MARKER_REGEX = re.compile(r"\[\[\s*(\d+)\s*\]\]")
+
+
+def line_cost(position: int, length: int) -> int:
+    """Characters a line takes in a batch request: its marker, text and line break
+
+    Args:
+        position (int): Position of the line in the batch
+        length (int): Characters of the line
+
+    Returns:
+        int: Characters of the framed line
+    """
+    return len(BATCH_MARKER.format(position)) + 1 + length + 1
+
+
+def unframe(result: str, n_lines: int) -> List[str] | None:
+    """Splits a translation of marker framed lines back into lines
+
+    Args:
+        result (str): Translation of the framed lines
+        n_lines (int): Number of lines that were sent
+
+    Returns:
+        List[str] | None: Translated lines, or None if markers are missing, repeated or
+            out of order
+    """
+    parts = BATCH_MARKER_REGEX.split(result)
+    numbers = parts[1::2]
+
+    if not numbers:
+        # Markers dropped but lines kept are still usable
+        lines = result.strip().splitlines()
+        return lines if len(lines) == n_lines else None
+
+    if parts[0].strip() or numbers != [str(number) for number in range(n_lines)]:
+        return None
+
+    # A line split in two by the translator is joined back
+    return [
+        " ".join(line.strip() for line in text.splitlines() if line.strip())
+        for text in parts[2::2]
+    ]
 
 
 class Translator(ABC):
     max_char: int
+    # Errors retrying a chunk can not fix, like a rejected API key
+    fatal_errors: tuple = ()
+    # Whether the context argument is used, no context is built for the others
+    supports_context: bool = False
+    # Whether chunks can be sized by the ChunkSizeController, the others get max_char
+    adaptive_chunk_size: bool = True
 
     def translate(
         self,
@@ -26,12 +84,49 @@ class Translator(ABC):
         destination_language: str,
         context: str = None,
     ) -> list:
-        # Default implementation: join and split
-        joined = "\n".join(text)
+        """Translates lines in a single request, each one after a numbered marker
+
+        The answer is split on the markers, so a line merged into another or split in two
+        is noticed instead of shifting every line after it. When the markers do not come
+        back in order, each half of the lines is translated on its own, so only the part
+        the translator mangled costs extra (smaller) requests.
+
+        Args:
+            text (list): Lines to translate
+            source_language (str): Source language
+            destination_language (str): Destination language
+            context (str, optional): Context of the lines
+
+        Returns:
+            list: One translated line per line
+        """
+        if not text:
+            return []
+
+        if len(text) == 1:
+            result = self.translate_single(
+                text[0], source_language, destination_language, context
+            )
+            return [result.strip()]
+
+        framed = "\n".join(
+            f"{BATCH_MARKER.format(number)} {line}" for number, line in enumerate(text)
+        )
         result = self.translate_single(
-            joined, source_language, destination_language, context
+            framed, source_language, destination_language, context
+        )
+
+        lines = unframe(result, len(text))
+        if lines is not None:
+            return lines
+
+        middle = len(text) // 2
+        LOG.info("Lines of a batch of %s got mixed up, translating halves", len(text))
+        return self.translate_batch(
+            text[:middle], source_language, destination_language, context
+        ) + self.translate_batch(
+            text[middle:], source_language, destination_language, context
         )
-        return result.splitlines()
 
     @abstractmethod
     def translate_single(
@@ -42,8 +137,29 @@ class Translator(ABC):
         context: str = None,
     ) -> str: ...
 
+    def check_quota(self, characters: int) -> None:
+        """Checks that the account can translate that many characters, before anything is sent
+
+        Translators without a quota accept everything.
+
+        Args:
+            characters (int): Characters about to be translated
+
+        Raises:
+            QuotaExceededError: If the translation would run out of quota halfway
+        """
+
     def quit(self): ...
 
 
 class TimeOutException(Exception):
     """Translation timed out"""
+
+
+class QuotaExceededError(Exception):
+    """The account has not enough characters left for the translation"""
+
+    def __init__(self, characters: int, remaining: int) -> None:
+        super().__init__(f"{characters} characters to translate, {remaining} left on the account")
+        self.characters = characters
+        self.remaining = remaining
@@ -0,0 +1,178 @@
+import logging
+import threading
+
+from concurrent.futures import Future
+from typing import Dict, List, Tuple
+
+from .base import Translator, line_cost
+
+# Seconds the first chunk of a batch waits for others to join it
+WINDOW = 0.005
+
+LOG = logging.getLogger("srtranslator")
+
+
+def _characters(text: List[str], start: int = 0) -> int:
+    """Characters lines add to a request after `start` lines, with their markers"""
+    return sum(line_cost(start + position, len(line)) for position, line in enumerate(text))
+
+
+class _Batch:
+    """Lines gathered for one request, and which part of them goes back to whom"""
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        # Characters of the request, lines framed the way translate_batch sends them
+        self.characters = 0
+        # Start, number of lines and future of each chunk
+        self.owners: List[Tuple[int, int, Future]] = []
+        # Set when the batch is full and should not wait anymore
+        self.full = threading.Event()
+
+
+class RequestCoalescer:
+    """Packs chunks of concurrent jobs into shared requests to one translator
+
+    The first chunk for a language pair and context opens a batch and waits `window`
+    seconds for chunks of other jobs with the same pair and context to join it, or less if
+    the batch fills up to `max_char`. The batch then goes out as one request, and each chunk
+    gets its own lines back. Chunks with different contexts never share a request, and a
+    chunk as big as a request goes out on its own right away.
+
+    Jobs translate through `client()` translators, all of them sharing this coalescer. At
+    most `max_in_flight` requests are sent at the same time, batches keep filling up while
+    they wait for their turn.
+
+    Args:
+        translator (Translator): Shared translator
+        window (float, optional): Seconds a batch waits for more chunks. Defaults to 0.005
+        max_in_flight (int, optional): Requests sent at the same time, 1 for translators that
+            can not be used from several threads. Defaults to 4
+    """
+
+    def __init__(
+        self, translator: Translator, window: float = WINDOW, max_in_flight: int = 4
+    ) -> None:
+        self.translator = translator
+        self.window = window
+        self.max_char = translator.max_char
+        self.pending: Dict[Tuple[str, str, str | None], _Batch] = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._in_flight = threading.BoundedSemaphore(max(1, max_in_flight))
+
+    def client(self) -> "CoalescedTranslator":
+        """Translator for one job, going through this coalescer"""
+        return CoalescedTranslator(self)
+
+    def translate_batch(
+        self,
+        text: List[str],
+        source_language: str,
+        destination_language: str,
+        context: str | None = None,
+    ) -> List[str]:
+        if not text:
+            return []
+
+        if _characters(text) >= self.max_char:
+            with self._in_flight:
+                return self._request(text, source_language, destination_language, context)
+
+        key = (source_language, destination_language, context)
+        future = Future()
+        with self._lock:
+            batch = self.pending.get(key)
+            if (
+                batch is not None
+                and batch.characters + _characters(text, len(batch.lines)) > self.max_char
+            ):
+                # No room left, the batch goes out now and this chunk opens the next one
+                del self.pending[key]
+                batch.full.set()
+                batch = None
+
+            leader = batch is None
+            if leader:
+                batch = self.pending[key] = _Batch()
+            batch.owners.append((len(batch.lines), len(text), future))
+            batch.characters += _characters(text, len(batch.lines))
+            batch.lines.extend(text)
+            if batch.characters >= self.max_char:
+                del self.pending[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            # The batch takes more chunks until it gets its turn
+            with self._in_flight:
+                with self._lock:
+                    if self.pending.get(key) is batch:
+                        del self.pending[key]
+                self._send(batch, source_language, destination_language, context)
+
+        return future.result()
+
+    def _send(self, batch: _Batch, source_language, destination_language, context) -> None:
+        try:
+            lines = self._request(batch.lines, source_language, destination_language, context)
+            if len(lines) != len(batch.lines):
+                raise ValueError(f"Got {len(lines)} translated lines for {len(batch.lines)}")
+        except Exception as exc:
+            for _, _, future in batch.owners:
+                future.set_exception(exc)
+            return
+
+        if len(batch.owners) > 1:
+            LOG.debug("%s chunks sent in one request", len(batch.owners))
+        for start, count, future in batch.owners:
+            future.set_result(lines[start : start + count])
+
+    def _request(self, text, source_language, destination_language, context) -> List[str]:
+        with self._lock:
+            self.requests += 1
+        return self.translator.translate_batch(text, source_language, destination_language, context)
+
+    def quit(self) -> None:
+        self.translator.quit()
+
+
+class CoalescedTranslator(Translator):
+    """Translator of one job whose requests are packed with other jobs' by a RequestCoalescer
+
+    Quitting it leaves the shared translator running, quit the coalescer once every job
+    is done.
+
+    Args:
+        coalescer (RequestCoalescer): Shared coalescer
+    """
+
+    def __init__(self, coalescer: RequestCoalescer) -> None:
+        self.coalescer = coalescer
+        self.max_char = coalescer.max_char
+        self.fatal_errors = coalescer.translator.fatal_errors
+        self.supports_context = coalescer.translator.supports_context
+        self.adaptive_chunk_size = coalescer.translator.adaptive_chunk_size
+
+    def translate_batch(
+        self,
+        text: list,
+        source_language: str,
+        destination_language: str,
+        context: str = None,
+    ) -> list:
+        return self.coalescer.translate_batch(text, source_language, destination_language, context)
+
+    def translate_single(
+        self,
+        text: str,
+        source_language: str,
+        destination_language: str,
+        context: str = None,
+    ) -> str:
+        return "\n".join(
+            self.translate_batch(text.split("\n"), source_language, destination_language, context)
+        )
+
+    def check_quota(self, characters: int) -> None:
+        self.coalescer.translator.check_quota(characters)
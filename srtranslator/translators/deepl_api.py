@@ -1,15 +1,320 @@
+import io
+import time
 import deepl
-from .base import Translator
+import logging
+import threading
+
+from typing import Callable, Dict, Sequence, Tuple, TypeVar
+
+from .base import QuotaExceededError, Translator
+
+# Characters per document in document mode, plain text uploads are limited in size
+DOCUMENT_MAX_CHAR = 500000
+# DeepL bills every document at least this many characters, shorter ones go as text
+DOCUMENT_MIN_CHAR = 50000
+# Seconds between document status checks, the library helper waits 5 seconds every time
+DOCUMENT_POLL_INTERVAL = 1.0
+# Seconds a rate limited key rests, doubled each time it is limited again in a row
+RATE_LIMIT_COOLDOWN = 1.0
+MAX_RATE_LIMIT_COOLDOWN = 60.0
+# Times a request can be rate limited per key of the pool before giving up
+RATE_LIMITED_ATTEMPTS = 3
+
+LOG = logging.getLogger("srtranslator")
+
+_clients: Dict[Tuple[str, str | None, str | None], deepl.Translator] = {}
+_clients_lock = threading.Lock()
+_pools: Dict[Tuple[Tuple[str, ...], str | None, str | None], "KeyPool"] = {}
+
+T = TypeVar("T")
+
+
+def get_client(
+    api_key: str, server_url: str | None = None, proxy: str | None = None
+) -> deepl.Translator:
+    """Process-wide DeepL client of an API key
+
+    Every DeeplApi of the process with the same key shares the client and its session of
+    keep-alive connections, so files and threads do not open new TLS connections. The
+    client is configured through its own options only, other users of the deepl library
+    in the process are not affected.
+
+    Args:
+        api_key (str): DeepL API key
+        server_url (str, optional): Alternative API server, like a local stand-in for tests
+        proxy (str, optional): Proxy URL of the requests
+
+    Returns:
+        deepl.Translator: Shared client
+    """
+    with _clients_lock:
+        key = (api_key, server_url, proxy)
+        if key not in _clients:
+            _clients[key] = deepl.Translator(
+                api_key, server_url=server_url, proxy=proxy, send_platform_info=False
+            )
+
+        return _clients[key]
+
+
+def mask_key(api_key: str) -> str:
+    """What logs show of an API key"""
+    return f"{api_key[:4]}...{api_key[-3:]}" if ":" in api_key else f"{api_key[:4]}..."
+
+
+class _Key:
+    """State and usage of one key of a pool"""
+
+    def __init__(self, api_key: str, client: deepl.Translator) -> None:
+        self.api_key = api_key
+        self.client = client
+        # Characters left on the account, None until known or when unlimited
+        self.remaining: int | None = None
+        self.in_flight = 0
+        self.limited_until = 0.0
+        self.cooldown = RATE_LIMIT_COOLDOWN
+        # Why the key was taken out of the pool
+        self.removed: Exception | None = None
+        self.requests = 0
+        self.characters = 0
+        self.rate_limits = 0
+
+
+class KeyPool:
+    """DeepL API keys shared by every DeeplApi of the process using them
+
+    Each request goes to the key with the most quota left per request in flight, among
+    the keys not resting from a rate limit. A rate limited request goes to another key
+    right away, the key rests a second (twice as long each time it is limited again). A
+    key out of quota, or rejected, is taken out of the pool and its request goes to
+    another one, the job only fails once no key is left. Requests and characters are
+    recorded per key, see usage().
+
+    Args:
+        api_keys (Sequence[str]): DeepL API keys
+        server_url (str, optional): Alternative API server, like a local stand-in for tests
+        proxy (str, optional): Proxy URL of the requests
+        clock (Callable[[], float], optional): Time source. Defaults to time.monotonic
+        sleep (Callable[[float], None], optional): Waits for a rate limit. Defaults to time.sleep
+    """
+
+    def __init__(
+        self,
+        api_keys: Sequence[str],
+        server_url: str | None = None,
+        proxy: str | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if not api_keys:
+            raise ValueError("No DeepL API key")
+        self.keys = [_Key(api_key, get_client(api_key, server_url, proxy)) for api_key in api_keys]
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int | None:
+        """Fetches the usage of every key, keys rejected by DeepL are taken out
+
+        Returns:
+            int | None: Characters left on all keys, None if one of them is unlimited
+        """
+        total = 0
+        for key in self.keys:
+            if key.removed is not None:
+                continue
+            try:
+                usage = key.client.get_usage().character
+            except deepl.AuthorizationException as exc:
+                self._remove(key, exc)
+                continue
+
+            with self._lock:
+                key.remaining = usage.limit - usage.count if usage.valid else None
+            if total is not None:
+                total = None if key.remaining is None else total + key.remaining
+
+        if all(key.removed is not None for key in self.keys):
+            raise self.keys[-1].removed
+        return total
+
+    def run(self, characters: int, request: Callable[[deepl.Translator], T]) -> T:
+        """Sends a request with the best key, and with other keys when it can not take it
+
+        Args:
+            characters (int): Characters the request bills
+            request (Callable[[deepl.Translator], T]): Request, given the client of a key
+
+        Raises:
+            deepl.QuotaExceededException: If every key is out of quota
+            deepl.AuthorizationException: If every key was rejected
+            deepl.TooManyRequestsException: If the keys stayed rate limited
+
+        Returns:
+            T: What the request returns
+        """
+        for _ in range(RATE_LIMITED_ATTEMPTS * len(self.keys)):
+            key = self._acquire(characters)
+            try:
+                result = request(key.client)
+            except deepl.TooManyRequestsException as exc:
+                last_error = exc
+                self._release(key, rate_limited=True)
+                continue
+            except (deepl.QuotaExceededException, deepl.AuthorizationException) as exc:
+                self._release(key)
+                self._remove(key, exc)
+                continue
+            except BaseException:
+                self._release(key)
+                raise
+
+            self._release(key, characters)
+            return result
+
+        raise last_error
+
+    def _acquire(self, characters: int) -> _Key:
+        while True:
+            with self._lock:
+                keys = [key for key in self.keys if key.removed is None]
+                if not keys:
+                    raise self.keys[-1].removed
+
+                now = self.clock()
+                ready = [key for key in keys if key.limited_until <= now]
+                if ready:
+                    key = max(ready, key=lambda key: self._score(key, characters))
+                    key.in_flight += 1
+                    return key
+                wait = min(key.limited_until for key in keys) - now
+
+            LOG.debug("Every DeepL API key is rate limited, waiting %.1f seconds", wait)
+            self.sleep(wait)
+
+    @staticmethod
+    def _score(key: _Key, characters: int) -> Tuple[bool, float]:
+        """Keys able to take the request first, then the most quota per request in flight"""
+        remaining = float("inf") if key.remaining is None else key.remaining
+        return remaining >= characters, remaining / (key.in_flight + 1)
+
+    def _release(self, key: _Key, characters: int = 0, rate_limited: bool = False) -> None:
+        with self._lock:
+            key.in_flight -= 1
+            if rate_limited:
+                key.rate_limits += 1
+                key.limited_until = self.clock() + key.cooldown
+                key.cooldown = min(MAX_RATE_LIMIT_COOLDOWN, key.cooldown * 2)
+                return
+            if characters:
+                key.requests += 1
+                key.characters += characters
+                key.cooldown = RATE_LIMIT_COOLDOWN
+                if key.remaining is not None:
+                    key.remaining -= characters
+
+    def _remove(self, key: _Key, exc: Exception) -> None:
+        with self._lock:
+            if key.removed is not None:
+                return
+            key.removed = exc
+            left = sum(1 for other in self.keys if other.removed is None)
+        LOG.warning(
+            "DeepL API key %s left out (%s), %s key(s) left", mask_key(key.api_key), exc, left
+        )
+
+    def usage(self) -> Dict[str, Dict[str, int | bool | None]]:
+        """Requests, characters, rate limits and quota left of each key, by masked key"""
+        with self._lock:
+            return {
+                mask_key(key.api_key): {
+                    "requests": key.requests,
+                    "characters": key.characters,
+                    "rate_limits": key.rate_limits,
+                    "remaining": key.remaining,
+                    "removed": key.removed is not None,
+                }
+                for key in self.keys
+            }
+
+
+def get_pool(
+    api_keys: Sequence[str], server_url: str | None = None, proxy: str | None = None
+) -> KeyPool:
+    """Process-wide pool of a set of API keys, shared like their clients"""
+    with _clients_lock:
+        key = (tuple(api_keys), server_url, proxy)
+        pool = _pools.get(key)
+    if pool is None:
+        pool = KeyPool(api_keys, server_url, proxy)
+        with _clients_lock:
+            pool = _pools.setdefault(key, pool)
+    return pool
 
 
 class DeeplApi(Translator):
+    """DeepL API translator
+
+    In document mode whole files are sent through the document translation endpoints
+    (upload, poll, download) as plain text with one subtitle per line, instead of one
+    text request per chunk. Per chunk contexts are not used then. DeepL bills a document
+    at least 50000 characters, so shorter files go through text requests, as do the
+    lines of a document that fails or comes back with a different number of lines.
+
+    Several API keys (a list, or comma separated) are pooled: requests are spread over
+    them, and a key running out of quota is left out without failing the job.
+
+    Args:
+        api_key (str | List[str]): DeepL API key, or keys
+        context (str, optional): Context added to every request
+        model_type (str, optional): DeepL model type
+        server_url (str, optional): Alternative API server, like a local stand-in for tests
+        document_mode (bool, optional): Translate whole files as documents. Defaults to False
+        proxy (str, optional): Proxy URL of the requests
+    """
+
     max_char = 1500
+    fatal_errors = (deepl.AuthorizationException, deepl.QuotaExceededException)
+    supports_context = True
 
-    def __init__(self, api_key, context=None, model_type=None):
-        self.translator = deepl.Translator(api_key)
+    def __init__(
+        self,
+        api_key,
+        context=None,
+        model_type=None,
+        server_url=None,
+        document_mode=False,
+        proxy=None,
+    ):
+        api_keys = api_key.split(",") if isinstance(api_key, str) else list(api_key)
+        self.pool = get_pool([key.strip() for key in api_keys if key.strip()], server_url, proxy)
+        # Client of the first key
+        self.translator = self.pool.keys[0].client
         self.context = context
         self.model_type = model_type
         self.logged_model_type = False  # Only log once
+        self.document_mode = document_mode
+        if document_mode:
+            self.max_char = DOCUMENT_MAX_CHAR
+            self.supports_context = False
+            # Whole files go as one document
+            self.adaptive_chunk_size = False
+
+    def check_quota(self, characters: int) -> None:
+        remaining = self.pool.refresh()
+        if remaining is not None and characters > remaining:
+            raise QuotaExceededError(characters, remaining)
+
+    def quit(self) -> None:
+        if len(self.pool.keys) > 1:
+            for key, usage in self.pool.usage().items():
+                LOG.info(
+                    "DeepL API key %s: %s requests, %s characters, %s rate limits",
+                    key,
+                    usage["requests"],
+                    usage["characters"],
+                    usage["rate_limits"],
+                )
 
     def translate_single(
         self,
@@ -35,11 +340,14 @@ class DeeplApi(Translator):
         if self.model_type:
             kwargs["model_type"] = self.model_type
 
-        result = self.translator.translate_text(
-            text,
-            source_lang=source_language,
-            target_lang=destination_language,
-            **kwargs,
+        result = self.pool.run(
+            len(text),
+            lambda client: client.translate_text(
+                text,
+                source_lang=source_language,
+                target_lang=destination_language,
+                **kwargs,
+            ),
         )
 
         # Log which model was actually used (only once)
@@ -55,6 +363,75 @@ class DeeplApi(Translator):
         source_language: str,
         destination_language: str,
         context: str = None,
+    ):
+        if not self.document_mode:
+            return self._translate_text_batch(text, source_language, destination_language, context)
+
+        characters = sum(len(line) for line in text)
+        if characters >= DOCUMENT_MIN_CHAR:
+            try:
+                # Every request of a document goes to the key it was uploaded with
+                return self.pool.run(
+                    characters,
+                    lambda client: self._translate_document(
+                        client, text, source_language, destination_language
+                    ),
+                )
+            except (deepl.DeepLException, ValueError) as exc:
+                LOG.warning("Document translation failed (%s), using text requests", exc)
+
+        # Same requests as without document mode
+        translation = []
+        for portion in _split_lines(text, DeeplApi.max_char):
+            translation.extend(
+                self._translate_text_batch(portion, source_language, destination_language, context)
+            )
+        return translation
+
+    def _translate_document(
+        self,
+        client: deepl.Translator,
+        text: list,
+        source_language: str,
+        destination_language: str,
+    ) -> list:
+        """Translates lines as a plain text document, one line per subtitle
+
+        Raises:
+            deepl.DeepLException: If the document translation fails
+            ValueError: If the translated document has not one line per subtitle
+        """
+        handle = client.translate_document_upload(
+            "\n".join(text).encode("utf-8"),
+            source_lang=None if source_language == "auto" else source_language,
+            target_lang=destination_language,
+            filename="subtitles.txt",
+        )
+
+        status = client.translate_document_get_status(handle)
+        while status.ok and not status.done:
+            time.sleep(DOCUMENT_POLL_INTERVAL)
+            status = client.translate_document_get_status(handle)
+
+        if not status.ok:
+            raise deepl.DocumentTranslationException(
+                f"Document translation failed: {status.error_message}", handle
+            )
+
+        output = io.BytesIO()
+        client.translate_document_download(handle, output, chunk_size=1 << 16)
+        translation = output.getvalue().decode("utf-8-sig").splitlines()
+
+        if len(translation) != len(text):
+            raise ValueError(f"Got {len(translation)} lines back for {len(text)} subtitles")
+        return translation
+
+    def _translate_text_batch(
+        self,
+        text: list,
+        source_language: str,
+        destination_language: str,
+        context: str = None,
     ):
         kwargs = {}
 
@@ -72,11 +449,14 @@ class DeeplApi(Translator):
             kwargs["model_type"] = self.model_type
 
         # DeepL API handles list of strings natively
-        results = self.translator.translate_text(
-            text,
-            source_lang=source_language,
-            target_lang=destination_language,
-            **kwargs,
+        results = self.pool.run(
+            sum(len(line) for line in text),
+            lambda client: client.translate_text(
+                text,
+                source_lang=source_language,
+                target_lang=destination_language,
+                **kwargs,
+            ),
         )
 
         # Log which model was actually used (only once)
@@ -90,3 +470,26 @@ class DeeplApi(Translator):
 
         # results is a list of TextResult objects
         return [r.text for r in results]
+
+
+def document_requests(lines: list) -> int:
+    """Requests sent for a chunk in document mode, one per document (status checks aside)"""
+    if sum(len(line) for line in lines) >= DOCUMENT_MIN_CHAR:
+        return 1
+    return sum(1 for _ in _split_lines(lines, DeeplApi.max_char))
+
+
+def _split_lines(lines: list, max_char: int):
+    """Groups lines in portions of at most max_char characters (a longer line goes alone)"""
+    portion = []
+    n_char = 0
+    for line in lines:
+        if portion and n_char + len(line) + 1 > max_char:
+            yield portion
+            portion = []
+            n_char = 0
+        portion.append(line)
+        n_char += len(line) + 1
+
+    if portion:
+        yield portion
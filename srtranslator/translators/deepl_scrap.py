@@ -9,12 +9,23 @@ from .base import Translator, TimeOutException
 from .selenium_utils import (
     create_proxy,
     create_driver,
+    create_lean_driver,
+    quit_driver,
     TextArea,
     Button,
 )
 
 
 class DeeplTranslator(Translator):
+    """DeepL web translator, driven through Firefox
+
+    Args:
+        driver (WebDriver, optional): Browser to use, a new one is created (and recreated
+            with a new proxy when banned) if not given
+        lean (bool, optional): Create browsers with a lean profile, see
+            selenium_utils.create_lean_driver. Defaults to False
+    """
+
     url = "https://www.deepl.com/translator"
     max_char = 1500
     languages = {
@@ -55,9 +66,10 @@ class DeeplTranslator(Translator):
         "uk": "Ukrainian",
     }
 
-    def __init__(self, driver: Optional[WebDriver] = None):
+    def __init__(self, driver: Optional[WebDriver] = None, lean: bool = False):
         self.last_translation_failed = False
         self.driver = driver
+        self.lean = lean
 
         if self.driver is None:
             self._rotate_proxy()
@@ -88,7 +100,7 @@ class DeeplTranslator(Translator):
             self.quit()
 
         proxy = create_proxy()
-        self.driver = create_driver(proxy)
+        self.driver = create_lean_driver(proxy) if self.lean else create_driver(proxy)
         self._reset()
 
     def _closePopUp(self):
@@ -169,4 +181,4 @@ class DeeplTranslator(Translator):
         raise TimeOutException("Translation timed out")
 
     def quit(self):
-        self.driver.quit()
+        quit_driver(self.driver)
@@ -0,0 +1,237 @@
+import time
+import logging
+import threading
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List
+
+from .base import QuotaExceededError, Translator
+
+LOG = logging.getLogger("srtranslator")
+
+
+class NoBackendAvailableError(Exception):
+    """Every backend failed to translate a chunk"""
+
+
+class CircuitBreaker:
+    """Health of a backend: opens after consecutive failures, lets one try after a cooldown
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the circuit
+        cooldown (float): Seconds the circuit stays open before a trial request
+    """
+
+    def __init__(self, failure_threshold: int, cooldown: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None and time.monotonic() - self.opened_at < self.cooldown
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        # A failed trial after the cooldown opens it again right away
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class FailoverTranslator(Translator):
+    """Translates with an ordered list of backends, hedging slow requests on the next one
+
+    A chunk goes to the first healthy backend. If no answer came within `slo` seconds, the
+    same chunk is also sent to the next backend, and so on, and the first valid answer wins.
+    A backend that fails (or answers with the wrong number of lines) is tried on the next
+    one right away. Backends failing `failure_threshold` times in a row are left aside for
+    `cooldown` seconds.
+
+    A request left behind by a hedge is not interrupted, it finishes in the background and
+    its backend is not used again until then, so a backend never runs two requests at once.
+
+    When every backend tried failed with one of its fatal_errors, like a rejected key, the
+    last of them is raised as it is rather than as NoBackendAvailableError, so it is not
+    retried either.
+
+    Args:
+        backends (List[Translator]): Backends, in order of preference
+        slo (float, optional): Seconds to wait for a backend before hedging. Defaults to 20
+        failure_threshold (int, optional): Consecutive failures that open the circuit of a
+            backend. Defaults to 3
+        cooldown (float, optional): Seconds an open circuit waits before a trial. Defaults to 60
+
+    Raises:
+        ValueError: If there is no backend
+    """
+
+    def __init__(
+        self,
+        backends: List[Translator],
+        slo: float = 20.0,
+        failure_threshold: int = 3,
+        cooldown: float = 60.0,
+    ) -> None:
+        if not backends:
+            raise ValueError("at least one backend is required")
+
+        self.backends = backends
+        self.slo = slo
+        # Chunks must fit every backend
+        self.max_char = min(backend.max_char for backend in backends)
+        self.supports_context = any(backend.supports_context for backend in backends)
+        self.adaptive_chunk_size = all(backend.adaptive_chunk_size for backend in backends)
+        self.fatal_errors = tuple(
+            dict.fromkeys(error for backend in backends for error in backend.fatal_errors)
+        )
+        self.breakers = [CircuitBreaker(failure_threshold, cooldown) for _ in backends]
+        self._busy: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(backends), thread_name_prefix="failover"
+        )
+
+    def translate(
+        self,
+        text,
+        source_language: str,
+        destination_language: str,
+        context: str = None,
+    ):
+        in_flight: Dict[Future, int] = {}
+        tried = set()
+        last_error: Exception | None = None
+        # Whether every backend tried failed with an error retrying can not fix
+        all_fatal = True
+        # When the next backend gets the chunk
+        next_hedge = time.monotonic()
+
+        while True:
+            if time.monotonic() >= next_hedge:
+                index = self._next_backend(tried)
+                if index is not None:
+                    if in_flight:
+                        LOG.info(
+                            "No answer within %ss, hedging on %s",
+                            self.slo,
+                            type(self.backends[index]).__name__,
+                        )
+                    tried.add(index)
+                    future = self._submit(
+                        index, text, source_language, destination_language, context
+                    )
+                    in_flight[future] = index
+                    next_hedge = time.monotonic() + self.slo
+
+            # Untried backends still busy with an abandoned request of a previous chunk
+            with self._lock:
+                busy = [future for index, future in self._busy.items() if index not in tried]
+
+            if not in_flight and not busy:
+                if last_error is not None and all_fatal:
+                    raise last_error
+                raise NoBackendAvailableError(
+                    f"every backend failed, last error: {last_error}"
+                ) from last_error
+
+            timeout = None
+            if time.monotonic() < next_hedge:
+                timeout = next_hedge - time.monotonic()
+            done, _ = wait([*in_flight, *busy], timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future not in in_flight:
+                    continue
+                index = in_flight.pop(future)
+                try:
+                    translation = future.result()
+                    self._check_translation(text, translation)
+                except Exception as exc:
+                    LOG.warning("%s failed: %s", type(self.backends[index]).__name__, exc)
+                    with self._lock:
+                        self.breakers[index].record_failure()
+                    last_error = exc
+                    all_fatal = all_fatal and isinstance(
+                        exc, self.backends[index].fatal_errors
+                    )
+                    # No point waiting for the SLO, the next backend gets it now
+                    next_hedge = time.monotonic()
+                    continue
+
+                with self._lock:
+                    self.breakers[index].record_success()
+                    # Backends still working on this chunk were too slow
+                    for other in in_flight.values():
+                        self.breakers[other].record_failure()
+                return translation
+
+    def _next_backend(self, tried) -> int | None:
+        """First backend not tried yet for this chunk, idle and with a closed circuit"""
+        with self._lock:
+            untried = [index for index in range(len(self.backends)) if index not in tried]
+            for index in untried:
+                if index not in self._busy and not self.breakers[index].is_open:
+                    return index
+            # Every circuit is open: better try an unhealthy backend than fail
+            if all(breaker.is_open for breaker in self.breakers):
+                for index in untried:
+                    if index not in self._busy:
+                        return index
+        return None
+
+    def _submit(self, index, text, source_language, destination_language, context) -> Future:
+        def run():
+            try:
+                return self.backends[index].translate(
+                    text, source_language, destination_language, context=context
+                )
+            finally:
+                with self._lock:
+                    self._busy.pop(index, None)
+
+        with self._lock:
+            future = self._executor.submit(run)
+            self._busy[index] = future
+        return future
+
+    @staticmethod
+    def _check_translation(text, translation) -> None:
+        if isinstance(text, list):
+            lines = translation.splitlines() if isinstance(translation, str) else translation
+            if len(lines) != len(text):
+                raise ValueError(f"got {len(lines)} lines for {len(text)}")
+        elif not translation:
+            raise ValueError("empty translation")
+
+    def translate_single(
+        self,
+        text: str,
+        source_language: str,
+        destination_language: str,
+        context: str = None,
+    ) -> str:
+        return self.translate(text, source_language, destination_language, context)
+
+    def check_quota(self, characters: int) -> None:
+        """Passes if any healthy backend can translate that many characters"""
+        error = None
+        for backend, breaker in zip(self.backends, self.breakers):
+            if breaker.is_open:
+                continue
+            try:
+                backend.check_quota(characters)
+                return
+            except QuotaExceededError as exc:
+                error = exc
+        if error is not None:
+            raise error
+
+    def quit(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for backend in self.backends:
+            backend.quit()
@@ -0,0 +1,96 @@
+import logging
+
+from typing import List
+
+from ..memory import DEFAULT_THRESHOLD, TranslationMemory
+from .base import Translator
+
+LOG = logging.getLogger("srtranslator")
+
+
+class MemoryTranslator(Translator):
+    """Answers cues from a translation memory and sends only the others to a translator
+
+    Lines found in the memory, exactly or at least `threshold` similar, get their stored
+    translation. The rest of the chunk goes to the translator in one request, with the
+    chunk's context, and their translations are added to the memory.
+
+    Args:
+        translator (Translator): Translator of the cues missing from the memory
+        memory (TranslationMemory): Shared memory
+        threshold (float, optional): Least similarity reused, 1 for exact matches only.
+            Defaults to 0.9
+    """
+
+    def __init__(
+        self,
+        translator: Translator,
+        memory: TranslationMemory,
+        threshold: float = DEFAULT_THRESHOLD,
+    ) -> None:
+        self.translator = translator
+        self.memory = memory
+        self.threshold = threshold
+        self.max_char = translator.max_char
+        self.fatal_errors = translator.fatal_errors
+        self.supports_context = translator.supports_context
+        self.adaptive_chunk_size = translator.adaptive_chunk_size
+        self.hits = 0
+        self.misses = 0
+
+    def translate_batch(
+        self,
+        text: List[str],
+        source_language: str,
+        destination_language: str,
+        context: str | None = None,
+    ) -> List[str]:
+        lines: List[str | None] = []
+        missing = []
+        for position, line in enumerate(text):
+            match = self.memory.lookup(line, source_language, destination_language, self.threshold)
+            if match is None:
+                lines.append(None)
+                missing.append(position)
+                continue
+            if match.similarity < 1:
+                LOG.debug("Reused translation of %r for %r", match.source, line)
+            lines.append(match.translation)
+
+        self.hits += len(text) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            sources = [text[position] for position in missing]
+            translated = self.translator.translate_batch(
+                sources, source_language, destination_language, context
+            )
+            if len(translated) != len(sources):
+                raise ValueError(f"Got {len(translated)} translated lines for {len(sources)}")
+            for position, translation in zip(missing, translated):
+                lines[position] = translation
+            self.memory.add(list(zip(sources, translated)), source_language, destination_language)
+
+        return lines
+
+    def translate_single(
+        self,
+        text: str,
+        source_language: str,
+        destination_language: str,
+        context: str = None,
+    ) -> str:
+        return "\n".join(
+            self.translate_batch(text.split("\n"), source_language, destination_language, context)
+        )
+
+    def check_quota(self, characters: int) -> None:
+        self.translator.check_quota(characters)
+
+    def quit(self) -> None:
+        if self.hits:
+            LOG.info(
+                "%s of %s lines found in the translation memory",
+                self.hits,
+                self.hits + self.misses,
+            )
+        self.translator.quit()
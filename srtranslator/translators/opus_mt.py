@@ -0,0 +1,147 @@
+import os
+import logging
+import threading
+
+from typing import Dict, List, Tuple
+
+from .base import Translator
+
+# Cues translated per forward pass
+BATCH_SIZE = 64
+BEAM_SIZE = 2
+
+LOG = logging.getLogger("srtranslator")
+
+_models: Dict[Tuple[str, int, int], tuple] = {}
+_models_lock = threading.Lock()
+
+
+def load_model(model_path: str, inter_threads: int = 1, intra_threads: int = 0) -> tuple:
+    """Process-wide CTranslate2 model of a directory, loaded on first use
+
+    Loading a model takes seconds, so every OpusMT of the process shares it for as long
+    as the process lives: the next files and threads start translating right away.
+    CTranslate2 models can be used from several threads at once.
+
+    Args:
+        model_path (str): Converted model directory with model.bin, source.spm and target.spm
+        inter_threads (int, optional): Batches translated in parallel. Defaults to 1
+        intra_threads (int, optional): Threads per batch, 0 for one per core. Defaults to 0
+
+    Raises:
+        ImportError: If ctranslate2 or sentencepiece are not installed
+
+    Returns:
+        tuple: Model, source tokenizer and target tokenizer
+    """
+    with _models_lock:
+        key = (os.path.abspath(model_path), inter_threads, intra_threads)
+        if key not in _models:
+            try:
+                import ctranslate2
+                import sentencepiece
+            except ImportError as exc:
+                raise ImportError(
+                    "opus-mt needs ctranslate2 and sentencepiece: pip install srtranslator[local]"
+                ) from exc
+
+            LOG.info("Loading %s", model_path)
+            model = ctranslate2.Translator(
+                model_path,
+                device="cpu",
+                compute_type="auto",
+                inter_threads=inter_threads,
+                intra_threads=intra_threads,
+            )
+            source = sentencepiece.SentencePieceProcessor(
+                model_file=os.path.join(model_path, "source.spm")
+            )
+            target = sentencepiece.SentencePieceProcessor(
+                model_file=os.path.join(model_path, "target.spm")
+            )
+            _models[key] = (model, source, target)
+
+        return _models[key]
+
+
+class OpusMT(Translator):
+    """Offline translator running OPUS-MT models converted to CTranslate2, on CPU
+
+    Nothing goes over the network and there is no quota. Cues are not framed into a
+    single text like for web translators: each one is a sentence of a batch, and a whole
+    chunk goes through the model in forward passes of `batch_size` cues. Context is not
+    used, the models translate sentence by sentence.
+
+    Args:
+        model_path (str): A converted model (model.bin, source.spm, target.spm), or a
+            directory with one per language pair named after it, like "en-es"
+        inter_threads (int, optional): Batches translated in parallel. Defaults to 1
+        intra_threads (int, optional): Threads per batch, 0 for one per core. Defaults to 0
+        batch_size (int, optional): Cues per forward pass. Defaults to 64
+        beam_size (int, optional): Beam search width, 1 for greedy. Defaults to 2
+    """
+
+    # No request size limit, bigger chunks only mean fuller batches
+    max_char = 20000
+    fatal_errors = (ImportError, FileNotFoundError)
+
+    def __init__(
+        self,
+        model_path: str,
+        inter_threads: int = 1,
+        intra_threads: int = 0,
+        batch_size: int = BATCH_SIZE,
+        beam_size: int = BEAM_SIZE,
+    ):
+        self.model_path = model_path
+        self.inter_threads = inter_threads
+        self.intra_threads = intra_threads
+        self.batch_size = batch_size
+        self.beam_size = beam_size
+
+    def _model_path(self, source_language: str, destination_language: str) -> str:
+        if os.path.exists(os.path.join(self.model_path, "model.bin")):
+            return self.model_path
+
+        path = os.path.join(self.model_path, f"{source_language}-{destination_language}")
+        if not os.path.exists(os.path.join(path, "model.bin")):
+            raise FileNotFoundError(
+                f"No {source_language}-{destination_language} model in {self.model_path}"
+            )
+        return path
+
+    def translate_batch(
+        self,
+        text: List[str],
+        source_language: str,
+        destination_language: str,
+        context: str = None,
+    ) -> List[str]:
+        model, source, target = load_model(
+            self._model_path(source_language, destination_language),
+            self.inter_threads,
+            self.intra_threads,
+        )
+
+        # Empty cues are not worth a slot in a batch
+        positions = [position for position, line in enumerate(text) if line.strip()]
+        tokens = source.encode([text[position] for position in positions], out_type=str)
+        results = model.translate_batch(
+            tokens, max_batch_size=self.batch_size, beam_size=self.beam_size
+        )
+
+        lines = [""] * len(text)
+        for position, result in zip(positions, results):
+            lines[position] = target.decode(result.hypotheses[0])
+        return lines
+
+    def translate_single(
+        self,
+        text: str,
+        source_language: str,
+        destination_language: str,
+        context: str = None,
+    ) -> str:
+        return "\n".join(
+            self.translate_batch(text.split("\n"), source_language, destination_language)
+        )
@@ -1,10 +1,17 @@
+import os
 import sys
+import json
+import shutil
 import logging
+import itertools
+import threading
 
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 from fp.fp import FreeProxy
 from selenium import webdriver
 from webdriverdownloader import GeckoDriverDownloader
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
@@ -13,6 +20,59 @@ from selenium.common.exceptions import WebDriverException
 from selenium.webdriver import ActionChains, Keys
 from selenium.webdriver.support import expected_conditions as EC
 
+from ..util import cache_dir
+
+# Window size of lean browsers, small but still the desktop layout of deepl.com
+LEAN_VIEWPORT = (1024, 768)
+# Hosts lean browsers may reach, subdomains included, everything else is blocked
+LEAN_ALLOWED_DOMAINS = ("deepl.com",)
+# Nothing listens on the discard port, blocked requests fail right away
+BLACKHOLE_PROXY = "PROXY 127.0.0.1:9"
+
+LEAN_PREFERENCES = {
+    # No images, fonts, media or animations
+    "permissions.default.image": 2,
+    "gfx.downloadable_fonts.enabled": False,
+    "browser.display.use_document_fonts": 0,
+    "media.autoplay.default": 5,
+    "media.peerconnection.enabled": False,
+    "image.animation_mode": "none",
+    "ui.prefersReducedMotion": 1,
+    "toolkit.cosmeticAnimations.enabled": False,
+    # No telemetry, studies, safe browsing lookups or updates
+    "toolkit.telemetry.enabled": False,
+    "toolkit.telemetry.unified": False,
+    "toolkit.telemetry.archive.enabled": False,
+    "datareporting.healthreport.uploadEnabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    "app.shield.optoutstudies.enabled": False,
+    "app.normandy.enabled": False,
+    "browser.ping-centre.telemetry": False,
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+    "app.update.auto": False,
+    "extensions.pocket.enabled": False,
+    # No prefetching or speculative connections
+    "network.prefetch-next": False,
+    "network.dns.disablePrefetch": True,
+    "network.predictor.enabled": False,
+    "network.http.speculative-parallel-limit": 0,
+    # Trackers are blocked on top of the host allow list
+    "privacy.trackingprotection.enabled": True,
+    "network.cookie.cookieBehavior": 1,
+    # Blank start, a single content process, short history
+    "browser.startup.page": 0,
+    "browser.startup.homepage": "about:blank",
+    "browser.newtabpage.enabled": False,
+    "browser.shell.checkDefaultBrowser": False,
+    "dom.ipc.processCount": 1,
+    "browser.sessionhistory.max_entries": 2,
+    "browser.sessionstore.resume_from_crash": False,
+}
+
+_geckodriver_lock = threading.Lock()
+_geckodriver_path: str | None = None
+
 
 def create_proxy(country_id: Optional[List[str]] = ["US"]) -> Proxy:
     """Creates a new proxy to use with a selenium driver and avoid get banned
@@ -68,6 +128,156 @@ def create_driver(proxy: Optional[Proxy] = None) -> WebDriver:
     return driver
 
 
+def geckodriver_path() -> str:
+    """Path of geckodriver, looked up (or installed in the cache directory) once per process
+
+    Returns:
+        str: Executable path
+    """
+    global _geckodriver_path
+    with _geckodriver_lock:
+        if _geckodriver_path is not None:
+            return _geckodriver_path
+
+        cached = os.path.join(cache_dir(), "bin", "geckodriver")
+        if os.access(cached, os.X_OK):
+            path = cached
+        else:
+            path = shutil.which("geckodriver")
+
+        if path is None:
+            logging.info("Installing Firefox GeckoDriver in %s", cache_dir())
+            _, path = GeckoDriverDownloader(
+                download_root=os.path.join(cache_dir(), "geckodriver"),
+                link_path=os.path.join(cache_dir(), "bin"),
+            ).download_and_install()
+
+        _geckodriver_path = path
+        return path
+
+
+def pac_script(proxy_address: str | None = None) -> str:
+    """Proxy auto-config sending allowed hosts direct (or through the proxy), the rest nowhere
+
+    Args:
+        proxy_address (str, optional): host:port of the proxy for allowed hosts
+
+    Returns:
+        str: PAC script
+    """
+    route = f"PROXY {proxy_address}" if proxy_address else "DIRECT"
+    checks = " || ".join(
+        f'host == "{domain}" || dnsDomainIs(host, ".{domain}")' for domain in LEAN_ALLOWED_DOMAINS
+    )
+    return (
+        "function FindProxyForURL(url, host) {"
+        f' if ({checks}) return "{route}";'
+        f' return "{BLACKHOLE_PROXY}"; }}'
+    )
+
+
+def lean_preferences(proxy: Optional[Proxy] = None) -> Dict[str, object]:
+    """Firefox preferences of a lean browser, third-party hosts blocked through a PAC script
+
+    Args:
+        proxy (Optional[Proxy], optional): Selenium WebDriver proxy. Defaults to None.
+
+    Returns:
+        Dict[str, object]: Preference values
+    """
+    preferences = dict(LEAN_PREFERENCES)
+    preferences["network.proxy.type"] = 2
+    preferences["network.proxy.autoconfig_url"] = "data:text/javascript," + pac_script(
+        proxy.http_proxy if proxy else None
+    )
+    return preferences
+
+
+def claim_profile() -> Tuple[str, int]:
+    """Claims a cached profile directory no other browser is using
+
+    Profiles live in the cache directory and keep their HTTP cache between runs. Each
+    browser running at the same time, in any process, gets its own one.
+
+    Returns:
+        Tuple[str, int]: Profile directory and the file descriptor holding its lock, see
+            release_profile
+    """
+    import fcntl
+
+    for slot in itertools.count():
+        directory = os.path.join(cache_dir(), "firefox-profiles", str(slot))
+        os.makedirs(directory, exist_ok=True)
+        lock = os.open(os.path.join(directory, ".srtranslator.lock"), os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(lock)
+            continue
+        return directory, lock
+
+
+def release_profile(lock: int) -> None:
+    os.close(lock)
+
+
+def write_user_js(directory: str, preferences: Dict[str, object]) -> None:
+    """Writes preferences to the user.js of a profile, Firefox applies them at start"""
+    with open(os.path.join(directory, "user.js"), "w", encoding="utf-8") as user_js:
+        for name, value in preferences.items():
+            user_js.write(f"user_pref({json.dumps(name)}, {json.dumps(value)});\n")
+
+
+def create_lean_driver(proxy: Optional[Proxy] = None) -> WebDriver:
+    """Creates a Firefox selenium webdriver tuned to boot and load deepl.com fast
+
+    Images, fonts, media, animations, telemetry, prefetching and every host outside
+    LEAN_ALLOWED_DOMAINS are off, the window has a fixed small size, and the profile and
+    geckodriver path are cached between browsers. Quit it with quit_driver.
+
+    Args:
+        proxy (Optional[Proxy], optional): Selenium WebDriver proxy. Defaults to None.
+
+    Returns:
+        WebDriver: Selenium WebDriver
+    """
+    logging.info("Creating lean Selenium Webdriver instance")
+    directory, lock = claim_profile()
+    try:
+        write_user_js(directory, lean_preferences(proxy))
+
+        options = FirefoxOptions()
+        options.add_argument("-profile")
+        options.add_argument(directory)
+        options.add_argument(f"--width={LEAN_VIEWPORT[0]}")
+        options.add_argument(f"--height={LEAN_VIEWPORT[1]}")
+
+        # Kept with the profiles rather than in the working directory
+        service = FirefoxService(
+            executable_path=geckodriver_path(),
+            log_path=os.path.join(cache_dir(), "geckodriver.log"),
+        )
+        driver = webdriver.Firefox(options=options, service=service)
+    except BaseException:
+        release_profile(lock)
+        raise
+
+    driver.set_window_size(*LEAN_VIEWPORT)
+    driver.srtranslator_profile_lock = lock
+    return driver
+
+
+def quit_driver(driver: WebDriver) -> None:
+    """Quits a webdriver, and frees its profile if it is a lean one"""
+    try:
+        driver.quit()
+    finally:
+        lock = getattr(driver, "srtranslator_profile_lock", None)
+        if lock is not None:
+            driver.srtranslator_profile_lock = None
+            release_profile(lock)
+
+
 class BaseElement:
     def __init__(
         self,
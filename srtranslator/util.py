@@ -1,16 +1,58 @@
-import sys
-
-
-def show_progress(total: int, progress: int):
-    """Displays or updates a console progress bar"""
-
-    barLength, status = 20, ""
-    progress = float(progress) / float(total)
-    if progress >= 1.0:
-        progress, status = 1, "\r\n"
-    block = int(round(barLength * progress))
-    text = "\r[{}] {:.0f}% {}".format(
-        "#" * block + "-" * (barLength - block), round(progress * 100, 0), status
-    )
-    sys.stdout.write(text)
-    sys.stdout.flush()
+import os
+import mmap
+
+
+def read_text(filepath: str) -> str:
+    """Reads a text file through a memory map
+
+    Decodes as UTF-8 ignoring invalid bytes and translates line endings to \\n, the same
+    way open(filepath, "r", encoding="utf-8", errors="ignore") does.
+
+    Args:
+        filepath (str): File path
+
+    Returns:
+        str: File content
+    """
+    with open(filepath, "rb") as input_file:
+        try:
+            with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                text = str(data, "utf-8", "ignore")
+        except ValueError:
+            # Empty files can not be mapped
+            return ""
+
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def destination_path(filepath: str, destination_language: str) -> str:
+    """Path of the translated file: the source path with the language before the extension
+
+    Args:
+        filepath (str): Source subtitle file path
+        destination_language (str): Destination language
+
+    Returns:
+        str: Translated file path
+    """
+    root, extension = os.path.splitext(filepath)
+    return f"{root}_{destination_language}{extension}"
+
+
+def cache_dir() -> str:
+    """Directory for files kept between runs: $XDG_CACHE_HOME/srtranslator or ~/.cache/srtranslator"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "srtranslator")
+
+
+def format_duration(seconds: float) -> str:
+    """Short duration for humans: 45s, 3m05s, 2h10m"""
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
@@ -0,0 +1,326 @@
+import os
+import json
+import time
+import errno
+import select
+import struct
+import ctypes
+import hashlib
+import logging
+import threading
+import traceback
+import ctypes.util
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from .formats import ASS_EXTENSIONS, SRT_EXTENSIONS
+
+LOG = logging.getLogger("srtranslator")
+
+SUBTITLE_EXTENSIONS = SRT_EXTENSIONS + ASS_EXTENSIONS
+STATE_FILENAME = ".srtranslator-watch.json"
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_subtitle(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in SUBTITLE_EXTENSIONS
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as input_file:
+        for block in iter(lambda: input_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_tree(directory: str) -> Iterable[Tuple[str, os.stat_result]]:
+    """Subtitle files under a directory with their stat, hidden entries are skipped"""
+    stack = [directory]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif is_subtitle(entry.name):
+                try:
+                    yield entry.path, entry.stat()
+                except OSError:
+                    continue
+
+
+class PollingWatcher:
+    """Finds new or changed subtitle files by rescanning the directory tree"""
+
+    def __init__(self, directory: str, interval: float = 1.0) -> None:
+        self.directory = directory
+        self.interval = interval
+        self._seen: Dict[str, Tuple[int, int]] = {}
+
+    def poll(self, timeout: float) -> List[str]:
+        """Paths that appeared or changed since the last call, waits up to timeout"""
+        if self._seen:
+            time.sleep(min(timeout, self.interval))
+
+        changed = []
+        seen = {}
+        for path, stat in scan_tree(self.directory):
+            seen[path] = (stat.st_size, stat.st_mtime_ns)
+            if self._seen.get(path) != seen[path]:
+                changed.append(path)
+
+        self._seen = seen
+        return changed
+
+    def close(self) -> None: ...
+
+
+class InotifyWatcher:
+    """Finds new or changed subtitle files from Linux inotify events, subdirectories included
+
+    Raises:
+        OSError: If inotify is not available
+    """
+
+    def __init__(self, directory: str) -> None:
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError(errno.ENOSYS, "libc not found")
+
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.directory = directory
+        self._directories: Dict[int, str] = {}
+        self._initial = self._add_tree(directory)
+
+    def _add_tree(self, directory: str) -> List[str]:
+        """Watches a directory and its subdirectories, returns the files already in them"""
+        files = []
+        for root, dirs, filenames in os.walk(directory):
+            dirs[:] = [name for name in dirs if not name.startswith(".")]
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                LOG.warning("Can not watch %s: %s", root, os.strerror(ctypes.get_errno()))
+                continue
+            self._directories[wd] = root
+            files.extend(os.path.join(root, name) for name in filenames if is_subtitle(name))
+        return files
+
+    def poll(self, timeout: float) -> List[str]:
+        """Paths with activity since the last call, waits up to timeout"""
+        if self._initial:
+            changed, self._initial = self._initial, []
+            return changed
+
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return []
+
+        changed = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0").decode("utf-8", "ignore")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, look at everything again
+                changed.extend(path for path, _ in scan_tree(self.directory))
+                continue
+
+            if wd not in self._directories or not name or name.startswith("."):
+                continue
+
+            path = os.path.join(self._directories[wd], name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    changed.extend(self._add_tree(path))
+            elif is_subtitle(name):
+                changed.append(path)
+
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class FolderWatcher:
+    """Translates subtitle files as they land in a directory
+
+    A file is picked up once its size and modification time stayed the same for `settle`
+    seconds, so files still being copied are left alone. Files are translated by a bounded
+    pool of workers. The SHA-256 of every translated file and of every file it produced is
+    recorded in a state file, so copies, renames and outputs are never translated again.
+
+    Args:
+        directory (str): Directory to watch, subdirectories included
+        translate_file (Callable[[str], List[str]]): Translates a file, returns the paths
+            of the files it wrote. Called from the worker threads
+        workers (int, optional): Files translated at the same time. Defaults to 2
+        settle (float, optional): Seconds without changes before a file is picked. Defaults to 2
+        state_file (str, optional): Defaults to .srtranslator-watch.json in the directory
+        ignore_suffixes (List[str], optional): File name endings (before the extension) of
+            files to leave alone, like the language suffixes of the outputs
+        use_inotify (bool, optional): Use inotify when available. Defaults to True
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        translate_file: Callable[[str], List[str]],
+        workers: int = 2,
+        settle: float = 2.0,
+        state_file: str | None = None,
+        ignore_suffixes: List[str] | None = None,
+        use_inotify: bool = True,
+    ) -> None:
+        self.directory = os.path.abspath(directory)
+        self.translate_file = translate_file
+        self.workers = workers
+        self.settle = settle
+        self.state_file = state_file or os.path.join(self.directory, STATE_FILENAME)
+        self.ignore_suffixes = tuple(ignore_suffixes or ())
+        self.use_inotify = use_inotify
+
+        self._lock = threading.Lock()
+        # Hashes of translated files and of their outputs
+        self.state: Dict[str, Dict] = self._load_state()
+        self._in_flight = set()
+        # Candidate files: path -> (size, mtime) and when it was last seen changing
+        self._pending: Dict[str, Tuple[Tuple[int, int], float]] = {}
+        self._slots = threading.BoundedSemaphore(workers)
+
+    def _load_state(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.state_file):
+            return {}
+        with open(self.state_file, "r", encoding="utf-8") as state_in:
+            return json.load(state_in)
+
+    def _save_state(self) -> None:
+        temporary = f"{self.state_file}.tmp"
+        with open(temporary, "w", encoding="utf-8") as state_out:
+            json.dump(self.state, state_out, indent=1)
+        os.replace(temporary, self.state_file)
+
+    def _make_watcher(self):
+        if self.use_inotify:
+            try:
+                return InotifyWatcher(self.directory)
+            except OSError as exc:
+                LOG.info("inotify unavailable (%s), polling %s", exc, self.directory)
+        return PollingWatcher(self.directory, interval=max(self.settle / 2, 0.1))
+
+    def run(self, stop: threading.Event | None = None) -> None:
+        """Watches the directory until stop is set (or forever), then waits for the workers
+
+        Args:
+            stop (threading.Event, optional): Set it to stop watching
+        """
+        stop = stop or threading.Event()
+        watcher = self._make_watcher()
+        print(f"Watching {self.directory} with {type(watcher).__name__}")
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                while not stop.is_set():
+                    for path in watcher.poll(timeout=max(self.settle / 2, 0.05)):
+                        if not self._is_ignored(path):
+                            self._pending[path] = ((-1, -1), time.monotonic())
+
+                    for path in self._ready_files():
+                        self._dispatch(executor, path)
+        finally:
+            watcher.close()
+
+    def _is_ignored(self, path: str) -> bool:
+        name = os.path.splitext(os.path.basename(path))[0]
+        return name.endswith(self.ignore_suffixes)
+
+    def _ready_files(self) -> List[str]:
+        """Pending files that did not change for settle seconds"""
+        now = time.monotonic()
+        ready = []
+
+        for path, (signature, since) in list(self._pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Moved away or deleted before settling
+                del self._pending[path]
+                continue
+
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != signature:
+                self._pending[path] = (current, now)
+            elif now - since >= self.settle:
+                del self._pending[path]
+                ready.append(path)
+
+        return ready
+
+    def _dispatch(self, executor: ThreadPoolExecutor, path: str) -> None:
+        try:
+            digest = file_hash(path)
+        except OSError:
+            return
+
+        with self._lock:
+            if digest in self.state or digest in self._in_flight:
+                LOG.info("Skipping %s, already translated", path)
+                return
+            self._in_flight.add(digest)
+
+        # Waits for a free worker, files left pending meanwhile are picked up next round
+        self._slots.acquire()
+        executor.submit(self._translate, path, digest)
+
+    def _translate(self, path: str, digest: str) -> None:
+        try:
+            outputs = self.translate_file(path)
+        except Exception:
+            LOG.error("Translation of %s failed", path)
+            LOG.debug(traceback.format_exc())
+            return
+        else:
+            output_hashes = {output: file_hash(output) for output in outputs}
+            with self._lock:
+                self.state[digest] = {"source": path, "outputs": list(output_hashes)}
+                for output, output_digest in output_hashes.items():
+                    # An output identical to a source keeps the source entry
+                    self.state.setdefault(output_digest, {"output_of": digest, "path": output})
+                self._save_state()
+        finally:
+            with self._lock:
+                self._in_flight.discard(digest)
+            self._slots.release()
@@ -0,0 +1,17 @@
+import pytest
+
+from srtranslator.chunking import CHUNK_SIZES
+from srtranslator.metrics import METRICS
+
+
+@pytest.fixture(autouse=True)
+def metrics(tmp_path, monkeypatch):
+    """Latencies and chunk sizes of real runs must not change tests, nor tests write them"""
+    filepath = str(tmp_path / "metrics.json")
+    monkeypatch.setenv("SRTRANSLATOR_METRICS", filepath)
+    monkeypatch.setattr(METRICS, "filepath", filepath)
+    monkeypatch.setattr(METRICS, "backends", {})
+    monkeypatch.setattr(METRICS, "_dirty", False)
+    monkeypatch.setattr(CHUNK_SIZES, "latencies", METRICS)
+    monkeypatch.setattr(CHUNK_SIZES, "_states", {})
+    return METRICS
@@ -0,0 +1,131 @@
+import textwrap
+
+from srtranslator.ass_file import AssFile
+from srtranslator.translators.base import Translator
+
+HEADER = """
+[Script Info]
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,20,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,2,2,2,10,10,10,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+class UpperTranslator(Translator):
+    max_char = 50
+
+    def __init__(self):
+        self.requests = []
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        self.requests.append(text)
+        return text.upper()
+
+
+def write_sample_ass(tmp_path, events: str):
+    path = tmp_path / "sample.ass"
+    content = textwrap.dedent(HEADER).strip() + "\n" + textwrap.dedent(events).strip() + "\n"
+    path.write_text(content, encoding="utf-8")
+    return path
+
+
+def test_styles_are_restored_per_event(tmp_path):
+    path = write_sample_ass(
+        tmp_path,
+        r"""
+        Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,{\an8}Hello {\i1}world{\i0}
+        Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,{\k20}Ka{\k30}ra{\k40}oke
+        Dialogue: 0,0:00:02.00,0:00:03.00,Default,,0,0,0,,Plain line
+        """,
+    )
+    ass_file = AssFile(str(path), progress_callback=lambda *args, **kwargs: None)
+
+    ass_file.translate(UpperTranslator(), "en", "es")
+
+    assert [event.text for event in ass_file.subtitles.events] == [
+        r"{\an8}HELLO {\i1}WORLD{\i0}",
+        r"{\k20}KA{\k30}RA{\k40}OKE",
+        "PLAIN LINE",
+    ]
+    assert ass_file.text_styles == {}
+
+
+def test_styles_restore_out_of_order(tmp_path):
+    path = write_sample_ass(
+        tmp_path,
+        r"""
+        Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,{\b1}First{\b0}
+        Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,{\pos(10,10)}Second
+        """,
+    )
+    ass_file = AssFile(str(path), progress_callback=lambda *args, **kwargs: None)
+    chunks = list(ass_file._get_next_chunk(chunk_size=5))
+
+    assert chunks == [[0], [1]]
+    assert [event.text for event in ass_file.subtitles.events] == ["|First|", "|Second"]
+    # Second chunk completes first, and its translator dropped the placeholder
+    assert ass_file._restore_styles(1, "Segundo") == r"Segundo{\pos(10,10)}"
+    assert ass_file._restore_styles(0, "|Primero|") == r"{\b1}Primero{\b0}"
+
+
+def test_only_dialogue_is_translated(tmp_path):
+    path = write_sample_ass(
+        tmp_path,
+        r"""
+        Comment: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,Timing note
+        Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,{\p1}m 0 0 l 100 0 100 100{\p0}
+        Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,{\k20}{\k30}
+        Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,
+        Dialogue: 1,0:00:00.00,0:00:01.00,Default,,0,0,0,,{\bord5\blur3}Glowing line
+        Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,{\bord0}Glowing line
+        Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,Glowing line
+        """,
+    )
+    ass_file = AssFile(str(path), progress_callback=lambda *args, **kwargs: None)
+    translator = UpperTranslator()
+
+    ass_file.translate(translator, "en", "es")
+    ass_file.wrap_lines()
+
+    # One request with one line per distinct dialogue line
+    assert translator.requests == ["[[0]] |Glowing line\n[[1]] Glowing line"]
+    assert [event.text for event in ass_file.subtitles.events] == [
+        "Timing note",
+        r"{\p1}m 0 0 l 100 0 100 100{\p0}",
+        r"{\k20}{\k30}",
+        "",
+        r"{\bord5\blur3}GLOWING LINE",
+        r"{\bord0}GLOWING LINE",
+        "GLOWING LINE",
+    ]
+
+
+def test_translate_languages_keeps_source_untouched(tmp_path):
+    path = write_sample_ass(
+        tmp_path,
+        r"""
+        Dialogue: 1,0:00:00.00,0:00:01.00,Default,,0,0,0,,{\bord5}Glow\Nline
+        Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,{\bord0}Glow\Nline
+        Dialogue: 0,0:00:03.00,0:00:04.00,Default,,0,0,0,,Other
+        """,
+    )
+    ass_file = AssFile(str(path), progress_callback=lambda *args, **kwargs: None)
+
+    translated = ass_file.translate_languages(UpperTranslator, "en", ["es", "fr"])
+
+    for language in ("es", "fr"):
+        assert [event.text for event in translated[language].subtitles.events] == [
+            r"{\bord5}GLOW\NLINE",
+            r"{\bord0}GLOW\NLINE",
+            "OTHER",
+        ]
+    assert [event.text for event in ass_file.subtitles.events] == [
+        "|Glow////line",
+        "|Glow////line",
+        "Other",
+    ]
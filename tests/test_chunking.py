@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+import srt
+
+from srtranslator.chunking import ChunkSizeController, split_chunk
+from srtranslator.metrics import LatencyStore
+from srtranslator.retry import RetryPolicy
+from srtranslator.srt_file import SrtFile
+from srtranslator.translators.base import QuotaExceededError, Translator
+
+
+class TimedTranslator(Translator):
+    """Answers at once, seconds per request follow a latency curve of the chunk size"""
+
+    max_char = 1e10
+
+    def __init__(self, seconds=lambda characters: 1.0, fail_over=None):
+        self.seconds = seconds
+        self.fail_over = fail_over
+        self.requests = []
+
+    def translate_batch(self, text, source_language, destination_language, context=None):
+        characters = sum(len(line) for line in text)
+        self.requests.append(characters)
+        if self.fail_over is not None and characters > self.fail_over:
+            raise TimeoutError("request timed out")
+        return list(text)
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        return text
+
+
+def run(controller, translator, requests):
+    for _ in range(requests):
+        size = controller.size(translator, "en", "es")
+        controller.record(translator, "en", "es", size, translator.seconds(size))
+    return controller.size(translator, "en", "es")
+
+
+def test_split_chunk_follows_the_size_of_the_moment():
+    sizes = iter([10, 100])
+
+    parts = list(split_chunk([4, 4, 4, 20, 4], lambda: next(sizes)))
+
+    # 5 then 10 characters fill the first part, a line longer than the size goes alone
+    assert parts == [slice(0, 1), slice(1, 5)]
+    assert list(split_chunk([30, 4], lambda: 10)) == [slice(0, 1), slice(1, 2)]
+
+
+def test_sizes_converge_on_the_lowest_latency_per_character(tmp_path):
+    controller = ChunkSizeController(LatencyStore(str(tmp_path / "metrics.json")))
+    # Two seconds per request plus a slowdown past 12000 characters: best around 12000
+    translator = TimedTranslator(lambda n: 2 + n / 4000 + max(0, n - 12000) ** 2 / 1e7)
+
+    size = run(controller, translator, 300)
+
+    assert 8000 <= size <= 16000
+    # Converged, it does not move anymore
+    assert run(controller, translator, 30) == size
+
+
+def test_failures_halve_the_size_and_cap_it(tmp_path):
+    controller = ChunkSizeController(LatencyStore(str(tmp_path / "metrics.json")))
+    translator = TimedTranslator(lambda n: 1.0)
+
+    controller.record_failure(translator, "en", "es", 4500, TimeoutError())
+    assert controller.size(translator, "en", "es") == 2250
+    # Bigger chunks are always faster, but not tried up to the size that failed
+    assert 3000 < run(controller, translator, 30) < 4500
+
+    controller.record_failure(translator, "en", "es", 4500, QuotaExceededError(10, 0))
+    assert controller.size(translator, "en", "es") > 3000
+    # A short chunk failing says nothing about the size
+    controller.record_failure(translator, "en", "es", 100, TimeoutError())
+    assert controller.size(translator, "en", "es") > 3000
+    # Other pairs are sized on their own
+    assert controller.size(translator, "en", "ja") == 4500
+
+
+def test_sizes_are_kept_across_runs(tmp_path):
+    latencies = LatencyStore(str(tmp_path / "metrics.json"))
+    controller = ChunkSizeController(latencies)
+    translator = TimedTranslator()
+    controller.record_failure(translator, "en", "es", 4500, TimeoutError())
+    latencies.save()
+
+    reloaded = ChunkSizeController(LatencyStore(str(tmp_path / "metrics.json")))
+    assert reloaded.size(translator, "en", "es") == 2250
+
+
+def test_chunks_left_shrink_after_a_timeout(tmp_path):
+    subtitles = [
+        srt.Subtitle(index + 1, timedelta(seconds=index), timedelta(seconds=index + 0.5), "x" * 99)
+        for index in range(60)
+    ]
+    path = tmp_path / "movie.srt"
+    path.write_text(srt.compose(subtitles), encoding="utf-8")
+    sub = SrtFile(str(path), progress_callback=lambda *args, **kwargs: None)
+    translator = TimedTranslator(fail_over=3000)
+
+    sub.translate(translator, "en", "es", retry_policy=RetryPolicy(sleep=lambda seconds: None))
+
+    # The file was planned in chunks of 4500 characters, the first one timed out, waited
+    # for its retry while the second one went on, then went again in parts of half its size
+    assert translator.requests == [4158, 1782, 1881, 1881, 396]
+    assert [subtitle.content for subtitle in sub.subtitles] == ["x" * 99] * 60
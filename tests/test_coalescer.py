@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from srtranslator.translators.base import Translator
+from srtranslator.translators.coalescer import RequestCoalescer
+
+
+class RecordingTranslator(Translator):
+    max_char = 120
+
+    def __init__(self, error=None):
+        self.requests = []
+        self.error = error
+
+    def translate_batch(self, text, source_language, destination_language, context=None):
+        self.requests.append((list(text), context))
+        if self.error:
+            raise self.error
+        return [f"{destination_language}:{line}" for line in text]
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        return self.translate_batch([text], source_language, destination_language, context)[0]
+
+
+def run_jobs(coalescer, jobs):
+    """Translates each (lines, language, context) from its own client and thread"""
+    results = [None] * len(jobs)
+    start = threading.Barrier(len(jobs))
+
+    def job(position, lines, language, context):
+        client = coalescer.client()
+        start.wait()
+        try:
+            results[position] = client.translate(lines, "en", language, context=context)
+        except Exception as exc:
+            results[position] = exc
+
+    threads = [threading.Thread(target=job, args=(n, *spec)) for n, spec in enumerate(jobs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_small_chunks_of_concurrent_jobs_share_a_request():
+    translator = RecordingTranslator()
+    coalescer = RequestCoalescer(translator, window=0.5)
+
+    results = run_jobs(coalescer, [([f"line {n}", "bye"], "es", None) for n in range(4)])
+
+    assert results == [[f"es:line {n}", "es:bye"] for n in range(4)]
+    assert len(translator.requests) == 1
+    assert sorted(translator.requests[0][0]) == sorted(
+        line for n in range(4) for line in [f"line {n}", "bye"]
+    )
+
+
+def test_languages_and_contexts_are_not_mixed():
+    translator = RecordingTranslator()
+    coalescer = RequestCoalescer(translator, window=0.2)
+
+    results = run_jobs(
+        coalescer,
+        [(["hi"], "es", None), (["hi"], "fr", None), (["hi"], "es", "A film"), (["yo"], "es", None)],
+    )
+
+    assert results == [["es:hi"], ["fr:hi"], ["es:hi"], ["es:yo"]]
+    assert len(translator.requests) == 3
+    assert (["hi"], "A film") in translator.requests
+
+
+def test_full_batches_do_not_wait():
+    translator = RecordingTranslator()
+    # The window would time out the test, full requests go out right away
+    coalescer = RequestCoalescer(translator, window=60)
+
+    # 60 characters each with their markers
+    results = run_jobs(coalescer, [(["x" * 53], "es", None), (["y" * 53], "es", None)])
+    assert results == [["es:" + "x" * 53], ["es:" + "y" * 53]]
+    assert len(translator.requests) == 1
+
+    assert coalescer.client().translate(["z" * 125], "en", "es") == ["es:" + "z" * 125]
+
+
+def test_errors_reach_every_owner():
+    coalescer = RequestCoalescer(RecordingTranslator(error=RuntimeError("502")), window=0.2)
+
+    results = run_jobs(coalescer, [(["a"], "es", None), (["b"], "es", None)])
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    with pytest.raises(RuntimeError):
+        coalescer.client().translate(["c"], "en", "es")
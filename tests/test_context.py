@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+import pytest
+import srt
+
+from srtranslator.context import ContextBudget, ContextPolicy, parse_budgets
+from srtranslator.metrics import LatencyStore
+from srtranslator.srt_file import SrtFile
+from srtranslator.translators.base import Translator
+
+
+class EchoTranslator(Translator):
+    max_char = 32
+
+    def __init__(self, supports_context):
+        self.supports_context = supports_context
+        self.contexts = []
+
+    def translate_batch(self, text, source_language, destination_language, context=None):
+        self.contexts.append(context)
+        return list(text)
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        return text
+
+
+@pytest.fixture
+def srt_file(tmp_path):
+    subtitles = [
+        srt.Subtitle(index + 1, timedelta(seconds=index), timedelta(seconds=index + 0.5), line)
+        for index, line in enumerate(["First line", "Second line", "Third line", "Fourth"])
+    ]
+    path = tmp_path / "sample.srt"
+    path.write_text(srt.compose(subtitles), encoding="utf-8")
+    return SrtFile(str(path), progress_callback=lambda *args, **kwargs: None)
+
+
+def test_no_context_is_built_for_translators_without_it(srt_file, monkeypatch):
+    def build_context(*args, **kwargs):
+        raise AssertionError("no context should be built")
+
+    monkeypatch.setattr(srt_file, "_build_deepl_context", build_context)
+    translator = EchoTranslator(supports_context=False)
+
+    srt_file.translate(translator, "en", "es")
+
+    assert translator.contexts == [None, None, None]
+
+
+def test_contexts_are_sent_to_translators_using_them(srt_file):
+    translator = EchoTranslator(supports_context=True)
+
+    srt_file.translate(translator, "en", "es")
+
+    assert translator.contexts == [
+        "Second line Third line Fourth",
+        "First line Third line Fourth",
+        "First line Second line",
+    ]
+
+
+def test_budget_shrinks_when_context_slows_requests_down(tmp_path):
+    latencies = LatencyStore(str(tmp_path / "metrics.json"))
+    for _ in range(5):
+        latencies.record("DeeplApi", 500, 1.0, pair="en-es")
+        # One more second for 2000 characters of context
+        latencies.record("DeeplApi", 500, 2.0, pair="en-es", context_characters=2000)
+        latencies.record("DeeplApi", 500, 1.0, pair="en-ja", context_characters=2000)
+    latencies.record_mismatch("DeeplApi", "en-es", with_context=True)
+
+    policy = ContextPolicy(latencies=latencies, max_context_seconds=0.5)
+    translator = EchoTranslator(supports_context=True)
+    assert policy.adapted("DeeplApi", "en-es", ContextBudget()) == ContextBudget(666, 333)
+    # Not enough requests without context to compare with
+    assert policy.adapted("DeeplApi", "en-ja", ContextBudget()) == ContextBudget()
+    assert latencies.pair_stats("DeeplApi", "en-es")["context"]["mismatches"] == 1
+
+    policy.budgets["en-es"] = ContextBudget(100, 0)
+    assert policy.budget(translator, "en", "es") == ContextBudget(100, 0)
+    assert policy.budget(EchoTranslator(supports_context=False), "en", "es") is None
+
+
+def test_short_chunks_get_less_context():
+    budget = ContextBudget(2000, 1000)
+
+    assert budget.for_chunk(1500) == budget
+    assert budget.for_chunk(200) == ContextBudget(533, 266)
+    assert budget.for_chunk(10) == ContextBudget(200, 100)
+
+
+def test_budgets_are_parsed_per_pair():
+    assert parse_budgets("1500:500, en-ja=3000:1500") == {
+        "*": ContextBudget(1500, 500),
+        "en-ja": ContextBudget(3000, 1500),
+    }
+    with pytest.raises(ValueError):
+        parse_budgets("en-ja=3000")
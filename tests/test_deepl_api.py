@@ -0,0 +1,270 @@
+import json
+import threading
+import types
+from datetime import timedelta
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import deepl
+import pytest
+import srt
+
+from srtranslator.__main__ import BUILTIN_TRANSLATORS, EXIT_DEFERRED, main
+from srtranslator.srt_file import SrtFile
+from srtranslator.translators.base import QuotaExceededError
+from srtranslator.translators import deepl_api
+from srtranslator.translators.deepl_api import DeeplApi
+
+SRT_CONTENT = "1\n00:00:00,000 --> 00:00:01,000\nHello there\n\n2\n00:00:01,000 --> 00:00:02,000\nWorld\n"
+
+
+@pytest.fixture
+def usage(monkeypatch):
+    """Account usage returned by get_usage, and no translation request allowed"""
+    usage = {"character_count": 0, "character_limit": 500000}
+    monkeypatch.setattr(deepl.Translator, "get_usage", lambda self: deepl.Usage(usage))
+
+    def translate_text(self, *args, **kwargs):
+        raise AssertionError("nothing should be translated")
+
+    monkeypatch.setattr(deepl.Translator, "translate_text", translate_text)
+    return usage
+
+
+def test_clients_are_shared_per_key():
+    first = DeeplApi("shared-key:fx")
+    second = DeeplApi("shared-key:fx", context="Film")
+
+    assert first.translator is second.translator
+    assert DeeplApi("other-key:fx").translator is not first.translator
+    proxied = DeeplApi("shared-key:fx", proxy="http://127.0.0.1:3128")
+    assert proxied.translator is not first.translator
+
+
+def test_quota_is_checked_before_translating(tmp_path, usage):
+    path = tmp_path / "sample.srt"
+    path.write_text(SRT_CONTENT, encoding="utf-8")
+    usage["character_count"] = usage["character_limit"] - 10
+
+    srt_file = SrtFile(str(path))
+    with pytest.raises(QuotaExceededError, match="16 characters to translate, 10 left"):
+        srt_file.translate(DeeplApi("quota-key:fx"), "en", "es")
+
+
+def test_cli_defers_jobs_without_quota(tmp_path, usage):
+    path = tmp_path / "sample.srt"
+    path.write_text(SRT_CONTENT, encoding="utf-8")
+    usage["character_count"] = usage["character_limit"]
+
+    assert main([str(path), "-t", "deepl-api", "--auth", "quota-key:fx"]) == EXIT_DEFERRED
+    assert main([str(path), "-t", "deepl-api", "--auth", "quota-key:fx", "-o", "es,fr"]) == EXIT_DEFERRED
+    assert sorted(file.name for file in tmp_path.iterdir()) == ["sample.srt"]
+
+
+class StandInDeepL(BaseHTTPRequestHandler):
+    """Just enough of the DeepL API: documents and text, translated to upper case"""
+
+    documents = {}
+    requests = []
+    merge_lines = False
+
+    def do_GET(self):
+        self._reply({"character_count": 0, "character_limit": 500000})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.requests.append(self.path)
+
+        if self.path == "/v2/document":
+            message = BytesParser().parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+            )
+            upload = next(part for part in message.walk() if part.get_filename())
+            text = upload.get_payload(decode=True).decode("utf-8")
+            if self.merge_lines:
+                text = text.replace("\n", " ", 1)
+            document_id = str(len(self.documents))
+            self.documents[document_id] = text.upper()
+            self._reply({"document_id": document_id, "document_key": "key"})
+        elif self.path.endswith("/result"):
+            data = self.documents[self.path.split("/")[3]].encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif self.path.startswith("/v2/document/"):
+            self._reply({"document_id": self.path.split("/")[3], "status": "done"})
+        elif self.path == "/v2/translate":
+            texts = json.loads(body)["text"]
+            self._reply(
+                {"translations": [{"text": t.upper(), "detected_source_language": "EN", "billed_characters": len(t)} for t in texts]}
+            )
+
+    def _reply(self, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def deepl_server():
+    StandInDeepL.documents = {}
+    StandInDeepL.requests = []
+    StandInDeepL.merge_lines = False
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInDeepL)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def write_long_srt(tmp_path):
+    subtitles = [
+        srt.Subtitle(i + 1, timedelta(seconds=i), timedelta(seconds=i + 1), f"Line number {i}")
+        for i in range(300)
+    ]
+    path = tmp_path / "long.srt"
+    path.write_text(srt.compose(subtitles), encoding="utf-8")
+    return path
+
+
+def test_document_mode_translates_the_file_in_one_job(tmp_path, deepl_server, monkeypatch):
+    monkeypatch.setattr(deepl_api, "DOCUMENT_MIN_CHAR", 1000)
+    srt_file = SrtFile(str(write_long_srt(tmp_path)), progress_callback=lambda *a, **k: None)
+
+    srt_file.translate(DeeplApi("doc-key", server_url=deepl_server, document_mode=True), "en", "es")
+
+    assert [sub.content for sub in srt_file.subtitles[:2]] == ["LINE NUMBER 0", "LINE NUMBER 1"]
+    assert StandInDeepL.requests == ["/v2/document", "/v2/document/0", "/v2/document/0/result"]
+
+
+def test_cli_document_mode_sends_one_document_per_file(tmp_path, deepl_server, monkeypatch):
+    monkeypatch.setattr(deepl_api, "DOCUMENT_MIN_CHAR", 1000)
+
+    class StandInDeeplApi(DeeplApi):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, server_url=deepl_server, **kwargs)
+
+    monkeypatch.setitem(BUILTIN_TRANSLATORS, "deepl-api", StandInDeeplApi)
+    first = write_long_srt(tmp_path).rename(tmp_path / "first.srt")
+    second = write_long_srt(tmp_path).rename(tmp_path / "second.srt")
+
+    argv = [str(first), str(second), "-t", "deepl-api", "--auth", "doc-key"]
+    assert main(argv + ["--document", "--processes", "1"]) == 0
+
+    assert StandInDeepL.requests.count("/v2/document") == 2
+    assert "/v2/translate" not in StandInDeepL.requests
+    assert "LINE NUMBER 299" in (tmp_path / "second_es.srt").read_text(encoding="utf-8")
+
+
+def test_document_mode_falls_back_to_text_requests(tmp_path, deepl_server, monkeypatch):
+    monkeypatch.setattr(deepl_api, "DOCUMENT_MIN_CHAR", 1000)
+    StandInDeepL.merge_lines = True
+    srt_file = SrtFile(str(write_long_srt(tmp_path)), progress_callback=lambda *a, **k: None)
+
+    srt_file.translate(DeeplApi("doc-key", server_url=deepl_server, document_mode=True), "en", "es")
+
+    assert [sub.content for sub in srt_file.subtitles[:2]] == ["LINE NUMBER 0", "LINE NUMBER 1"]
+    assert srt_file.subtitles[-1].content == "LINE NUMBER 299"
+    # The file is over 1500 characters, so several text requests
+    assert StandInDeepL.requests.count("/v2/translate") > 1
+
+
+def test_document_mode_sends_short_files_as_text(tmp_path, deepl_server):
+    srt_file = SrtFile(str(write_long_srt(tmp_path)), progress_callback=lambda *a, **k: None)
+
+    srt_file.translate(DeeplApi("doc-key", server_url=deepl_server, document_mode=True), "en", "es")
+
+    # Billed 50000 characters as a document, much less as text
+    assert "/v2/document" not in StandInDeepL.requests
+    assert srt_file.subtitles[-1].content == "LINE NUMBER 299"
+    lines = [f"Line number {i}" for i in range(300)]
+    assert deepl_api.document_requests(lines) == StandInDeepL.requests.count("/v2/translate")
+    assert deepl_api.document_requests(lines * 20) == 1
+
+
+class FakeClient:
+    """DeepL client of one key, failing with the scripted errors first"""
+
+    def __init__(self, limit, errors=()):
+        self.limit = limit
+        self.count = 0
+        self.errors = list(errors)
+        self.requests = []
+
+    def get_usage(self):
+        usage = types.SimpleNamespace(valid=True, limit=self.limit, count=self.count)
+        return types.SimpleNamespace(character=usage)
+
+    def translate_text(self, text, source_lang, target_lang, **kwargs):
+        self.requests.append(text)
+        if self.errors:
+            raise self.errors.pop(0)
+        return [types.SimpleNamespace(text=line.upper()) for line in text]
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    clients = {}
+    monkeypatch.setattr(deepl_api, "_pools", {})
+    monkeypatch.setattr(deepl_api, "get_client", lambda api_key, *args: clients[api_key])
+    return clients
+
+
+def test_requests_are_spread_by_quota_left(clients):
+    clients["first"] = FakeClient(1000)
+    clients["second"] = FakeClient(1200)
+    translator = DeeplApi("first, second")
+
+    translator.check_quota(2200)
+    for _ in range(4):
+        translator.translate(["x" * 100], "en", "es")
+
+    assert len(clients["first"].requests) == 1
+    assert len(clients["second"].requests) == 3
+    with pytest.raises(QuotaExceededError, match="2201 characters to translate, 2200 left"):
+        translator.check_quota(2201)
+    assert translator.pool.usage()["firs..."]["characters"] == 100
+
+
+def test_exhausted_keys_are_left_out(clients):
+    clients["first"] = FakeClient(1000, [deepl.QuotaExceededException("456")])
+    clients["second"] = FakeClient(1000)
+    translator = DeeplApi(["first", "second"])
+
+    assert translator.translate(["hello"], "en", "es") == ["HELLO"]
+    assert translator.translate(["again"], "en", "es") == ["AGAIN"]
+    assert clients["first"].requests == [["hello"]]
+    assert translator.pool.usage()["firs..."]["removed"]
+
+    clients["second"].errors = [deepl.QuotaExceededException("456")]
+    with pytest.raises(deepl.QuotaExceededException):
+        translator.translate(["last"], "en", "es")
+
+
+def test_rate_limited_keys_rest(clients):
+    clients["first"] = FakeClient(1000, [deepl.TooManyRequestsException("429")])
+    clients["second"] = FakeClient(500, [deepl.TooManyRequestsException("429")])
+    now = [0.0]
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        now[0] += seconds
+
+    pool = deepl_api.KeyPool(["first", "second"], clock=lambda: now[0], sleep=sleep)
+    pool.refresh()
+    lines = pool.run(5, lambda client: client.translate_text(["hello"], "en", "es"))
+
+    # The first key then the second one were limited, the first one took the request
+    # once it had rested a second
+    assert [line.text for line in lines] == ["HELLO"]
+    assert waits == [1.0]
+    assert len(clients["first"].requests) == 2
+    assert pool.usage()["seco..."]["rate_limits"] == 1
@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+
+from srtranslator.retry import RetryPolicy
+from srtranslator.srt_file import SrtFile
+from srtranslator.translators.base import Translator
+from srtranslator.translators.failover import FailoverTranslator, NoBackendAvailableError
+
+
+class FakeBackend(Translator):
+    max_char = 1500
+
+    def __init__(self, name, delay=0.0, fail=False, max_char=None):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.quit_called = False
+        if max_char:
+            self.max_char = max_char
+
+    def translate_batch(self, text, source_language, destination_language, context=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} is down")
+        return [f"{self.name}:{line}" for line in text]
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        return self.translate_batch([text], source_language, destination_language, context)[0]
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_slow_primary_is_hedged():
+    primary = FakeBackend("primary", delay=1.0)
+    secondary = FakeBackend("secondary")
+    translator = FailoverTranslator([primary, secondary], slo=0.1)
+
+    started = time.monotonic()
+    assert translator.translate(["a", "b"], "en", "es") == ["secondary:a", "secondary:b"]
+    assert time.monotonic() - started < 0.8
+    assert primary.calls == 1
+
+    # The primary is still busy with the abandoned request, the next chunk skips it
+    assert translator.translate(["c"], "en", "es") == ["secondary:c"]
+    assert primary.calls == 1
+    translator.quit()
+
+
+def test_failing_backend_is_circuit_broken():
+    primary = FakeBackend("primary", fail=True)
+    secondary = FakeBackend("secondary")
+    translator = FailoverTranslator([primary, secondary], slo=5, failure_threshold=2, cooldown=60)
+
+    for line in ["a", "b", "c"]:
+        assert translator.translate([line], "en", "es") == [f"secondary:{line}"]
+
+    assert primary.calls == 2
+    assert translator.breakers[0].is_open
+
+
+def test_wrong_line_count_fails_over():
+    class Merging(FakeBackend):
+        def translate_batch(self, text, *args, **kwargs):
+            return [" ".join(text)]
+
+    translator = FailoverTranslator([Merging("merging"), FakeBackend("secondary")], slo=5)
+    assert translator.translate(["a", "b"], "en", "es") == ["secondary:a", "secondary:b"]
+
+
+def test_every_backend_failing_raises():
+    translator = FailoverTranslator(
+        [FakeBackend("first", fail=True), FakeBackend("second", fail=True)], slo=5
+    )
+    with pytest.raises(NoBackendAvailableError, match="second is down"):
+        translator.translate(["a"], "en", "es")
+
+
+class AuthError(Exception):
+    pass
+
+
+class RejectingBackend(FakeBackend):
+    fatal_errors = (AuthError,)
+
+    def translate_batch(self, text, source_language, destination_language, context=None):
+        self.calls += 1
+        raise AuthError(f"{self.name} rejected the key")
+
+
+def test_fatal_errors_of_every_backend_are_not_wrapped():
+    first, second = RejectingBackend("first"), RejectingBackend("second")
+    translator = FailoverTranslator([first, second], slo=5)
+    assert translator.fatal_errors == (AuthError,)
+
+    with pytest.raises(AuthError, match="second rejected"):
+        translator.translate(["a"], "en", "es")
+
+    mixed = FailoverTranslator([RejectingBackend("first"), FakeBackend("second", fail=True)], slo=5)
+    with pytest.raises(NoBackendAvailableError):
+        mixed.translate(["a"], "en", "es")
+
+
+def test_fatal_errors_are_not_retried(tmp_path):
+    path = tmp_path / "sample.srt"
+    path.write_text("1\n00:00:00,000 --> 00:00:01,000\nHello\n", encoding="utf-8")
+    first, second = RejectingBackend("first"), RejectingBackend("second")
+    srt_file = SrtFile(str(path), progress_callback=lambda *args, **kwargs: None)
+
+    with pytest.raises(AuthError):
+        srt_file.translate(
+            FailoverTranslator([first, second], slo=5),
+            "en",
+            "es",
+            retry_policy=RetryPolicy(sleep=lambda seconds: None),
+        )
+    assert first.calls == second.calls == 1
+
+
+def test_chunks_fit_every_backend_and_quit_reaches_all():
+    backends = [FakeBackend("first"), FakeBackend("second", max_char=500)]
+    translator = FailoverTranslator(backends)
+    assert translator.max_char == 500
+    assert translator.translate("a", "en", "es") == "first:a"
+
+    translator.quit()
+    assert all(backend.quit_called for backend in backends)
+
+
+def test_concurrent_chunks_share_the_backends():
+    translator = FailoverTranslator([FakeBackend("first", delay=0.05), FakeBackend("second")], slo=5)
+    results = []
+
+    def translate(line):
+        results.append(translator.translate([line], "en", "es")[0])
+
+    threads = [threading.Thread(target=translate, args=(str(index),)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(result.split(":")[1] for result in results) == ["0", "1", "2", "3"]
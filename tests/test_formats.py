@@ -0,0 +1,53 @@
+import textwrap
+
+import pytest
+
+from srtranslator import AssFile, SrtFile, UnsupportedFormatError, load_subtitle
+from srtranslator.formats import detect_format
+
+SRT_CONTENT = """
+1
+00:00:00,000 --> 00:00:01,000
+Hello world
+"""
+
+ASS_CONTENT = """
+[Script Info]
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,20,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,2,2,2,10,10,10,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,Hello world
+"""
+
+
+def write_file(tmp_path, name: str, content: str):
+    path = tmp_path / name
+    path.write_text(textwrap.dedent(content).strip() + "\n", encoding="utf-8")
+    return path
+
+
+def test_detect_format_prefers_content_over_extension():
+    assert detect_format("movie.srt", "\ufeff[Script Info]\n") == "ass"
+    assert detect_format("movie.ass", SRT_CONTENT) == "srt"
+    assert detect_format("movie.ssa", "") == "ass"
+    assert detect_format("movie.txt", SRT_CONTENT) == "srt"
+
+
+def test_detect_format_rejects_unknown_content():
+    with pytest.raises(UnsupportedFormatError):
+        detect_format("notes.txt", "Just some notes")
+
+
+def test_load_subtitle_picks_parser(tmp_path):
+    srt_file = load_subtitle(str(write_file(tmp_path, "sample.srt", SRT_CONTENT)))
+    ass_file = load_subtitle(str(write_file(tmp_path, "sample.ass", ASS_CONTENT)))
+
+    assert isinstance(srt_file, SrtFile)
+    assert srt_file.subtitles[0].content == "Hello world"
+    assert isinstance(ass_file, AssFile)
+    assert ass_file.subtitles.events[0].text == "Hello world"
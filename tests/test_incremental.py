@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+import pytest
+import srt
+
+from srtranslator.incremental import align_cues, translate_incremental
+from srtranslator.srt_file import SrtFile
+from srtranslator.translators.base import Translator
+
+
+class RecordingTranslator(Translator):
+    max_char = 1500
+
+    def __init__(self):
+        self.sent = []
+
+    def translate_batch(self, text, source_language, destination_language, context=None):
+        self.sent.extend(text)
+        return [f"new:{line}" for line in text]
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        return self.translate_batch([text], source_language, destination_language)[0]
+
+
+def write_srt(path, cues):
+    subtitles = [
+        srt.Subtitle(index + 1, timedelta(seconds=start), timedelta(seconds=start + 1), text)
+        for index, (start, text) in enumerate(cues)
+    ]
+    path.write_text(srt.compose(subtitles), encoding="utf-8")
+
+
+def test_alignment_follows_timing_shift_and_edits():
+    old = ["Hello", "How are you?", "Fine", "Yes.", "Bye", "See you"]
+    new = ["Hello", "How are you?", "Fine, thanks", "Yes.", "Bye", "See you"]
+    old_starts = [0, 2, 4, 6, 8, 10]
+    new_starts = [start + 30 for start in old_starts]
+
+    assert align_cues(old, old_starts, new, new_starts) == {0: 0, 1: 1, 3: 3, 4: 4, 5: 5}
+
+
+def test_lone_match_far_from_its_timing_is_not_reused():
+    old = ["A line", "Another line", "Yes.", "Something", "Else here"]
+    new = ["A line", "Another line", "Changed", "Something", "Else here", "Yes."]
+    old_starts = [0, 2, 4, 6, 8]
+    new_starts = [0, 2, 4, 6, 8, 60]
+
+    pairs = align_cues(old, old_starts, new, new_starts)
+    assert 5 not in pairs
+    assert pairs == {0: 0, 1: 1, 3: 3, 4: 4}
+
+
+def test_only_changed_cues_are_translated(tmp_path):
+    old_cues = [(0, "Hello there"), (2, "How are you?"), (4, "I am fine"), (6, "Goodbye")]
+    write_srt(tmp_path / "old.srt", old_cues)
+    write_srt(tmp_path / "old_es.srt", [(start, f"es:{text}") for start, text in old_cues])
+
+    # Re-release: shifted by 10 seconds, one line fixed and one added
+    new_cues = [
+        (10, "Hello there"),
+        (12, "How are you?"),
+        (14, "I'm fine"),
+        (16, "Goodbye"),
+        (18, "See you soon"),
+    ]
+    write_srt(tmp_path / "new.srt", new_cues)
+
+    sub = SrtFile(str(tmp_path / "new.srt"))
+    translator = RecordingTranslator()
+    translate_incremental(
+        sub, translator, "en", "es", str(tmp_path / "old.srt"), str(tmp_path / "old_es.srt")
+    )
+
+    assert translator.sent == ["I'm fine", "See you soon"]
+    assert [subtitle.content for subtitle in sub.subtitles] == [
+        "es:Hello there",
+        "es:How are you?",
+        "new:I'm fine",
+        "es:Goodbye",
+        "new:See you soon",
+    ]
+    assert sub.subtitles[0].start == timedelta(seconds=10)
+
+
+def test_translation_must_match_its_source(tmp_path):
+    write_srt(tmp_path / "old.srt", [(0, "One"), (2, "Two")])
+    write_srt(tmp_path / "old_es.srt", [(0, "Uno")])
+    write_srt(tmp_path / "new.srt", [(0, "One"), (2, "Two")])
+
+    with pytest.raises(ValueError, match="is not a translation"):
+        translate_incremental(
+            SrtFile(str(tmp_path / "new.srt")),
+            RecordingTranslator(),
+            "en",
+            "es",
+            str(tmp_path / "old.srt"),
+            str(tmp_path / "old_es.srt"),
+        )
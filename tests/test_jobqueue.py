@@ -0,0 +1,114 @@
+import multiprocessing
+import time
+
+import srt
+from datetime import timedelta
+
+from srtranslator.jobqueue import WorkQueue
+from srtranslator.translators.base import Translator
+
+
+class SlowTranslator(Translator):
+    max_char = 30
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        time.sleep(0.05)
+        return "\n".join(f"{destination_language}:{line}" for line in text.splitlines())
+
+
+def write_sample_srt(tmp_path, count=20):
+    subtitles = [
+        srt.Subtitle(i + 1, timedelta(seconds=i), timedelta(seconds=i + 1), f"Line {i}")
+        for i in range(count)
+    ]
+    path = tmp_path / "sample.srt"
+    path.write_text(srt.compose(subtitles), encoding="utf-8")
+    return path
+
+
+def run_worker(database):
+    WorkQueue(database).run_worker(SlowTranslator(), exit_when_empty=True, poll_interval=0.05)
+
+
+def test_chunks_are_spread_over_worker_processes(tmp_path):
+    path = write_sample_srt(tmp_path)
+    database = str(tmp_path / "queue.db")
+    work_queue = WorkQueue(database)
+    assert work_queue.enqueue(str(path), ["es", "fr"], chunk_size=SlowTranslator.max_char) == [1, 2]
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=run_worker, args=(database,)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    assert work_queue.status() == {"done": 2}
+    translated = list(srt.parse((tmp_path / "sample_fr.srt").read_text(encoding="utf-8")))
+    assert [sub.content for sub in translated] == [f"fr:Line {i}" for i in range(20)]
+
+    connection = work_queue._connect()
+    owners = connection.execute("SELECT COUNT(DISTINCT lease_owner) FROM chunks").fetchone()[0]
+    assert owners > 1
+
+
+def test_chunks_of_dead_workers_are_reclaimed(tmp_path):
+    path = write_sample_srt(tmp_path, count=3)
+    database = str(tmp_path / "queue.db")
+    WorkQueue(database).enqueue(str(path), ["es"], chunk_size=1000)
+
+    # Claims the only chunk and never reports back
+    dead = WorkQueue(database, lease_seconds=0.2)
+    assert dead._claim_chunk(dead._connect()) is not None
+
+    alive = WorkQueue(database)
+    assert alive.run_worker(SlowTranslator(), exit_when_empty=True, poll_interval=0.05) == 1
+    assert alive.status() == {"done": 1}
+    assert "es:Line 2" in (tmp_path / "sample_es.srt").read_text(encoding="utf-8")
+
+
+def test_chunks_crashing_their_workers_fail_their_job(tmp_path):
+    path = write_sample_srt(tmp_path, count=3)
+    database = str(tmp_path / "queue.db")
+    WorkQueue(database).enqueue(str(path), ["es"], chunk_size=1000)
+
+    # Every claim dies with its worker
+    for _ in range(3):
+        dead = WorkQueue(database, lease_seconds=0.05)
+        assert dead._claim_chunk(dead._connect()) is not None
+        time.sleep(0.1)
+
+    alive = WorkQueue(database)
+    assert alive._claim_chunk(alive._connect()) is None
+    assert alive.status() == {"failed": 1}
+
+
+def test_chunks_whose_lease_was_lost_are_not_counted(tmp_path):
+    path = write_sample_srt(tmp_path, count=3)
+    database = str(tmp_path / "queue.db")
+    WorkQueue(database).enqueue(str(path), ["es"], chunk_size=1000)
+
+    slow = WorkQueue(database, lease_seconds=0.05)
+    connection = slow._connect()
+    chunk = slow._claim_chunk(connection)
+    time.sleep(0.1)
+    other = WorkQueue(database)
+    other.owner = "other-host:1:1"
+    assert other._claim_chunk(other._connect()) is not None
+
+    assert slow._translate_chunk(connection, SlowTranslator(), chunk) == 0
+
+
+def test_cli_plans_no_context_for_translators_without_it(tmp_path):
+    from srtranslator.__main__ import main
+
+    # Several chunks, the ones after the first would get context
+    path = write_sample_srt(tmp_path, count=300)
+    database = str(tmp_path / "queue.db")
+
+    assert main([str(path), "--queue", database, "-t", "pydeeplx", "-o", "es"]) == 0
+
+    connection = WorkQueue(database)._connect()
+    contexts = [row[0] for row in connection.execute("SELECT context FROM chunks")]
+    assert len(contexts) > 1 and all(context is None for context in contexts)
@@ -0,0 +1,162 @@
+import random
+import time
+
+import pytest
+
+from srtranslator.ass_file import AssFile
+from srtranslator.memory import BANDS, TranslationMemory, normalize
+from srtranslator.translators.base import Translator
+from srtranslator.translators.memory import MemoryTranslator
+
+
+class UpperTranslator(Translator):
+    max_char = 100
+
+    def __init__(self):
+        self.requests = []
+
+    def translate_batch(self, text, source_language, destination_language, context=None):
+        self.requests.append((list(text), context))
+        return [line.upper() for line in text]
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        return text.upper()
+
+
+@pytest.fixture
+def memory(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "memory.db"))
+    yield memory
+    memory.close()
+
+
+def test_case_punctuation_and_spaces_do_not_matter(memory):
+    memory.add([("Where are you going?", "¿Adónde vas?"), ("...", "...")], "en", "es")
+
+    match = memory.lookup("where are  you going ?", "en", "es")
+    assert match.translation == "¿Adónde vas?"
+    assert match.similarity == 1
+    assert normalize("Where are you going!") != normalize("Where are you going?")
+    assert memory.lookup("...", "en", "es") is None
+    assert memory.lookup("Where are you going?", "en", "fr") is None
+
+
+def test_near_identical_cues_are_reused_above_the_threshold(memory):
+    memory.add(
+        [
+            ("I told you not to come back here.", "Te dije que no volvieras aquí."),
+            ("We need 3 more days.", "Necesitamos 3 días más."),
+        ],
+        "en",
+        "es",
+    )
+
+    match = memory.lookup("I told you not to corne back here.", "en", "es")
+    assert match.translation == "Te dije que no volvieras aquí."
+    assert 0.9 <= match.similarity < 1
+    assert memory.lookup("I told you not to corne back here.", "en", "es", threshold=1) is None
+    assert memory.lookup("I told you to come back.", "en", "es") is None
+    # Similar, but a different number
+    assert memory.lookup("We need 5 more days.", "en", "es") is None
+
+
+def test_memory_is_persisted(memory):
+    memory.add([("Good night.", "Buenas noches.")], "en", "es")
+
+    reopened = TranslationMemory(memory.filepath)
+    assert reopened.lookup("Good nlght.", "en", "es").translation == "Buenas noches."
+    reopened.close()
+
+
+def test_keys_of_older_memories_are_computed_again(memory):
+    memory.add([("Good night.", "Buenas noches."), ("|Bye|", "|Adiós|")], "en", "es")
+    # Keys of version 0 were hashed big-endian, and placeholders were dropped
+    memory._connection.execute("UPDATE cues SET band_keys = ?", (bytes(8 * BANDS),))
+    memory._connection.execute("UPDATE cues SET normalized = 'bye' WHERE source = '|Bye|'")
+    memory._connection.execute("PRAGMA user_version = 0")
+    memory._connection.commit()
+
+    reopened = TranslationMemory(memory.filepath)
+    assert reopened.lookup("Good nlght.", "en", "es").translation == "Buenas noches."
+    assert reopened.lookup("Bye", "en", "es") is None
+    assert reopened.lookup("|Bye|", "en", "es").translation == "|Adiós|"
+    reopened.close()
+
+
+def test_markup_and_breaks_must_match(memory):
+    memory.add([("Hello world", "Hola mundo"), ("Hello|////|world", "Hola|////|mundo")], "en", "es")
+
+    assert memory.lookup("|Hello| world", "en", "es") is None
+    assert memory.lookup("Hello////world", "en", "es") is None
+    assert memory.lookup("Hello|////|world!", "en", "es", threshold=0.5) is None
+    assert memory.lookup("hello | //// | world", "en", "es").translation == "Hola|////|mundo"
+
+
+def test_ass_override_tags_are_kept(tmp_path, memory):
+    path = tmp_path / "sample.ass"
+    path.write_text(
+        "[Script Info]\nScriptType: v4.00+\n\n[Events]\n"
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+        "Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,{\\i1}Hello{\\i0} world\n"
+        "Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,Hello world\n",
+        encoding="utf-8",
+    )
+    memory.add([("Hello world", "Hola mundo")], "en", "es")
+    ass_file = AssFile(str(path), progress_callback=lambda *args, **kwargs: None)
+
+    ass_file.translate(MemoryTranslator(UpperTranslator(), memory), "en", "es")
+
+    assert [event.text for event in ass_file.subtitles.events] == [
+        r"{\i1}HELLO{\i0} WORLD",
+        "Hola mundo",
+    ]
+
+
+def test_only_missing_lines_are_translated(memory):
+    memory.add([("Hello there.", "HOLA.")], "en", "es")
+    inner = UpperTranslator()
+    translator = MemoryTranslator(inner, memory)
+
+    lines = translator.translate(["Hello, there.", "New line", "hello there"], "en", "es")
+
+    assert lines == ["HOLA.", "NEW LINE", "HOLA."]
+    assert inner.requests == [(["New line"], None)]
+    assert translator.translate(["New line"], "en", "es") == ["NEW LINE"]
+    assert len(inner.requests) == 1
+    assert (translator.hits, translator.misses) == (3, 1)
+
+
+def test_lookups_stay_fast(memory):
+    rng = random.Random(0)
+    words = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 8)))
+        for _ in range(2000)
+    ]
+    cues = [" ".join(rng.choice(words) for _ in range(rng.randint(3, 10))) for _ in range(5000)]
+    memory.add([(cue, cue.upper()) for cue in cues], "en", "es")
+
+    queries = [cue[:-1] + "x" for cue in rng.sample(cues, 200)]
+    start = time.perf_counter()
+    found = [memory.lookup(query, "en", "es", threshold=0.8) for query in queries]
+    elapsed = time.perf_counter() - start
+
+    assert sum(match is not None for match in found) >= 190
+    assert elapsed / len(queries) < 0.005
+
+
+def test_cli_translates_through_the_memory(tmp_path, monkeypatch):
+    from srtranslator.__main__ import BUILTIN_TRANSLATORS, main
+
+    monkeypatch.setitem(BUILTIN_TRANSLATORS, "translatepy", UpperTranslator)
+    path = tmp_path / "movie.srt"
+    path.write_text("1\n00:00:01,000 --> 00:00:02,000\nGood night.\n\n", encoding="utf-8")
+    memory_file = tmp_path / "memory.db"
+    arguments = [str(path), "-o", "es", "-t", "translatepy", "--memory-file", str(memory_file)]
+
+    assert main(arguments) == 0
+
+    assert "GOOD NIGHT." in (tmp_path / "movie_es.srt").read_text(encoding="utf-8")
+    memory = TranslationMemory(str(memory_file))
+    assert memory.lookup("Good night!", "auto", "es") is None
+    assert memory.lookup("good night", "auto", "es").translation == "GOOD NIGHT."
+    memory.close()
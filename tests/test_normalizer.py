@@ -0,0 +1,45 @@
+from srtranslator.normalizer import normalize_ass, normalize_srt, restore_ass, restore_srt
+
+
+def test_ass_round_trip_keeps_text_markup_and_breaks():
+    for text in [
+        r"{\i1}Hello{\i0}\Nworld",
+        r"Line one \N line two",
+        r"{\pos(10,10)}{\c&H00FF00&}No breaks",
+        r"a\nb",
+    ]:
+        normalized, cue_markup = normalize_ass(text)
+        assert "{" not in normalized and "\\" not in normalized
+        assert restore_ass(normalized, cue_markup) == text
+
+
+def test_ass_normalize_keeps_letters_next_to_breaks():
+    normalized, cue_markup = normalize_ass(r"word\Nnext <b>bold</b>")
+
+    assert normalized == "word////next bold"
+    assert restore_ass("palabra////siguiente negrita", cue_markup) == r"palabra\Nsiguiente negrita"
+
+
+def test_ass_restore_handles_lost_and_extra_placeholders():
+    _, cue_markup = normalize_ass(r"{\an8}Top{\i1}line")
+
+    assert restore_ass("Linea||superior|", cue_markup) == r"Linea{\an8}{\i1}superior"
+    assert restore_ass("Linea superior", cue_markup) == r"Linea superior{\an8}{\i1}"
+    assert restore_ass("One////two") == r"One\Ntwo"
+
+
+def test_srt_dialogue_lines_round_trip():
+    assert normalize_srt("-Yes\n-No") == "-Yes////-No"
+    assert normalize_srt("<i>Two</i>\nlines") == "Two lines"
+    assert normalize_srt("<b></b>") == "..."
+    assert restore_srt("-Sí //// -No") == "-Sí\n-No"
+
+
+def test_placeholders_in_the_source_text_round_trip():
+    for text in [r"A | B{\i1}C", r"Wait////what{\b1}x"]:
+        normalized, cue_markup = normalize_ass(text)
+        assert restore_ass(normalized, cue_markup) == text
+
+    normalized = normalize_srt("a //// b")
+    assert restore_srt(normalized) == "a //// b"
+    assert restore_srt(normalize_srt("-a ////\n-b")) == "-a ////\n-b"
@@ -0,0 +1,74 @@
+import sys
+import types
+
+import pytest
+
+from srtranslator.__main__ import main
+from srtranslator.translators import opus_mt
+from srtranslator.translators.opus_mt import OpusMT
+
+
+class FakeModel:
+    """Reverses the tokens of each sentence"""
+
+    loads = []
+
+    def __init__(self, model_path, **kwargs):
+        self.loads.append((model_path, kwargs))
+        self.batches = []
+
+    def translate_batch(self, tokens, max_batch_size, beam_size):
+        self.batches.append((tokens, max_batch_size))
+        return [types.SimpleNamespace(hypotheses=[list(reversed(sentence))]) for sentence in tokens]
+
+
+class FakeTokenizer:
+    def __init__(self, model_file):
+        self.model_file = model_file
+
+    def encode(self, lines, out_type):
+        return [line.split() for line in lines]
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+@pytest.fixture
+def models(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "ctranslate2", types.SimpleNamespace(Translator=FakeModel))
+    monkeypatch.setitem(
+        sys.modules, "sentencepiece", types.SimpleNamespace(SentencePieceProcessor=FakeTokenizer)
+    )
+    monkeypatch.setattr(opus_mt, "_models", {})
+    FakeModel.loads = []
+    for pair in ("en-es", "en-fr"):
+        (tmp_path / pair).mkdir()
+        (tmp_path / pair / "model.bin").write_bytes(b"")
+    return tmp_path
+
+
+def test_cues_are_batched_per_forward_pass(models):
+    translator = OpusMT(str(models / "en-es"), batch_size=8, intra_threads=4)
+
+    lines = translator.translate(["good morning", "", "see you soon"], "en", "es")
+
+    assert lines == ["morning good", "", "soon you see"]
+    model, _, _ = opus_mt.load_model(str(models / "en-es"), 1, 4)
+    assert model.batches == [([["good", "morning"], ["see", "you", "soon"]], 8)]
+    assert FakeModel.loads[0][1]["intra_threads"] == 4
+
+
+def test_models_stay_loaded_and_are_picked_by_pair(models):
+    OpusMT(str(models)).translate(["one line"], "en", "es")
+    OpusMT(str(models)).translate(["one line"], "en", "es")
+    OpusMT(str(models)).translate(["one line"], "en", "fr")
+
+    assert [path for path, _ in FakeModel.loads] == [str(models / "en-es"), str(models / "en-fr")]
+    with pytest.raises(FileNotFoundError, match="No en-de model"):
+        OpusMT(str(models)).translate(["one line"], "en", "de")
+
+
+def test_cli_needs_a_model(capsys):
+    with pytest.raises(SystemExit):
+        main(["movie.srt", "-t", "opus-mt"])
+    assert "opus-mt needs --model" in capsys.readouterr().err
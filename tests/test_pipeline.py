@@ -0,0 +1,163 @@
+import textwrap
+import threading
+import time
+
+from srtranslator.pipeline import translate_files
+from srtranslator.retry import IncompleteTranslationError, RetryPolicy
+from srtranslator.translators.base import QuotaExceededError, Translator
+
+from test_ass_file import HEADER
+
+
+class PrefixTranslator(Translator):
+    max_char = 24
+
+    def __init__(self, threads):
+        threads.add(threading.get_ident())
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        return "\n".join(f"{destination_language}:{line}" for line in text.splitlines())
+
+
+def write_srt(path, *lines):
+    path.write_text(
+        "".join(
+            f"{index}\n00:00:0{index},000 --> 00:00:0{index},500\n{line}\n\n"
+            for index, line in enumerate(lines, start=1)
+        ),
+        encoding="utf-8",
+    )
+    return str(path)
+
+
+def test_batch_is_translated_through_the_pipeline(tmp_path):
+    paths = [write_srt(tmp_path / f"ep{n}.srt", f"Hello {n}", "How are you?", "Bye") for n in range(3)]
+    ass_path = tmp_path / "song.ass"
+    ass_path.write_text(
+        textwrap.dedent(HEADER).strip()
+        + "\nDialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,{\\i1}Sing{\\i0}\n",
+        encoding="utf-8",
+    )
+    broken = tmp_path / "notes.txt"
+    broken.write_text("not a subtitle", encoding="utf-8")
+    threads = set()
+    events = []
+
+    outputs, failures = translate_files(
+        paths + [str(ass_path), str(broken)],
+        lambda: PrefixTranslator(threads),
+        "en",
+        ["es", "fr"],
+        chunk_size=PrefixTranslator.max_char,
+        workers=2,
+        processes=2,
+        queue_size=1,
+        progress_callback=events.append,
+    )
+
+    assert list(failures) == [str(broken)]
+    assert sorted(outputs) == sorted(paths + [str(ass_path)])
+    assert (tmp_path / "ep1_fr.srt").read_text(encoding="utf-8").split("\n")[2] == "fr:Hello 1"
+    assert "es:{\\i1}Sing{\\i0}" in (tmp_path / "song_es.ass").read_text(encoding="utf-8")
+    assert len(threads) <= 2
+    finished = [event for event in events if event.finished]
+    assert len(finished) == 8
+    assert all(event.cues_done == event.cues_total for event in finished)
+
+
+class FlakyTranslator(Translator):
+    max_char = 24
+
+    def __init__(self, failures):
+        self.failures = failures
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        if "Bye" in text and self.failures.get(text, 0) > 0:
+            self.failures[text] -= 1
+            raise RuntimeError("502 Bad Gateway")
+        return "\n".join(f"{destination_language}:{line}" for line in text.splitlines())
+
+
+def test_failing_chunks_are_retried_and_leave_a_backup(tmp_path):
+    good = write_srt(tmp_path / "good.srt", "Hello", "Bye")
+    bad = write_srt(tmp_path / "bad.srt", "Hi", "Hello", "Bye!", "Again")
+    # Fails every attempt of its first round, works in the last one
+    failures = {"Bye": 2, "Bye!": 100}
+
+    outputs, failed = translate_files(
+        [good, bad],
+        lambda: FlakyTranslator(failures),
+        "en",
+        ["es"],
+        chunk_size=FlakyTranslator.max_char,
+        workers=1,
+        processes=1,
+        retry_policy=RetryPolicy(max_attempts=2, sleep=lambda seconds: None),
+        progress_callback=lambda event: None,
+    )
+
+    assert list(outputs) == [good]
+    assert "es:Bye" in (tmp_path / "good_es.srt").read_text(encoding="utf-8")
+    assert isinstance(failed[bad], IncompleteTranslationError)
+    backup = (tmp_path / "bad.srt.tmp").read_text(encoding="utf-8")
+    assert "es:Hello" in backup and "Bye" not in backup
+
+    # The next batch resumes from the backup
+    sent = []
+
+    class RecordingTranslator(FlakyTranslator):
+        def translate_single(self, text, source_language, destination_language, context=None):
+            sent.append(text)
+            return super().translate_single(text, source_language, destination_language)
+
+    outputs, failed = translate_files(
+        [bad],
+        lambda: RecordingTranslator({}),
+        "en",
+        ["es"],
+        chunk_size=FlakyTranslator.max_char,
+        processes=1,
+        progress_callback=lambda event: None,
+    )
+
+    assert list(outputs) == [bad] and not failed
+    assert not any("Hello" in text for text in sent)
+    translated = (tmp_path / "bad_es.srt").read_text(encoding="utf-8")
+    assert "es:Hello" in translated and "es:Again" in translated
+    assert not (tmp_path / "bad.srt.tmp").exists()
+
+
+class QuotaTranslator(Translator):
+    max_char = 100
+    used = 0
+    lock = threading.Lock()
+
+    def check_quota(self, characters):
+        if QuotaTranslator.used + characters > 40:
+            raise QuotaExceededError(characters, 40 - QuotaTranslator.used)
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        time.sleep(0.2)
+        with QuotaTranslator.lock:
+            QuotaTranslator.used += len(text)
+        return text
+
+
+def test_concurrent_files_reserve_their_quota(tmp_path):
+    paths = [write_srt(tmp_path / f"ep{n}.srt", "x" * 15) for n in range(3)]
+
+    outputs, failures = translate_files(
+        paths,
+        QuotaTranslator,
+        "en",
+        ["es"],
+        chunk_size=QuotaTranslator.max_char,
+        workers=3,
+        processes=1,
+        progress_callback=lambda event: None,
+    )
+
+    # Only two files fit in the quota, even though all of them start at once
+    assert len(outputs) == 2
+    assert [type(exc) for exc in failures.values()] == [QuotaExceededError]
+    assert QuotaTranslator.used <= 40
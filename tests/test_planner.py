@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+import srt
+
+from srtranslator.__main__ import BUILTIN_TRANSLATORS, main
+from srtranslator.chunking import CHUNK_SIZES
+from srtranslator.context import CONTEXT_POLICY, ContextBudget
+from srtranslator.metrics import LatencyStore
+from srtranslator.planner import Backend, estimate_seconds, format_report, plan_file
+
+
+def write_srt(path, lines):
+    subtitles = [
+        srt.Subtitle(
+            index + 1, timedelta(seconds=index), timedelta(seconds=index + 0.5), line
+        )
+        for index, line in enumerate(lines)
+    ]
+    path.write_text(srt.compose(subtitles), encoding="utf-8")
+
+
+def test_plan_counts_requests_and_backup_hits(tmp_path):
+    lines = [f"Line number {index}" for index in range(10)]
+    path = tmp_path / "sample.srt"
+    write_srt(path, lines)
+    # The French backup already holds the first three subtitles
+    write_srt(tmp_path / "sample.srt.fr.tmp", ["Ligne"] * 3)
+
+    backends = [Backend("small", "Small", 70), Backend("large", "Large", 100000)]
+    file_plan = plan_file(str(path), "en", ["es", "fr"], backends)
+
+    spanish, french = file_plan.languages
+    assert file_plan.subtitles == 10
+    assert spanish.billed_characters == sum(len(line) for line in lines)
+    assert spanish.cache_hits == 0
+    assert spanish.requests == {"small": 4, "large": 1}
+    assert french.cache_hits == 3
+    assert french.cache_hit_characters == sum(len(line) for line in lines[:3])
+    assert french.billed_characters == sum(len(line) for line in lines[3:])
+    assert french.requests["large"] == 1
+
+    latencies = LatencyStore(str(tmp_path / "metrics.json"))
+    latencies.record("Small", 40, 2.0)
+    # Both languages at once: the longest language decides
+    assert estimate_seconds([file_plan], backends[0], latencies, 2) == 8.0
+    assert estimate_seconds([file_plan], backends[0], latencies, 1) == 8.0 + 2.0 * french.requests["small"]
+    assert "small" in format_report([file_plan], backends, latencies, 2, selected="small")
+
+
+def test_only_backends_using_context_plan_it(tmp_path, monkeypatch):
+    path = tmp_path / "sample.srt"
+    write_srt(path, [f"Line number {index}" for index in range(10)])
+    monkeypatch.setattr(CONTEXT_POLICY, "budgets", {"en-es": ContextBudget(20, 10)})
+
+    backends = [
+        Backend("plain", "Plain", 50),
+        Backend("context", "Context", 50, supports_context=True),
+    ]
+    (spanish,) = plan_file(str(path), "en", ["es"], backends).languages
+
+    assert spanish.context_characters["plain"] == 0
+    assert 0 < spanish.context_characters["context"] <= 30 * spanish.requests["context"]
+
+
+def test_backends_are_planned_with_their_current_chunk_size(tmp_path, monkeypatch):
+    path = tmp_path / "sample.srt"
+    write_srt(path, [f"Line number {index}" for index in range(10)])
+    # The size the last runs settled on for en-es
+    monkeypatch.setitem(CHUNK_SIZES._states, ("Large", "en-es"), {"size": 70})
+    monkeypatch.setattr(CHUNK_SIZES, "min_size", 10)
+
+    backends = [
+        Backend("large", "Large", 100000),
+        Backend("fixed", "Large", 100000, adaptive_chunk_size=False),
+    ]
+    (spanish,) = plan_file(str(path), "en", ["es"], backends).languages
+
+    assert spanish.requests == {"large": 4, "fixed": 1}
+
+
+def test_latencies_are_kept_across_runs(tmp_path):
+    metrics_file = str(tmp_path / "metrics" / "metrics.json")
+    latencies = LatencyStore(metrics_file)
+    assert not latencies.is_observed("DeeplApi")
+    latencies.record("DeeplApi", 100, 1.0)
+    latencies.record("DeeplApi", 100, 3.0)
+    latencies.save()
+
+    assert LatencyStore(metrics_file).request_seconds("DeeplApi") == 2.0
+
+
+def test_cli_dry_run_does_not_build_translators(tmp_path, monkeypatch, capsys):
+    for index in range(2):
+        write_srt(tmp_path / f"episode{index}.srt", ["Hello there", "World"])
+
+    def refuse(*args, **kwargs):
+        raise AssertionError("no translator should be built")
+
+    for name in BUILTIN_TRANSLATORS:
+        monkeypatch.setitem(BUILTIN_TRANSLATORS, name, type(name, (), {
+            "__init__": refuse,
+            "max_char": BUILTIN_TRANSLATORS[name].max_char,
+            "supports_context": BUILTIN_TRANSLATORS[name].supports_context,
+            "adaptive_chunk_size": BUILTIN_TRANSLATORS[name].adaptive_chunk_size,
+        }))
+
+    paths = [str(tmp_path / "episode0.srt"), str(tmp_path / "episode1.srt")]
+    assert main(paths + ["--dry-run", "-o", "es,fr"]) == 0
+
+    report = capsys.readouterr().out
+    assert "Total: 64 characters to bill" in report
+    assert "deepl-scrap *" in report
+    assert sorted(file.name for file in tmp_path.iterdir()) == ["episode0.srt", "episode1.srt"]
@@ -0,0 +1,103 @@
+import io
+from datetime import timedelta
+
+import srt
+
+from srtranslator.progress import ProgressEvent, ProgressRenderer, ProgressTracker
+from srtranslator.srt_file import SrtFile
+from srtranslator.translators.base import Translator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class EchoTranslator(Translator):
+    max_char = 24
+
+    def translate_batch(self, text, source_language, destination_language, context=None):
+        return list(text)
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        return text
+
+
+def event(label, done, total=100, finished=False, elapsed=10.0):
+    return ProgressEvent(label, done // 10, total // 10, done, total, 1, elapsed, finished)
+
+
+def test_tracker_reports_throughput_and_eta():
+    clock = FakeClock()
+    events = []
+    tracker = ProgressTracker("a.srt (es)", 4, 400, events.append, clock=clock)
+
+    tracker.chunk_started()
+    assert events[-1].chunks_in_flight == 1
+    assert events[-1].eta is None
+
+    clock.now = 10
+    tracker.chunk_done(1, 100)
+    assert events[-1].throughput == 10
+    assert events[-1].eta == 30
+    assert events[-1].chunks_in_flight == 0
+
+    tracker.finish()
+    assert events[-1].finished
+    assert events[-1].as_dict()["eta"] == 0
+
+
+def test_rendering_is_rate_limited():
+    clock = FakeClock()
+    stream = io.StringIO()
+    renderer = ProgressRenderer(stream, min_interval=1, clock=clock)
+
+    renderer(event("a.srt (es)", 10))
+    clock.now = 0.5
+    renderer(event("a.srt (es)", 20))
+    clock.now = 1.5
+    renderer(event("a.srt (es)", 30))
+    renderer(event("a.srt (es)", 100, finished=True))
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 3
+    assert lines[1].startswith("[######--------------]  30% | 3/10 cues")
+    assert "done | a.srt (es)" in lines[2]
+
+
+def test_concurrent_translations_are_summed_up():
+    renderer = ProgressRenderer(io.StringIO(), min_interval=0)
+
+    renderer(event("a.srt (es)", 50))
+    renderer(event("a.srt (fr)", 25, elapsed=5))
+    line = renderer.format()
+    assert "38%" in line
+    assert "7/20 cues" in line
+    # 5 + 5 chars/s for 125 characters left
+    assert "10 chars/s | ETA 12s | 2 running, 0 done" in line
+
+    renderer(event("a.srt (es)", 100, finished=True))
+    renderer(event("a.srt (fr)", 100, finished=True))
+    # The next translation starts a new batch
+    renderer(event("b.srt (es)", 0))
+    assert renderer.format().endswith("b.srt (es)")
+
+
+def test_files_send_events_per_chunk(tmp_path):
+    subtitles = [
+        srt.Subtitle(index + 1, timedelta(seconds=index), timedelta(seconds=index + 0.5), line)
+        for index, line in enumerate(["One", "Two", "Three", "Four"])
+    ]
+    path = tmp_path / "sample.srt"
+    path.write_text(srt.compose(subtitles), encoding="utf-8")
+    events = []
+
+    SrtFile(str(path), progress_callback=events.append).translate(EchoTranslator(), "en", "es")
+
+    assert events[0].label == "sample.srt (es)"
+    assert [e.cues_done for e in events if not e.chunks_in_flight] == [2, 4, 4]
+    assert events[-1].finished
+    assert events[-1].characters_done == events[-1].characters_total == 15
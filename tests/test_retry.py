@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+import pytest
+import srt
+
+from srtranslator.retry import IncompleteTranslationError, RetryPolicy
+from srtranslator.srt_file import SrtFile
+from srtranslator.translators.base import Translator
+
+
+class AuthError(Exception):
+    pass
+
+
+class FlakyTranslator(Translator):
+    """Fails the first `failures` requests containing a given line"""
+
+    max_char = 24
+    fatal_errors = (AuthError,)
+
+    def __init__(self, failing_line, failures, error=RuntimeError("502 Bad Gateway")):
+        self.failing_line = failing_line
+        self.failures = failures
+        self.error = error
+        self.requests = 0
+        self.sent = []
+
+    def translate_batch(self, text, source_language, destination_language, context=None):
+        self.requests += 1
+        self.sent.append(text[0])
+        if self.failing_line in text and self.failures > 0:
+            self.failures -= 1
+            raise self.error
+        return [f"es:{line}" for line in text]
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        return self.translate_batch([text], source_language, destination_language)[0]
+
+
+@pytest.fixture
+def srt_file(tmp_path):
+    lines = ["One", "Two", "Three", "Four", "Five", "Six"]
+    subtitles = [
+        srt.Subtitle(index + 1, timedelta(seconds=index), timedelta(seconds=index + 0.5), line)
+        for index, line in enumerate(lines)
+    ]
+    path = tmp_path / "sample.srt"
+    path.write_text(srt.compose(subtitles), encoding="utf-8")
+    return SrtFile(str(path), progress_callback=lambda *args, **kwargs: None)
+
+
+def no_wait_policy(delays, **kwargs):
+    return RetryPolicy(jitter=0, sleep=delays.append, **kwargs)
+
+
+def test_transient_errors_are_retried_with_backoff(srt_file):
+    delays = []
+    translator = FlakyTranslator("Three", failures=2)
+
+    srt_file.translate(translator, "en", "es", retry_policy=no_wait_policy(delays, base_delay=1))
+
+    # The next chunks went on while the failing one waited for its retries
+    assert translator.sent == ["One", "Three", "Five", "Three", "Three"]
+    assert delays == [pytest.approx(1, abs=0.1), pytest.approx(2, abs=0.1)]
+    assert srt_file.subtitles[2].content == "es:Three"
+    assert srt_file.current_subtitle == 6
+
+
+def test_chunks_failing_longer_get_a_last_round(srt_file):
+    delays = []
+    # Fails both attempts of its first round, works in the last one
+    translator = FlakyTranslator("Three", failures=2)
+
+    srt_file.translate(translator, "en", "es", retry_policy=no_wait_policy(delays, max_attempts=2))
+
+    assert [subtitle.content for subtitle in srt_file.subtitles] == [
+        "es:One", "es:Two", "es:Three", "es:Four", "es:Five", "es:Six"
+    ]
+    assert srt_file.current_subtitle == 6
+
+
+def test_last_chunk_working_in_the_last_round_ends_the_file(srt_file):
+    translator = FlakyTranslator("Five", failures=2)
+
+    srt_file.translate(translator, "en", "es", retry_policy=no_wait_policy([], max_attempts=2))
+
+    assert srt_file.subtitles[4].content == "es:Five"
+    assert srt_file.current_subtitle == 6
+
+
+def test_failed_chunks_are_reported_after_the_others(srt_file):
+    translator = FlakyTranslator("Three", failures=100)
+
+    with pytest.raises(IncompleteTranslationError, match="subtitles 3-") as error:
+        srt_file.translate(translator, "en", "es", retry_policy=no_wait_policy([], max_attempts=2))
+
+    assert [chunk for chunk, _ in error.value.failed] == [[2, 3]]
+    # Every other chunk went on
+    assert srt_file.subtitles[-1].content == "es:Six"
+    # A backup keeps what comes before the failed chunk
+    assert srt_file.current_subtitle == 2
+
+
+@pytest.mark.parametrize("error", [AuthError("bad key"), TypeError("bug")])
+def test_fatal_errors_are_not_retried(srt_file, error):
+    translator = FlakyTranslator("One", failures=1, error=error)
+
+    with pytest.raises(type(error)):
+        srt_file.translate(translator, "en", "es", retry_policy=no_wait_policy([]))
+    assert translator.requests == 1
+
+
+def test_delays_are_capped_and_jittered():
+    policy = RetryPolicy(base_delay=2, max_delay=10, jitter=0.5)
+
+    for attempt, ceiling in [(1, 2), (2, 4), (3, 8), (4, 10), (8, 10)]:
+        assert ceiling / 2 <= policy.delay(attempt) <= ceiling
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+from selenium.webdriver.common.proxy import Proxy, ProxyType
+
+from srtranslator.translators import selenium_utils
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setattr(selenium_utils, "_geckodriver_path", None)
+    return tmp_path
+
+
+def test_lean_preferences_route_only_deepl_through_the_proxy():
+    proxy = Proxy({"proxyType": ProxyType.MANUAL, "httpProxy": "10.0.0.1:3128"})
+    preferences = selenium_utils.lean_preferences(proxy)
+
+    assert preferences["permissions.default.image"] == 2
+    assert preferences["network.proxy.type"] == 2
+    pac = preferences["network.proxy.autoconfig_url"]
+    assert pac.startswith("data:text/javascript,function FindProxyForURL")
+    assert 'dnsDomainIs(host, ".deepl.com")' in pac
+    assert 'return "PROXY 10.0.0.1:3128"' in pac
+    assert 'return "PROXY 127.0.0.1:9"' in pac
+
+    assert 'return "DIRECT"' in selenium_utils.pac_script()
+
+
+def test_profiles_are_claimed_once_and_reused(cache_home):
+    first, first_lock = selenium_utils.claim_profile()
+    second, second_lock = selenium_utils.claim_profile()
+    assert first != second
+    assert first.startswith(str(cache_home))
+
+    selenium_utils.release_profile(first_lock)
+    again, again_lock = selenium_utils.claim_profile()
+    assert again == first
+
+    selenium_utils.release_profile(second_lock)
+    selenium_utils.release_profile(again_lock)
+
+
+def test_geckodriver_is_looked_up_once(monkeypatch):
+    lookups = []
+    monkeypatch.setattr(
+        selenium_utils.shutil, "which", lambda name: lookups.append(name) or "/usr/bin/geckodriver"
+    )
+
+    assert selenium_utils.geckodriver_path() == "/usr/bin/geckodriver"
+    assert selenium_utils.geckodriver_path() == "/usr/bin/geckodriver"
+    assert lookups == ["geckodriver"]
+
+
+def test_lean_driver_uses_its_profile_and_frees_it(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(selenium_utils, "geckodriver_path", lambda: "/usr/bin/geckodriver")
+
+    class FakeFirefox:
+        def __init__(self, options, service):
+            self.arguments = options.arguments
+            self.executable = service.path
+            self.window_size = None
+            self.quit_called = False
+
+        def set_window_size(self, width, height):
+            self.window_size = (width, height)
+
+        def quit(self):
+            self.quit_called = True
+
+    monkeypatch.setattr(selenium_utils.webdriver, "Firefox", FakeFirefox)
+
+    driver = selenium_utils.create_lean_driver()
+    profile = driver.arguments[driver.arguments.index("-profile") + 1]
+    assert driver.window_size == selenium_utils.LEAN_VIEWPORT
+    assert driver.executable == "/usr/bin/geckodriver"
+    assert not (tmp_path / "geckodriver.log").exists()
+    with open(os.path.join(profile, "user.js"), encoding="utf-8") as user_js:
+        assert 'user_pref("permissions.default.image", 2);' in user_js.read()
+
+    selenium_utils.quit_driver(driver)
+    assert driver.quit_called
+    # The profile is free for the next browser
+    next_profile, lock = selenium_utils.claim_profile()
+    assert next_profile == profile
+    selenium_utils.release_profile(lock)
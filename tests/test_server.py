@@ -0,0 +1,112 @@
+import time
+import threading
+
+import pytest
+
+from srtranslator.server import TranslationServer, submit_job
+from srtranslator.translators.base import Translator
+
+SRT_CONTENT = "1\n00:00:00,000 --> 00:00:01,000\nHello\n\n2\n00:00:01,000 --> 00:00:02,000\nWorld\n"
+
+
+class PrefixTranslator(Translator):
+    max_char = 10
+    instances = 0
+    gate = threading.Event()
+    languages = []
+
+    def __init__(self):
+        PrefixTranslator.instances += 1
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        self.gate.wait()
+        self.languages.append(destination_language)
+        return "\n".join(f"{destination_language}:{line}" for line in text.splitlines())
+
+
+@pytest.fixture
+def server():
+    PrefixTranslator.instances = 0
+    PrefixTranslator.languages = []
+    PrefixTranslator.gate.set()
+    server = TranslationServer(PrefixTranslator, workers=1, port=0)
+    server.start()
+    yield server
+    server.shutdown()
+
+
+def test_jobs_reuse_the_warm_translator(server, tmp_path):
+    events = submit_job(
+        server.url, {"content": SRT_CONTENT, "filename": "a.srt", "languages": ["es", "fr"]}
+    )
+
+    names = [event["event"] for event in events]
+    # Runs of progress events count as one
+    assert [name for i, name in enumerate(names) if name != "progress" or names[i - 1] != name] == [
+        "queued",
+        "started",
+        "progress",
+        "done",
+        "progress",
+        "done",
+        "finished",
+    ]
+    progress = [event for event in events if event["event"] == "progress"]
+    assert progress[0]["chunks_in_flight"] == 1
+    assert progress[-1]["language"] == "fr"
+    assert progress[-1]["finished"]
+    assert progress[-1]["cues_done"] == progress[-1]["cues_total"] == 2
+    assert progress[-1]["eta"] == 0
+    assert "fr:World" in events[-2]["content"]
+
+    path = tmp_path / "b.srt"
+    path.write_text(SRT_CONTENT, encoding="utf-8")
+    events = submit_job(server.url, {"path": str(path), "languages": ["de"]})
+
+    assert events[-2] == {"event": "done", "job": 2, "language": "de", "path": str(tmp_path / "b_de.srt")}
+    assert "de:Hello" in (tmp_path / "b_de.srt").read_text(encoding="utf-8")
+    assert PrefixTranslator.instances == 1
+
+
+def test_higher_priority_jobs_run_first(server):
+    # Keep the worker busy while the other jobs queue up
+    PrefixTranslator.gate.clear()
+    busy = server.submit({"content": SRT_CONTENT, "languages": ["busy"]})
+    assert [busy.get(timeout=5)["event"] for _ in range(2)] == ["queued", "started"]
+
+    low = server.submit({"content": SRT_CONTENT, "languages": ["low"]})
+    high = server.submit({"content": SRT_CONTENT, "languages": ["high"], "priority": 5})
+    PrefixTranslator.gate.set()
+
+    for events in (busy, low, high):
+        while events.get(timeout=5)["event"] != "finished":
+            pass
+
+    assert list(dict.fromkeys(PrefixTranslator.languages)) == ["busy", "high", "low"]
+
+
+def test_workers_warm_up_before_the_first_job():
+    PrefixTranslator.instances = 0
+    server = TranslationServer(PrefixTranslator, workers=2, port=0)
+    server.start()
+    try:
+        deadline = time.monotonic() + 5
+        while PrefixTranslator.instances < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert PrefixTranslator.instances == 2
+    finally:
+        server.shutdown()
+
+
+def test_invalid_jobs_are_rejected(server):
+    with pytest.raises(ValueError, match="languages"):
+        submit_job(server.url, {"content": SRT_CONTENT})
+    with pytest.raises(ValueError, match="does not exist"):
+        submit_job(server.url, {"path": "/nonexistent.srt", "languages": ["es"]})
+    with pytest.raises(ValueError, match="JSON object"):
+        submit_job(server.url, ["es"])
+    job = {"content": SRT_CONTENT, "filename": "a.srt", "languages": ["es"]}
+    with pytest.raises(ValueError, match="priority must be an integer"):
+        submit_job(server.url, {**job, "priority": "high"})
+    with pytest.raises(ValueError, match="wrap_limit must be a positive integer"):
+        submit_job(server.url, {**job, "wrap_limit": 0})
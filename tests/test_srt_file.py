@@ -2,7 +2,9 @@ import srt
 import textwrap
 from datetime import timedelta
 
+from srtranslator.retry import RetryPolicy
 from srtranslator.srt_file import SrtFile
+from srtranslator.translators.base import Translator
 
 
 def write_sample_srt(tmp_path, content: str):
@@ -67,12 +69,45 @@ def test_get_next_chunk_respects_limit(tmp_path):
 
     srt_file = SrtFile(str(path))
 
-    chunks = list(srt_file._get_next_chunk(chunk_size=10))
+    # Framed as "[[0]] AAA\n[[1]] BBBB\n" the first two take 21 characters
+    chunks = list(srt_file._get_next_chunk(chunk_size=24))
     assert len(chunks) == 2
     assert [sub.content for sub in chunks[0]] == ["AAA", "BBBB"]
     assert [sub.content for sub in chunks[1]] == ["CCCCC"]
 
 
+class LimitedTranslator(Translator):
+    """Rejects requests over max_char, like a browser text box would cut them"""
+
+    max_char = 190
+
+    def __init__(self):
+        self.requests = []
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        if len(text) > self.max_char:
+            raise ValueError(f"{len(text)} characters sent")
+        self.requests.append(text)
+        return text.upper()
+
+
+def test_chunks_fit_max_char_with_their_markers(tmp_path):
+    # 189 characters with their line breaks, a full chunk before counting the markers
+    subtitles = [
+        srt.Subtitle(index + 1, timedelta(seconds=index), timedelta(seconds=index + 1), "x" * 20)
+        for index in range(9)
+    ]
+    path = write_sample_srt(tmp_path, srt.compose(subtitles))
+    srt_file = SrtFile(str(path), progress_callback=lambda *args, **kwargs: None)
+    translator = LimitedTranslator()
+
+    srt_file.translate(translator, "en", "es", retry_policy=RetryPolicy(max_attempts=1))
+
+    assert [subtitle.content for subtitle in srt_file.subtitles] == ["X" * 20] * 9
+    assert len(translator.requests) == 2
+    assert max(len(request) for request in translator.requests) <= translator.max_char
+
+
 def test_build_deepl_context_includes_neighbors(tmp_path):
     subtitles = [
         srt.Subtitle(1, timedelta(seconds=0), timedelta(seconds=1), "Intro"),
@@ -114,3 +149,43 @@ def test_build_deepl_context_includes_neighbors(tmp_path):
     assert context_scene_two is not None
     assert "Upcoming dialogue" in context_scene_two
     assert "4. Follow up" in context_scene_two
+
+
+class PrefixTranslator(Translator):
+    max_char = 20
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        if destination_language == "xx":
+            raise RuntimeError("Unsupported language")
+        return "\n".join(f"{destination_language}:{line}" for line in text.splitlines())
+
+
+def test_translate_languages_shares_one_plan(tmp_path, monkeypatch):
+    subtitles = [
+        srt.Subtitle(1, timedelta(seconds=0), timedelta(seconds=1), "One"),
+        srt.Subtitle(2, timedelta(seconds=1), timedelta(seconds=2), "Two"),
+        srt.Subtitle(3, timedelta(seconds=2), timedelta(seconds=3), "Three"),
+    ]
+    path = write_sample_srt(tmp_path, srt.compose(subtitles))
+    srt_file = SrtFile(str(path), progress_callback=lambda *args, **kwargs: None)
+
+    plans = []
+    plan_chunks = SrtFile._plan_chunks
+    monkeypatch.setattr(
+        SrtFile,
+        "_plan_chunks",
+        lambda self, chunk_size, *args: plans.append(chunk_size)
+        or plan_chunks(self, chunk_size, *args),
+    )
+
+    translated = srt_file.translate_languages(
+        PrefixTranslator, "en", ["es", "fr", "xx"], retry_policy=RetryPolicy(sleep=lambda _: None)
+    )
+
+    assert plans == [PrefixTranslator.max_char]
+    assert sorted(translated) == ["es", "fr"]
+    assert [sub.content for sub in translated["fr"].subtitles] == ["fr:One", "fr:Two", "fr:Three"]
+    assert [sub.content for sub in srt_file.subtitles] == ["One", "Two", "Three"]
+    # The failed language keeps its own resume state
+    assert (tmp_path / "sample.srt.xx.tmp").exists()
+    assert not (tmp_path / "sample.srt.tmp").exists()
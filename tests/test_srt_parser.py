@@ -0,0 +1,129 @@
+import random
+import re
+
+import pytest
+import srt
+
+from srtranslator import srt_parser
+from srtranslator.srt_file import SrtFile
+from srtranslator.util import read_text
+
+
+# load_from_string doesn't depend on the file being loaded
+LOADER = SrtFile.__new__(SrtFile)
+
+
+def legacy_load(content: str):
+    """Original srt library pipeline and SrtFile cleaning rules, the parity reference"""
+    subtitles = list(srt.sort_and_reindex(list(srt.parse(content))))
+
+    for sub in subtitles:
+        sub.content = re.sub("<.*?>", "", sub.content)
+        sub.content = srt.make_legal_content(sub.content)
+        sub.content = sub.content.strip()
+
+        if sub.content == "":
+            sub.content = "..."
+
+        if all(sentence.startswith("-") for sentence in sub.content.split("\n")):
+            sub.content = sub.content.replace("\n", "////")
+            continue
+
+        sub.content = sub.content.replace("\n", " ")
+
+    return subtitles
+
+
+def assert_parity(content: str):
+    try:
+        expected = srt.compose(legacy_load(content))
+    except srt.SRTParseError:
+        with pytest.raises(srt.SRTParseError):
+            LOADER.load_from_string(content)
+        return
+
+    assert srt.compose(LOADER.load_from_string(content)) == expected
+
+
+WELL_FORMED = [
+    "1\n00:00:00,000 --> 00:00:01,000\nHello <i>world</i>\n",
+    "1\n00:00:00,000 --> 00:00:01,000\n-Yes\n-No\n\n2\n00:00:01,500 --> 00:00:02,500\nA\nB\n",
+    "\ufeff1\n00:00:02,000 --> 00:00:03,000\nSecond\n\n2\n00:00:00,000 --> 00:00:01,000\nFirst",
+    "1\n00:00:00,000 --> 00:00:01,000 X1:10 X2:20\nProprietary\n\n\n\n",
+    "1\n00:00:00,000 --> 00:00:01,000\n<b></b>\n\n2\n00:00:01,000 --> 00:00:01,000\nSkipped\n",
+    "1\n00:00:00,000 --> 00:00:01,000\n\n\n2\n00:00:01,000 --> 00:00:02,000\nAfter empty\n",
+    "7.5\n00:00:00.5 --> 00:00:01.25\n  - Dots \n -and spaces\n",
+]
+
+
+@pytest.mark.parametrize("content", WELL_FORMED)
+def test_native_parser_matches_srt_library(content):
+    assert srt.compose(srt_parser.parse(content)) == srt.compose(legacy_load(content))
+    assert srt_parser.parse(content) == legacy_load(content)
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "1\r\n00:00:00,000 --> 00:00:01,000\r\nCRLF\r\n",
+        "1\n00:00:00,000 --> 00:00:01,000\nNo blank line\n2\n00:00:01,000 --> 00:00:02,000\nX\n",
+        "1\n00:00:00,000 --> 00:00:01,000\nBlank\n\ninside\n\n2\n00:00:01,000 --> 00:00:02,000\nX\n",
+        "00:00:00,000 --> 00:00:01,000\nNo index\n",
+        "1\n00:00:00,000 --> 00:00:01,000\nText\n\n00:00:01,000 --> 00:00:02,000\nNo index\n",
+        "1\n00:00:00,000 --> 00:00:01,000\nText\n2 \n00:00:01,000 --> 00:00:02,000\nX\n",
+        "",
+    ],
+)
+def test_unusual_syntax_falls_back_to_srt_library(content):
+    with pytest.raises(srt_parser.UnsupportedSyntaxError):
+        srt_parser.parse(content)
+    assert_parity(content)
+
+
+def test_garbage_still_raises_srt_parse_error():
+    assert_parity("Not a subtitle\n\n1\n00:00:00,000 --> 00:00:01,000\nX\n")
+
+
+def test_read_text_matches_text_mode_open(tmp_path):
+    path = tmp_path / "crlf.srt"
+    path.write_bytes(b"1\r\n00:00:00,000 --> 00:00:01,000\r\nCaf\xc3\xa9 \xff\rend\r\n")
+
+    with open(path, "r", encoding="utf-8", errors="ignore") as input_file:
+        assert read_text(str(path)) == input_file.read()
+
+    (tmp_path / "empty.srt").write_bytes(b"")
+    assert read_text(str(tmp_path / "empty.srt")) == ""
+
+
+def test_randomized_parity():
+    rng = random.Random(1234)
+    lines = [
+        "Hello there",
+        "-Dialogue",
+        "- Other speaker",
+        "<i>Italic</i> text",
+        "<font color=red>",
+        "",
+        "   ",
+        "42",
+        "Trailing space ",
+        "00:00:09,000 --> 00:00:10,000",
+    ]
+    separators = ["\n\n", "\n", "\n\n\n", "\n \n"]
+
+    for _ in range(500):
+        blocks = []
+        for index in range(rng.randint(0, 6)):
+            start = rng.randint(0, 5000)
+            end = start + rng.choice([-10, 0, 1, 800, 2000])
+            timestamps = "{} --> {}".format(
+                srt.timedelta_to_srt_timestamp(srt.timedelta(milliseconds=start)),
+                srt.timedelta_to_srt_timestamp(srt.timedelta(milliseconds=max(end, 0))),
+            )
+            body = "\n".join(rng.choice(lines) for _ in range(rng.randint(0, 3)))
+            blocks.append(f"{rng.choice([index + 1, 1, 99])}\n{timestamps}\n{body}")
+
+        content = "".join(block + rng.choice(separators) for block in blocks)
+        if rng.random() < 0.1:
+            content = "\ufeff" + content
+        assert_parity(content)
@@ -0,0 +1,75 @@
+import pytest
+
+from srtranslator.translators.base import Translator, unframe
+
+
+class ScriptedTranslator(Translator):
+    """Upper-cases the text after an optional transform mimicking a backend quirk"""
+
+    max_char = 1500
+
+    def __init__(self, transform=None):
+        self.requests = []
+        self.transform = transform or (lambda text: text)
+
+    def translate_single(self, text, source_language, destination_language, context=None):
+        self.requests.append(text)
+        return self.transform(text).upper()
+
+
+def merge_b(text):
+    # "[[0]] a\n[[1]] b" -> "[[0]] a b": the marker and line break of b are lost
+    lines = text.split("\n")
+    merged = []
+    for line in lines:
+        if line.endswith(" b") and merged:
+            merged[-1] += " b"
+        else:
+            merged.append(line)
+    return "\n".join(merged)
+
+
+def test_lines_come_back_by_marker():
+    translator = ScriptedTranslator()
+    assert translator.translate(["one", "two", "three"], "en", "es") == ["ONE", "TWO", "THREE"]
+    assert translator.requests == ["[[0]] one\n[[1]] two\n[[2]] three"]
+
+
+def test_mismatch_retries_only_the_failing_half():
+    translator = ScriptedTranslator(merge_b)
+    lines = ["a", "b", "c", "d", "e", "f", "g", "h"]
+
+    assert translator.translate(lines, "en", "es") == [line.upper() for line in lines]
+    # Whole batch, halves, quarters of the half holding "b", then "a" and "b" alone
+    assert translator.requests[1:3] == [
+        "[[0]] a\n[[1]] b\n[[2]] c\n[[3]] d",
+        "[[0]] a\n[[1]] b",
+    ]
+    assert len(translator.requests) == 7
+
+
+def test_split_lines_are_joined_back():
+    assert unframe("[[0]] Hola\nmundo\n[[1]] Adiós", 2) == ["Hola mundo", "Adiós"]
+    assert unframe("[[ 0 ]]Hola\n[[1]] Adiós", 2) == ["Hola", "Adiós"]
+
+
+def test_dropped_markers_are_accepted_when_lines_match():
+    assert unframe("Hola\nAdiós\n", 2) == ["Hola", "Adiós"]
+    assert unframe("Hola Adiós", 2) is None
+    assert unframe("[[1]] Adiós\n[[0]] Hola", 2) is None
+    assert unframe("Bonjour [[0]] Hola\n[[1]] Adiós", 2) is None
+
+
+def test_wrong_line_count_does_not_touch_the_file(tmp_path):
+    from srtranslator.srt_file import SrtFile
+
+    path = tmp_path / "sample.srt"
+    path.write_text(
+        "1\n00:00:00,000 --> 00:00:01,000\nOne\n\n2\n00:00:01,000 --> 00:00:02,000\nTwo\n",
+        encoding="utf-8",
+    )
+    srt_file = SrtFile(str(path))
+
+    with pytest.raises(ValueError, match="1 translated lines for 2"):
+        srt_file._apply_chunk([0, 1], ["Uno"])
+    assert [subtitle.content for subtitle in srt_file.subtitles] == ["One", "Two"]
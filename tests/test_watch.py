@@ -0,0 +1,81 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from srtranslator.watch import FolderWatcher, InotifyWatcher
+
+SRT_CONTENT = "1\n00:00:00,000 --> 00:00:01,000\nHello\n"
+
+
+def inotify_available():
+    try:
+        InotifyWatcher(os.getcwd()).close()
+    except OSError:
+        return False
+    return True
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+@pytest.mark.parametrize(
+    "use_inotify",
+    [False, pytest.param(True, marks=pytest.mark.skipif(not inotify_available(), reason="no inotify"))],
+)
+def test_files_are_translated_once(tmp_path, use_inotify):
+    translated = []
+
+    def translate_file(path):
+        output = path.replace(".srt", "_es.srt")
+        shutil.copy(path, output)
+        # An output with new content must be ignored because of its hash
+        with open(output.replace("_es.srt", "_out.srt"), "w", encoding="utf-8") as out:
+            out.write(SRT_CONTENT.replace("Hello", "Hola"))
+        translated.append(os.path.basename(path))
+        return [output, output.replace("_es.srt", "_out.srt")]
+
+    (tmp_path / "existing.srt").write_text(SRT_CONTENT, encoding="utf-8")
+    watcher = FolderWatcher(
+        str(tmp_path),
+        translate_file,
+        settle=0.2,
+        ignore_suffixes=["_es"],
+        use_inotify=use_inotify,
+    )
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop,))
+    thread.start()
+
+    try:
+        wait_for(lambda: translated == ["existing.srt"])
+
+        # Written in two steps, picked up once complete
+        (tmp_path / "season").mkdir()
+        with open(tmp_path / "season" / "new.srt", "w", encoding="utf-8") as partial:
+            partial.write(SRT_CONTENT[:20])
+            partial.flush()
+            time.sleep(0.1)
+            partial.write(SRT_CONTENT[20:].replace("Hello", "Bye"))
+        wait_for(lambda: len(translated) == 2)
+
+        # Same content again under other names
+        shutil.copy(tmp_path / "existing.srt", tmp_path / "copy.srt")
+        os.rename(tmp_path / "season" / "new.srt", tmp_path / "renamed.srt")
+        time.sleep(1)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert translated == ["existing.srt", "new.srt"]
+    # Two sources (the _es copies share their hashes) and one _out content
+    assert sorted("source" in entry for entry in watcher.state.values()) == [False, True, True]
+
+    # State survives restarts
+    assert FolderWatcher(str(tmp_path), translate_file).state == watcher.state